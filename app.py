@@ -1,23 +1,66 @@
 import os
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-from integrations.slack_integration import SlackIntegration
-from config import get_platform
+from config import get_platform, init_job_worker
+from processors.llm_processor import get_llm_stats, warm_up_local_model
+from utils.job_queue import JobQueue
+from utils.metrics import get_trace_id, new_trace_id, render_prometheus
+from utils.plugins import preload_plugins
+from utils.structured_logging import configure_logging
+
+# Write logs from a background thread so request handlers never block on stdout
+configure_logging()
 
 app = Flask(__name__)
 
+# Platform, LLM backend and article extractor are imported on first use. With PRELOAD_PLUGINS they
+# are imported now instead, so fork-based servers (gunicorn --preload) and process job workers
+# share them rather than each worker importing them on its first event.
+if os.getenv("PRELOAD_PLUGINS", "False").lower() == "true":
+    preload_plugins()
+
+# Background worker pool for the article/LLM pipeline (JOB_WORKERS=0 processes events inline)
+job_queue = None
+if int(os.getenv("JOB_WORKERS", "4")) > 0:
+    job_queue = JobQueue(initializer=init_job_worker)
+
 # Create an instance of the platform integration (Slack for now)
-platform = get_platform()
+platform = get_platform(job_queue=job_queue)
+
+# Optionally load local models at startup rather than on the first summary
+if os.getenv("GPT4ALL_WARM", "False").lower() == "true":
+    warm_up_local_model()
+
+# Give every request a trace id (reusing the caller's X-Request-Id) that follows it into background jobs
+@app.before_request
+def start_trace():
+    new_trace_id(request.headers.get("X-Request-Id"))
+
+@app.after_request
+def add_trace_header(response):
+    response.headers["X-Trace-Id"] = get_trace_id() or ""
+    return response
 
 # Define the root route for a quick "Hello, World!" check
 @app.route("/")
 def hello_world():
     return "Hello, World! The Flask app is running!"
 
+# Route exposing cache hit/miss counters and LLM metrics
+@app.route("/stats")
+def stats():
+    cache_stats = getattr(platform, "cache_stats", None)
+    return jsonify({**(cache_stats() if cache_stats else {}), **get_llm_stats()})
+
+# Prometheus scrape endpoint with per-stage latencies and cache/dedup/retry/error counters
+@app.route("/metrics")
+def metrics():
+    return Response(render_prometheus(), mimetype="text/plain; version=0.0.4")
+
 # Route for platform-specific events
 @app.route("/events", methods=["POST"])
 def events():
@@ -26,7 +69,7 @@ def events():
         return jsonify({"error": "Invalid data format"}), 400
 
     # Delegate to the platform-specific handler
-    response = platform.handle_event(data)
+    response = platform.handle_event(data, headers=request.headers)
     return response
 
 if __name__ == "__main__":
@@ -37,7 +80,7 @@ if __name__ == "__main__":
         from pyngrok import ngrok
 
         # Start NGROK and get the public URL
-        ngrok_tunnel = ngrok.connect(3000)
+        ngrok_tunnel = ngrok.connect(int(os.getenv("PORT", "3000")))
 
         # Extract the actual public URL from the tunnel object
         public_url = ngrok_tunnel.public_url
@@ -50,4 +93,4 @@ if __name__ == "__main__":
         print(f"Slack Event Subscription URL: {full_url}")
 
     # Run the Flask app
-    app.run(port=3000)
+    app.run(port=int(os.getenv("PORT", "3000")))
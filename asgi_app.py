@@ -0,0 +1,126 @@
+import asyncio
+import json
+import os
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+from config import get_platform
+from processors.llm_processor import get_llm_stats, warm_up_local_model
+from utils import async_http_client
+from utils.job_queue import AsyncJobQueue
+from utils.metrics import new_trace_id, render_prometheus
+from utils.plugins import preload_plugins
+from utils.structured_logging import configure_logging
+
+configure_logging()
+
+# ASGI entry point exposing the same /events contract as app.py, with the whole pipeline
+# (Slack API, article download, LLM calls) multiplexed on one event loop per worker.
+# Run it with e.g. `uvicorn asgi_app:app --port 3000 --workers 4`.
+
+# Jobs run as tasks on the event loop instead of on a thread/process pool
+job_queue = AsyncJobQueue()
+
+# Create an instance of the platform integration (Slack for now)
+platform = get_platform(job_queue=job_queue)
+
+DRAIN_TIMEOUT = float(os.getenv("ASYNC_DRAIN_TIMEOUT", "30"))
+
+
+def request_headers(scope):
+    """Turn ASGI's lower-cased byte headers into a dict keyed like 'X-Slack-Retry-Num'."""
+    headers = {}
+    for name, value in scope["headers"]:
+        key = "-".join(part.capitalize() for part in name.decode("latin-1").split("-"))
+        headers[key] = value.decode("latin-1")
+    return headers
+
+
+async def read_body(receive):
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            return body
+
+
+async def send_response(send, result, trace_id):
+    """Send a platform result: (body, status) or (body, status, headers), where body is a dict or a string."""
+    body, status = result[0], result[1]
+    headers = dict(result[2]) if len(result) > 2 else {}
+    headers["X-Trace-Id"] = trace_id
+    if isinstance(body, (dict, list)):
+        payload = json.dumps(body).encode("utf-8")
+        headers.setdefault("Content-Type", "application/json")
+    else:
+        payload = str(body).encode("utf-8")
+        headers.setdefault("Content-Type", "text/plain")
+
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(k.lower().encode("latin-1"), str(v).encode("latin-1")) for k, v in headers.items()],
+    })
+    await send({"type": "http.response.body", "body": payload})
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            # Import the platform's LLM backend and extractor before the first event rather than during it
+            if os.getenv("PRELOAD_PLUGINS", "False").lower() == "true":
+                await asyncio.to_thread(preload_plugins)
+            if os.getenv("GPT4ALL_WARM", "False").lower() == "true":
+                await asyncio.to_thread(warm_up_local_model)
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            # Let in-flight summaries finish before the worker exits
+            await job_queue.shutdown(timeout=DRAIN_TIMEOUT)
+            await async_http_client.close_sessions()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        return await lifespan(receive, send)
+    if scope["type"] != "http":
+        return
+
+    method, path = scope["method"], scope["path"]
+    headers = request_headers(scope)
+    # Each request runs in its own task, so the trace id stays local to it
+    trace_id = new_trace_id(headers.get("X-Request-Id"))
+
+    # Root route for a quick "Hello, World!" check
+    if path == "/" and method == "GET":
+        result = ("Hello, World! The ASGI app is running!", 200)
+
+    # Cache hit/miss counters and LLM metrics
+    elif path == "/stats" and method == "GET":
+        cache_stats = getattr(platform, "cache_stats", None)
+        result = ({**(cache_stats() if cache_stats else {}), **get_llm_stats()}, 200)
+
+    # Prometheus scrape endpoint
+    elif path == "/metrics" and method == "GET":
+        result = (render_prometheus(), 200, {"Content-Type": "text/plain; version=0.0.4"})
+
+    # Platform-specific events
+    elif path == "/events" and method == "POST":
+        try:
+            data = json.loads(await read_body(receive))
+        except ValueError:
+            data = None
+        if not isinstance(data, dict):
+            result = ({"error": "Invalid data format"}, 400)
+        else:
+            result = await platform.handle_event_async(data, headers=headers)
+
+    else:
+        result = ({"error": "Not found"}, 404)
+
+    await send_response(send, result, trace_id)
@@ -0,0 +1,145 @@
+import argparse
+import json
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from benchmarks.fake_articles import article_html
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# The fixed corpus: deterministic pages of several sizes, each plain and wrapped in the clutter of
+# a real news site (scripts, cookie banner, sidebars, related links, comments).
+CORPUS_SIZES = (2_000, 8_000, 32_000, 128_000, 512_000)
+
+# Phrases that only occur in the clutter; finding them in the extracted text means boilerplate leaked in
+NOISE_MARKERS = ("Accept all cookies", "Related coverage", "Most read", "Sign up for our newsletter", "Reader comments")
+
+CLUTTER_HEAD = (
+    "<script>window.analytics = {track: function () {}}; var ads = [1, 2, 3];</script>"
+    "<style>body { font-family: serif } .sidebar { float: right }</style>"
+    "<meta property='og:title' content='{title}'><meta name='author' content='Benchmark Desk'>"
+    "<meta property='article:published_time' content='2024-09-01T08:00:00Z'>"
+    "<meta property='og:image' content='/images/lead.jpg'>"
+)
+CLUTTER_TOP = (
+    "<div class='cookie-banner'><p>We use cookies to improve your experience. Accept all cookies or manage your settings.</p></div>"
+    "<header><a href='/'>Benchmark News</a><p>Sign up for our newsletter to get the latest updates every morning.</p></header>"
+)
+CLUTTER_BOTTOM = (
+    "<aside class='sidebar'><h3>Most read</h3><ul>{links}</ul></aside>"
+    "<section class='related'><h3>Related coverage</h3><ul>{links}</ul></section>"
+    "<section class='comments'><h3>Reader comments</h3>{comments}</section>"
+    "<!-- tracking pixel --><script>document.write('<img src=/pixel.gif>');</script>"
+)
+
+
+def noisy_html(html, article_id):
+    """Wrap a plain benchmark page in the clutter of a typical news site."""
+    title = re.search(r"<title>(.*?)</title>", html).group(1)
+    links = "".join(f"<li><a href='/story/{article_id}-{i}'>Story {i} about the flood relief effort</a></li>" for i in range(20))
+    comments = "".join(
+        f"<div class='comment'><p>Reader {i}: thank you for the coverage, please keep us updated on the shelters.</p></div>"
+        for i in range(10)
+    )
+    html = html.replace("</head>", CLUTTER_HEAD.replace("{title}", title) + "</head>")
+    html = html.replace("<body>", "<body>" + CLUTTER_TOP)
+    return html.replace("<footer>", CLUTTER_BOTTOM.format(links=links, comments=comments) + "<footer>")
+
+
+def corpus():
+    """[(name, html, expected paragraphs)] for every size, plain and noisy."""
+    pages = []
+    for size in CORPUS_SIZES:
+        article_id = f"corpus-{size}"
+        html = article_html(article_id, size)
+        paragraphs = re.findall(r"<p>(.*?)</p>", html)
+        pages.append((f"plain-{size // 1000}k", html, paragraphs))
+        pages.append((f"noisy-{size // 1000}k", noisy_html(html, article_id), paragraphs))
+    return pages
+
+
+def quality(text, paragraphs):
+    """(share of the article's paragraphs found in the text, share of noise markers found in it)."""
+    normalized = " ".join(text.split())
+    recall = sum(paragraph in normalized for paragraph in paragraphs) / len(paragraphs)
+    noise = sum(marker in normalized for marker in NOISE_MARKERS) / len(NOISE_MARKERS)
+    return recall, noise
+
+
+def measure_extractor(name, runs):
+    """Runs in a fresh interpreter per extractor, so import cost and peak RSS are its own."""
+    import resource
+
+    from utils.plugins import EXTRACTORS
+
+    started = time.perf_counter()
+    extractor = EXTRACTORS.resolve(name)
+    import_seconds = time.perf_counter() - started
+
+    pages = {}
+    for page_name, html, paragraphs in corpus():
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            fields = extractor.extract("http://127.0.0.1/article/corpus", html)
+            timings.append(time.perf_counter() - started)
+        recall, noise = quality(fields["text"], paragraphs)
+        pages[page_name] = {"seconds": statistics.median(timings), "recall": recall, "noise": noise}
+
+    return {
+        "extractor": name,
+        "import_seconds": import_seconds,
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "pages": pages,
+    }
+
+
+def run_child(name, runs):
+    command = [sys.executable, "-m", "benchmarks.extraction", "--child", name, "--runs", str(runs)]
+    result = subprocess.run(command, cwd=ROOT, capture_output=True, text=True, timeout=600)
+    if result.returncode != 0:
+        return {"extractor": name, "error": result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "failed"}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def print_report(reports):
+    page_names = [name for name, _, _ in corpus()]
+    for report in reports:
+        if "error" in report:
+            print(f"\n{report['extractor']}: not available ({report['error']})")
+            continue
+        pages = report["pages"].values()
+        print(f"\n{report['extractor']}: import {report['import_seconds'] * 1000:.0f}ms  peak RSS {report['max_rss_mb']:.1f}MB  "
+              f"total {sum(page['seconds'] for page in pages) * 1000:.1f}ms  "
+              f"mean recall {statistics.mean(page['recall'] for page in pages):.2f}  "
+              f"mean noise {statistics.mean(page['noise'] for page in pages):.2f}")
+        for page_name in page_names:
+            page = report["pages"][page_name]
+            print(f"  {page_name:<12} {page['seconds'] * 1000:9.2f}ms  recall {page['recall']:.2f}  noise {page['noise']:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare article extractors on a fixed local corpus.")
+    parser.add_argument("--extractors", default="lxml,newspaper", help="Comma-separated extractor names (see utils/plugins.py).")
+    parser.add_argument("--runs", type=int, default=5, help="Extractions per page; the median is reported.")
+    parser.add_argument("--output", help="Save the reports as JSON, e.g. to compare before and after a change.")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure_extractor(args.child, args.runs)))
+        return
+
+    reports = [run_child(name.strip(), args.runs) for name in args.extractors.split(",") if name.strip()]
+    print_report(reports)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(reports, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
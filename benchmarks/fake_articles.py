@@ -0,0 +1,97 @@
+import argparse
+import hashlib
+import random
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+from benchmarks.fake_server import QuietHandler, serve
+
+WORDS = (
+    "flood relief shelter volunteers water supplies evacuation district council hospital road bridge "
+    "power outage families donations coordinators medical teams rainfall river levels emergency services "
+    "displaced residents aid convoy logistics warehouse generators food parcels assessment update officials"
+).split()
+# Function words, so extractors that score text by stopword density (newspaper) recognise it as prose
+STOPWORDS = "the the the of of and and to in in for on with at by from that is was are were has have".split()
+
+
+def article_html(article_id, size):
+    """Build a deterministic news-like page of roughly size bytes for an article id."""
+    rng = random.Random(article_id)
+    title = " ".join(rng.choice(WORDS) for _ in range(8)).capitalize()
+    paragraphs = []
+    length = 0
+    while length < size:
+        sentences = []
+        for _ in range(rng.randint(3, 6)):
+            sentence = " ".join(rng.choice(WORDS if i % 2 else STOPWORDS) for i in range(rng.randint(10, 22)))
+            sentences.append(sentence.capitalize() + ".")
+        paragraph = f"<p>{' '.join(sentences)}</p>"
+        paragraphs.append(paragraph)
+        length += len(paragraph)
+
+    boilerplate = "<nav><a href='/'>Home</a> <a href='/world'>World</a> <a href='/about'>About</a></nav>"
+    return (
+        f"<html><head><title>{title}</title></head><body>{boilerplate}"
+        f"<article><h1>{title}</h1>{''.join(paragraphs)}</article>"
+        f"<footer>Copyright Benchmark News</footer></body></html>"
+    )
+
+
+class FakeArticleState:
+    def __init__(self, latency=0.0, size=8000):
+        self.latency = latency
+        self.size = size
+        self.requests = Counter()
+        self.lock = threading.Lock()
+
+    def snapshot(self):
+        with self.lock:
+            return {"requests": sum(self.requests.values()), "not_modified": self.requests["304"]}
+
+
+def make_handler(state):
+    class FakeArticleHandler(QuietHandler):
+        def do_GET(self):
+            path = urlsplit(self.path).path
+            if not path.startswith("/article/"):
+                return self.send_body(404, "not found", "text/plain")
+
+            article_id = path.rsplit("/", 1)[-1]
+            size = int(self.query().get("size", state.size))
+            html = article_html(article_id, size)
+            etag = '"' + hashlib.md5(html.encode("utf-8")).hexdigest() + '"'
+
+            if state.latency:
+                time.sleep(state.latency)
+
+            if self.headers.get("If-None-Match") == etag:
+                with state.lock:
+                    state.requests["304"] += 1
+                return self.send_body(304, b"", "text/html")
+
+            with state.lock:
+                state.requests["200"] += 1
+            self.send_body(200, html, "text/html; charset=utf-8", {"ETag": etag})
+
+    return FakeArticleHandler
+
+
+def start_fake_articles(port=0, **kwargs):
+    """Start the fake article server; returns (server, state)."""
+    state = FakeArticleState(**kwargs)
+    return serve(make_handler(state), port), state
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local article server with configurable latency and page size.")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds added to every page download.")
+    parser.add_argument("--size", type=int, default=8000, help="Approximate article body size in bytes.")
+    args = parser.parse_args()
+
+    server, _ = start_fake_articles(args.port, latency=args.latency, size=args.size)
+    print(f"Fake article server listening on http://127.0.0.1:{server.server_port}/article/<id>")
+    threading.Event().wait()
@@ -0,0 +1,111 @@
+import argparse
+import json
+import threading
+import time
+from collections import Counter
+
+from benchmarks.fake_server import QuietHandler, serve
+
+SUMMARY = (
+    "- Key events: flooding has displaced residents across several districts.\n"
+    "- Key people: district officials and relief coordinators.\n"
+    "- Key organizations: emergency services, local council, volunteer groups.\n"
+    "- Identified needs: shelter, clean water, medical supplies, generators.\n"
+    "- Identified responses: aid convoys dispatched, evacuation centres opened."
+)
+
+
+class FakeLLMState:
+    """An OpenAI-compatible chat completions endpoint that 'generates' at a fixed token rate."""
+
+    def __init__(self, tokens_per_second=50.0, prompt_tokens_per_second=2000.0, output_tokens=None):
+        self.tokens_per_second = tokens_per_second
+        self.prompt_tokens_per_second = prompt_tokens_per_second
+        self.output_tokens = output_tokens
+        self.requests = Counter()
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.lock = threading.Lock()
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "requests": sum(self.requests.values()),
+                "streamed": self.requests["stream"],
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+            }
+
+
+def make_handler(state):
+    class FakeLLMHandler(QuietHandler):
+        def do_POST(self):
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                return self.send_json(404, {"error": {"message": "not found"}})
+
+            request = self.read_json()
+            prompt = " ".join(message.get("content", "") for message in request.get("messages", []))
+            prompt_tokens = max(1, len(prompt) // 4)
+            words = SUMMARY.split(" ")
+            if state.output_tokens:
+                words = (words * (state.output_tokens // len(words) + 1))[:state.output_tokens]
+            stream = bool(request.get("stream"))
+
+            with state.lock:
+                state.requests["stream" if stream else "plain"] += 1
+                state.prompt_tokens += prompt_tokens
+                state.completion_tokens += len(words)
+
+            # Prompt processing time, then a fixed generation rate
+            time.sleep(prompt_tokens / state.prompt_tokens_per_second)
+            model = request.get("model", "fake-model")
+
+            if not stream:
+                time.sleep(len(words) / state.tokens_per_second)
+                return self.send_json(200, {
+                    "id": "chatcmpl-bench",
+                    "object": "chat.completion",
+                    "model": model,
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": " ".join(words)}, "finish_reason": "stop"}],
+                    "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": len(words), "total_tokens": prompt_tokens + len(words)},
+                })
+
+            # Server-sent events, one token per chunk
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            for i, word in enumerate(words):
+                time.sleep(1 / state.tokens_per_second)
+                chunk = {
+                    "id": "chatcmpl-bench",
+                    "object": "chat.completion.chunk",
+                    "model": model,
+                    "choices": [{"index": 0, "delta": {"content": word if i == 0 else f" {word}"}, "finish_reason": None}],
+                }
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.close_connection = True
+
+    return FakeLLMHandler
+
+
+def start_fake_llm(port=0, **kwargs):
+    """Start the fake LLM; returns (server, state). Point OPENAI_API_BASE at http://127.0.0.1:<port>/v1."""
+    state = FakeLLMState(**kwargs)
+    return serve(make_handler(state), port), state
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible LLM stand-in with a configurable token rate.")
+    parser.add_argument("--port", type=int, default=8002)
+    parser.add_argument("--tokens-per-second", type=float, default=50.0)
+    parser.add_argument("--prompt-tokens-per-second", type=float, default=2000.0)
+    parser.add_argument("--output-tokens", type=int, default=None)
+    args = parser.parse_args()
+
+    server, _ = start_fake_llm(args.port, tokens_per_second=args.tokens_per_second,
+                               prompt_tokens_per_second=args.prompt_tokens_per_second, output_tokens=args.output_tokens)
+    print(f"Fake LLM listening on http://127.0.0.1:{server.server_port}/v1")
+    threading.Event().wait()
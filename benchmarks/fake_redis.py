@@ -0,0 +1,187 @@
+import argparse
+import socketserver
+import threading
+import time
+
+from utils.redis_state import CLAIM_SCRIPT
+
+# A Redis stand-in speaking just enough of the protocol (RESP) for SHARED_STATE=redis: strings with
+# expiry, SET NX, INCRBY, PEXPIRE, DEL, EXISTS, and EVAL of the app's own scripts (there is no Lua
+# here, each known script has a Python equivalent). Lets several app processes share state in
+# benchmarks without a Redis server installed.
+
+
+class FakeRedisState:
+    def __init__(self):
+        # key -> (value, expires_at or None)
+        self.data = {}
+        self.commands = {}
+        self.lock = threading.Lock()
+
+    def snapshot(self):
+        with self.lock:
+            return {"keys": len(self.data), "commands": dict(self.commands)}
+
+    def live(self, key, now):
+        item = self.data.get(key)
+        if item is None:
+            return None
+        if item[1] is not None and item[1] <= now:
+            del self.data[key]
+            return None
+        return item
+
+    def execute(self, args):
+        """Run one command (a list of bytes) under the lock; returns a reply for encode()."""
+        name = args[0].decode().upper()
+        now = time.monotonic()
+        with self.lock:
+            self.commands[name] = self.commands.get(name, 0) + 1
+            handler = getattr(self, f"cmd_{name.lower()}", None)
+            if handler is None:
+                return Error(f"ERR unknown command '{name}'")
+            try:
+                return handler(now, *args[1:])
+            except (TypeError, ValueError):
+                return Error(f"ERR wrong arguments for '{name}'")
+
+    def cmd_ping(self, now, *args):
+        return Status("PONG")
+
+    def cmd_select(self, now, db):
+        return Status("OK")
+
+    def cmd_auth(self, now, *credentials):
+        return Status("OK")
+
+    def cmd_get(self, now, key):
+        item = self.live(key, now)
+        return item[0] if item else None
+
+    def cmd_set(self, now, key, value, *options):
+        options = [option.decode().upper() if isinstance(option, bytes) else option for option in options]
+        expires_at = None
+        if "PX" in options:
+            expires_at = now + int(options[options.index("PX") + 1]) / 1000
+        elif "EX" in options:
+            expires_at = now + int(options[options.index("EX") + 1])
+        exists = self.live(key, now) is not None
+        if ("NX" in options and exists) or ("XX" in options and not exists):
+            return None
+        self.data[key] = (value, expires_at)
+        return Status("OK")
+
+    def cmd_del(self, now, *keys):
+        return sum(1 for key in keys if self.live(key, now) is not None and self.data.pop(key))
+
+    def cmd_exists(self, now, *keys):
+        return sum(1 for key in keys if self.live(key, now) is not None)
+
+    def cmd_incrby(self, now, key, amount):
+        item = self.live(key, now)
+        total = (int(item[0]) if item else 0) + int(amount)
+        self.data[key] = (str(total).encode(), item[1] if item else None)
+        return total
+
+    def cmd_incr(self, now, key):
+        return self.cmd_incrby(now, key, b"1")
+
+    def cmd_pexpire(self, now, key, milliseconds):
+        item = self.live(key, now)
+        if item is None:
+            return 0
+        self.data[key] = (item[0], now + int(milliseconds) / 1000)
+        return 1
+
+    def cmd_pttl(self, now, key):
+        item = self.live(key, now)
+        if item is None:
+            return -2
+        return -1 if item[1] is None else int((item[1] - now) * 1000)
+
+    def cmd_eval(self, now, script, numkeys, *args):
+        numkeys = int(numkeys)
+        keys, argv = args[:numkeys], args[numkeys:]
+        if script.decode() == CLAIM_SCRIPT:
+            # Runs under the state lock, so it is as atomic as the script on a real server
+            if any(self.live(key, now) is not None for key in keys):
+                return 0
+            for key in keys:
+                self.data[key] = (argv[0], now + int(argv[1]) / 1000)
+            return 1
+        return Error("NOSCRIPT only the app's own scripts are supported")
+
+    def cmd_flushdb(self, now):
+        self.data.clear()
+        return Status("OK")
+
+
+class Status(str):
+    pass
+
+
+class Error(str):
+    pass
+
+
+def encode(reply):
+    if reply is None:
+        return b"$-1\r\n"
+    if isinstance(reply, Error):
+        return b"-" + reply.encode() + b"\r\n"
+    if isinstance(reply, Status):
+        return b"+" + reply.encode() + b"\r\n"
+    if isinstance(reply, int):
+        return b":%d\r\n" % reply
+    return b"$%d\r\n%s\r\n" % (len(reply), reply)
+
+
+def read_command(rfile):
+    """One command as a list of bytes, or None at end of stream."""
+    line = rfile.readline()
+    if not line:
+        return None
+    if not line.startswith(b"*"):
+        # Inline command, e.g. from telnet
+        return line.split()
+    args = []
+    for _ in range(int(line[1:])):
+        length = int(rfile.readline()[1:])
+        args.append(rfile.read(length + 2)[:-2])
+    return args
+
+
+def make_handler(state):
+    class FakeRedisHandler(socketserver.StreamRequestHandler):
+        def handle(self):
+            while True:
+                args = read_command(self.rfile)
+                if args is None:
+                    return
+                if args:
+                    self.wfile.write(encode(state.execute(args)))
+
+    return FakeRedisHandler
+
+
+class FakeRedisServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def start_fake_redis(port=0):
+    """Start the fake Redis; returns (server, state). Point SHARED_STATE_URL at redis://127.0.0.1:<port>/0."""
+    state = FakeRedisState()
+    server = FakeRedisServer(("127.0.0.1", port), make_handler(state))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local Redis-protocol stand-in for SHARED_STATE=redis.")
+    parser.add_argument("--port", type=int, default=6379)
+    args = parser.parse_args()
+
+    server, _ = start_fake_redis(args.port)
+    print(f"Fake Redis listening on redis://127.0.0.1:{server.server_address[1]}/0")
+    threading.Event().wait()
@@ -0,0 +1,42 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+
+class QuietHandler(BaseHTTPRequestHandler):
+    """Base request handler for the local stand-ins: no access log, JSON helpers."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        return json.loads(body) if body else {}
+
+    def query(self):
+        return dict(parse_qsl(urlsplit(self.path).query))
+
+    def send_body(self, status, body, content_type, headers=None):
+        payload = body if isinstance(body, bytes) else body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def send_json(self, status, data, headers=None):
+        self.send_body(status, json.dumps(data), "application/json", headers)
+
+
+def serve(handler_class, port=0):
+    """Start a threaded HTTP server in a daemon thread and return it (server.server_port has the port)."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler_class)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,96 @@
+import argparse
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+from benchmarks.fake_server import QuietHandler, serve
+
+BOT_USER_ID = "UBRIDGEBOT"
+
+
+class FakeSlackState:
+    """What the fake Slack Web API was asked, and when replies were posted."""
+
+    def __init__(self, latency=0.0, article_base_url="http://127.0.0.1:8001", links_per_message=1, user="UBENCH"):
+        self.latency = latency
+        self.article_base_url = article_base_url
+        self.links_per_message = links_per_message
+        self.user = user
+        self.calls = Counter()
+        # thread_ts -> monotonic time of the first reply posted in that thread
+        self.first_reply_at = {}
+        self.replies = Counter()
+        self.lock = threading.Lock()
+
+    def message_text(self, ts):
+        links = " ".join(
+            f"<{self.article_base_url}/article/{ts.replace('.', '-')}-{i}>" for i in range(self.links_per_message)
+        )
+        return f"Situation update, please summarize: {links}"
+
+    def record_reply(self, thread_ts):
+        with self.lock:
+            self.first_reply_at.setdefault(thread_ts, time.monotonic())
+            self.replies[thread_ts] += 1
+
+    def snapshot(self):
+        with self.lock:
+            return {"calls": dict(self.calls), "replies": sum(self.replies.values()), "threads_replied": len(self.replies)}
+
+
+def make_handler(state):
+    class FakeSlackHandler(QuietHandler):
+        def handle_api(self, params):
+            method = urlsplit(self.path).path.rsplit("/", 1)[-1]
+            with state.lock:
+                state.calls[method] += 1
+            if state.latency:
+                time.sleep(state.latency)
+
+            if method == "auth.test":
+                return {"ok": True, "user_id": BOT_USER_ID, "team": "Benchmark", "team_id": "TBENCH"}
+            if method == "conversations.info":
+                return {"ok": True, "channel": {"id": params.get("channel"), "is_private": False}}
+            if method == "conversations.history":
+                ts = params.get("latest")
+                return {"ok": True, "messages": [{"type": "message", "user": state.user, "text": state.message_text(ts), "ts": ts}]}
+            if method == "chat.postMessage":
+                thread_ts = params.get("thread_ts") or params.get("ts")
+                state.record_reply(thread_ts)
+                return {"ok": True, "channel": params.get("channel"), "ts": f"{time.time():.6f}"}
+            if method == "chat.update":
+                return {"ok": True, "channel": params.get("channel"), "ts": params.get("ts")}
+            if method == "chat.getPermalink":
+                return {"ok": True, "permalink": f"https://benchmark.slack.com/archives/{params.get('channel')}/p{params.get('message_ts', '').replace('.', '')}"}
+            return {"ok": False, "error": "unknown_method"}
+
+        def do_GET(self):
+            self.send_json(200, self.handle_api(self.query()))
+
+        def do_POST(self):
+            params = self.query()
+            params.update(self.read_json())
+            self.send_json(200, self.handle_api(params))
+
+    return FakeSlackHandler
+
+
+def start_fake_slack(port=0, **kwargs):
+    """Start the fake Slack Web API; returns (server, state). Point SLACK_API_BASE_URL at http://127.0.0.1:<port>/api."""
+    state = FakeSlackState(**kwargs)
+    return serve(make_handler(state), port), state
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for the Slack Web API.")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds added to every API call.")
+    parser.add_argument("--article-base-url", default="http://127.0.0.1:8001")
+    parser.add_argument("--links-per-message", type=int, default=1)
+    args = parser.parse_args()
+
+    server, _ = start_fake_slack(args.port, latency=args.latency, article_base_url=args.article_base_url,
+                                 links_per_message=args.links_per_message)
+    print(f"Fake Slack API listening on http://127.0.0.1:{server.server_port}/api")
+    threading.Event().wait()
@@ -0,0 +1,250 @@
+import argparse
+import copy
+import json
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+
+PAYLOAD_DIR = Path(__file__).parent / "payloads"
+
+STAGE_LINE = re.compile(r'^bridge_stage_duration_seconds_(sum|count)\{(.*)\} ([0-9.eE+-]+)$')
+STAGE_LABEL = re.compile(r'stage="([^"]*)"')
+
+
+def load_payload(name):
+    with open(PAYLOAD_DIR / f"{name}.json", "r") as f:
+        return json.load(f)
+
+
+def reaction_event(ts, event_id, channel="CBENCH", team_id="TBENCH", user="UBENCH"):
+    payload = copy.deepcopy(load_payload("reaction_added"))
+    payload["team_id"] = team_id
+    payload["event_id"] = event_id
+    payload["event"]["user"] = user
+    payload["event"]["item"]["channel"] = channel
+    payload["event"]["item"]["ts"] = ts
+    return payload
+
+
+def message_event(ts, text, event_id, channel="CBENCH", team_id="TBENCH", user="UAUTHOR"):
+    payload = copy.deepcopy(load_payload("message"))
+    payload["team_id"] = team_id
+    payload["event_id"] = event_id
+    payload["event"].update({"channel": channel, "user": user, "text": text, "ts": ts})
+    return payload
+
+
+def build_events(scenario, count, messages=10, retries=2, replay=None, message_text=None):
+    """
+    Build the list of (payload, headers) deliveries for a scenario:
+    - unique: one reaction per message, every message distinct
+    - storm: count reactions spread over a handful of messages, as when a link goes viral
+    - retries: every delivery is followed by Slack's redeliveries of the same event_id
+    - replay: deliveries read from a JSONL file of {"payload": ..., "headers": ...}
+
+    With message_text (a function of the message ts), each message's own message event is
+    delivered before its first reaction, as Slack does when the bot is in the channel.
+    """
+    if scenario == "replay":
+        with open(replay, "r") as f:
+            return [(record["payload"], record.get("headers", {})) for record in map(json.loads, f) if record]
+
+    # Timestamps based on the wall clock keep runs against a persistent dedup store independent
+    base = int(time.time())
+    events = []
+    for i in range(count):
+        if scenario == "storm":
+            ts = f"{base}.{i % messages:06d}"
+        else:
+            ts = f"{base}.{i:06d}"
+        event_id = f"EvBENCH{base}{i:06d}"
+        if message_text and (scenario != "storm" or i < messages):
+            events.append((message_event(ts, message_text(ts), f"EvBENCHMSG{base}{i:06d}"), {}))
+        payload = reaction_event(ts, event_id)
+        events.append((payload, {}))
+
+        if scenario == "retries":
+            for retry_num in range(1, retries + 1):
+                events.append((payload, {"X-Slack-Retry-Num": str(retry_num), "X-Slack-Retry-Reason": "http_timeout"}))
+    return events
+
+
+def send_event(url, payload, headers, timeout=10):
+    """POST one event; returns (status, ack latency in seconds)."""
+    body = json.dumps(payload).encode("utf-8")
+    request = Request(url, data=body, method="POST", headers={"Content-Type": "application/json", **headers})
+    started = time.perf_counter()
+    try:
+        with urlopen(request, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except HTTPError as e:
+        status = e.code
+    except (URLError, OSError):
+        status = "error"
+    return status, time.perf_counter() - started
+
+
+def run_load(url, events, concurrency=20, rate=None):
+    """
+    Deliver events to url with a pool of senders, optionally paced at rate events/second.
+    Returns the ack latencies, status counts, wall time and the monotonic send time of the
+    first delivery per message ts (for end-to-end latency).
+    """
+    latencies = []
+    statuses = Counter()
+    sent_at = {}
+    lock = threading.Lock()
+
+    def deliver(payload, headers):
+        ts = payload.get("event", {}).get("item", {}).get("ts")
+        with lock:
+            if ts:
+                sent_at.setdefault(ts, time.monotonic())
+        status, latency = send_event(url, payload, headers)
+        with lock:
+            latencies.append(latency)
+            statuses[status] += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for i, (payload, headers) in enumerate(events):
+            if rate:
+                delay = started + i / rate - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            executor.submit(deliver, payload, headers)
+    elapsed = time.perf_counter() - started
+
+    return {"latencies": latencies, "statuses": statuses, "elapsed": elapsed, "sent_at": sent_at}
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def latency_summary(values):
+    return {
+        "count": len(values),
+        "p50": percentile(values, 50),
+        "p90": percentile(values, 90),
+        "p99": percentile(values, 99),
+        "max": max(values) if values else None,
+    }
+
+
+def fetch_stage_totals(metrics_url):
+    """Read per-stage (sum, count) totals from the app's /metrics endpoint."""
+    totals = defaultdict(lambda: [0.0, 0])
+    try:
+        with urlopen(metrics_url, timeout=10) as response:
+            text = response.read().decode("utf-8")
+    except (URLError, OSError):
+        return {}
+
+    for line in text.splitlines():
+        match = STAGE_LINE.match(line)
+        if not match:
+            continue
+        kind, labels, value = match.groups()
+        stage = STAGE_LABEL.search(labels)
+        if stage:
+            totals[stage.group(1)][0 if kind == "sum" else 1] += float(value)
+    return dict(totals)
+
+
+def stage_means(before, after):
+    """Mean seconds per stage for the observations made between two /metrics snapshots."""
+    means = {}
+    for stage, (total, count) in after.items():
+        prev_total, prev_count = before.get(stage, (0.0, 0))
+        if count > prev_count:
+            means[stage] = {"count": int(count - prev_count), "mean": (total - prev_total) / (count - prev_count)}
+    return dict(sorted(means.items()))
+
+
+def end_to_end_latencies(sent_at, first_reply_at):
+    return [first_reply_at[ts] - sent for ts, sent in sent_at.items() if ts in first_reply_at]
+
+
+def wait_for_replies(slack_state, expected, timeout):
+    """Wait until the fake Slack has seen a reply in `expected` threads, or timeout seconds pass."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with slack_state.lock:
+            if len(slack_state.first_reply_at) >= expected:
+                return True
+        time.sleep(0.1)
+    return False
+
+
+def format_seconds(value):
+    return "-" if value is None else f"{value * 1000:.1f}ms"
+
+
+def print_report(report):
+    print(f"\nScenario: {report['scenario']}  deliveries: {report['deliveries']}  wall time: {report['elapsed']:.2f}s  "
+          f"throughput: {report['throughput']:.1f} events/s")
+    print(f"Status codes: {report['statuses']}")
+
+    for name in ("ack_latency", "end_to_end_latency"):
+        summary = report.get(name)
+        if summary:
+            print(f"{name.replace('_', ' ').capitalize()} (n={summary['count']}): p50 {format_seconds(summary['p50'])}  "
+                  f"p90 {format_seconds(summary['p90'])}  p99 {format_seconds(summary['p99'])}  max {format_seconds(summary['max'])}")
+
+    if report.get("stages"):
+        print("Per-stage means:")
+        for stage, values in report["stages"].items():
+            print(f"  {stage:<32} {values['count']:>6}  {format_seconds(values['mean'])}")
+
+    if report.get("upstream"):
+        print("Upstream calls:")
+        for name, values in report["upstream"].items():
+            print(f"  {name}: {values}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay Slack event deliveries against a running bridge.")
+    parser.add_argument("--url", default="http://127.0.0.1:3000", help="Base URL of the running app.")
+    parser.add_argument("--scenario", choices=["unique", "storm", "retries", "replay"], default="unique")
+    parser.add_argument("--count", type=int, default=100, help="Number of reactions to send.")
+    parser.add_argument("--messages", type=int, default=10, help="Distinct messages in the storm scenario.")
+    parser.add_argument("--retries", type=int, default=2, help="Redeliveries per event in the retries scenario.")
+    parser.add_argument("--replay", help="JSONL file of recorded deliveries for the replay scenario.")
+    parser.add_argument("--with-messages", metavar="ARTICLE_BASE_URL",
+                        help="Send each message's message event (linking to this article server) before its reactions.")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--rate", type=float, default=None, help="Target events per second (default: as fast as possible).")
+    args = parser.parse_args()
+
+    message_text = None
+    if args.with_messages:
+        message_text = lambda ts: f"Situation update, please summarize: <{args.with_messages}/article/{ts.replace('.', '-')}-0>"
+    events = build_events(args.scenario, args.count, args.messages, args.retries, args.replay, message_text)
+    before = fetch_stage_totals(f"{args.url}/metrics")
+    result = run_load(f"{args.url}/events", events, args.concurrency, args.rate)
+    after = fetch_stage_totals(f"{args.url}/metrics")
+
+    print_report({
+        "scenario": args.scenario,
+        "deliveries": len(events),
+        "elapsed": result["elapsed"],
+        "throughput": len(events) / result["elapsed"] if result["elapsed"] else 0,
+        "statuses": dict(result["statuses"]),
+        "ack_latency": latency_summary(result["latencies"]),
+        "stages": stage_means(before, after),
+    })
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from urllib.error import URLError
+from urllib.request import urlopen
+
+from benchmarks.fake_articles import start_fake_articles
+from benchmarks.fake_llm import start_fake_llm
+from benchmarks.fake_redis import start_fake_redis
+from benchmarks.fake_slack import start_fake_slack
+from benchmarks.load_generator import (
+    build_events, end_to_end_latencies, fetch_stage_totals, latency_summary, print_report,
+    run_load, stage_means, wait_for_replies,
+)
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_until_ready(url, process, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"App exited during startup with code {process.returncode}")
+        try:
+            with urlopen(url, timeout=1):
+                return
+        except (URLError, OSError):
+            time.sleep(0.2)
+    raise RuntimeError(f"App did not become ready at {url} within {timeout}s")
+
+
+def app_environment(port, slack_port, llm_port, data_dir, extra_env):
+    """Environment for the app under test: every upstream points at a local stand-in, all state in data_dir."""
+    env = dict(os.environ)
+    env.update({
+        "PORT": str(port),
+        "PLATFORM": "slack",
+        "SLACK_BOT_USER_OAUTH_TOKENS": "TBENCH:xoxb-bench",
+        "SLACK_TRIGGER_GROUP": "UBENCH",
+        "SLACK_API_BASE_URL": f"http://127.0.0.1:{slack_port}/api",
+        "LLM_PROVIDER": "openai",
+        "OPENAI_API_KEY": "sk-bench",
+        "OPENAI_API_BASE": f"http://127.0.0.1:{llm_port}/v1",
+        "SHARED_STATE_PATH": os.path.join(data_dir, "shared_state.sqlite3"),
+        "SUMMARY_CACHE_PATH": os.path.join(data_dir, "summaries.sqlite3"),
+        "ARTICLE_CACHE_DIR": os.path.join(data_dir, "articles"),
+        "DUPLICATE_INDEX_PATH": os.path.join(data_dir, "duplicates.sqlite3"),
+        "DIGEST_DB_PATH": os.path.join(data_dir, "digests.sqlite3"),
+        "USE_NGROK": "False",
+        "PYTHONUNBUFFERED": "1",
+    })
+    env.update(extra_env)
+    return env
+
+
+def parse_env(pairs):
+    env = {}
+    for pair in pairs:
+        name, _, value = pair.partition("=")
+        env[name] = value
+    return env
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the bridge against local Slack, article and LLM stand-ins and report latency.")
+    parser.add_argument("--asgi", action="store_true", help="Benchmark asgi_app under uvicorn instead of the Flask app.")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes (uvicorn --workers, so only with --asgi).")
+    parser.add_argument("--shared-state", choices=["sqlite", "redis"], default="sqlite",
+                        help="Shared state backend for the workers; redis starts the local Redis stand-in.")
+    parser.add_argument("--scenario", choices=["unique", "storm", "retries", "replay"], default="unique")
+    parser.add_argument("--count", type=int, default=50)
+    parser.add_argument("--messages", type=int, default=10)
+    parser.add_argument("--retries", type=int, default=2)
+    parser.add_argument("--replay")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--rate", type=float, default=None)
+    parser.add_argument("--links-per-message", type=int, default=1)
+    parser.add_argument("--with-messages", action="store_true",
+                        help="Deliver each message's message event before its reactions, so they can skip the history fetch.")
+    parser.add_argument("--slack-latency", type=float, default=0.05)
+    parser.add_argument("--article-latency", type=float, default=0.2)
+    parser.add_argument("--article-size", type=int, default=8000)
+    parser.add_argument("--llm-tokens-per-second", type=float, default=50.0)
+    parser.add_argument("--drain-timeout", type=float, default=120, help="Seconds to wait for all replies to be posted.")
+    parser.add_argument("--env", action="append", default=[], metavar="NAME=VALUE",
+                        help="Extra environment for the app, e.g. --env JOB_WORKERS=8 (repeatable).")
+    parser.add_argument("--output", help="Write the report as JSON for comparing runs.")
+    parser.add_argument("--show-app-output", action="store_true")
+    args = parser.parse_args()
+    if args.workers > 1 and not args.asgi:
+        parser.error("--workers needs --asgi")
+
+    articles, article_state = start_fake_articles(latency=args.article_latency, size=args.article_size)
+    slack, slack_state = start_fake_slack(
+        latency=args.slack_latency,
+        article_base_url=f"http://127.0.0.1:{articles.server_port}",
+        links_per_message=args.links_per_message,
+    )
+    llm, llm_state = start_fake_llm(tokens_per_second=args.llm_tokens_per_second)
+    servers = [articles, slack, llm]
+    extra_env = {}
+    redis_state = None
+    if args.shared_state == "redis":
+        redis, redis_state = start_fake_redis()
+        servers.append(redis)
+        extra_env = {"SHARED_STATE": "redis", "SHARED_STATE_URL": f"redis://127.0.0.1:{redis.server_address[1]}/0"}
+    extra_env.update(parse_env(args.env))
+
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+
+    with tempfile.TemporaryDirectory(prefix="bridge-bench-") as data_dir:
+        env = app_environment(port, slack.server_port, llm.server_port, data_dir, extra_env)
+        if args.asgi:
+            command = [sys.executable, "-m", "uvicorn", "asgi_app:app", "--port", str(port), "--log-level", "warning",
+                       "--workers", str(args.workers)]
+        else:
+            command = [sys.executable, "app.py"]
+        output = None if args.show_app_output else subprocess.DEVNULL
+        process = subprocess.Popen(command, cwd=ROOT, env=env, stdout=output, stderr=output)
+
+        try:
+            wait_until_ready(f"{base_url}/", process)
+            message_text = slack_state.message_text if args.with_messages else None
+            events = build_events(args.scenario, args.count, args.messages, args.retries, args.replay, message_text)
+
+            before = fetch_stage_totals(f"{base_url}/metrics")
+            result = run_load(f"{base_url}/events", events, args.concurrency, args.rate)
+            drained = wait_for_replies(slack_state, len(result["sent_at"]), args.drain_timeout)
+            after = fetch_stage_totals(f"{base_url}/metrics")
+        finally:
+            process.terminate()
+            try:
+                process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    with slack_state.lock:
+        first_reply_at = dict(slack_state.first_reply_at)
+
+    report = {
+        "scenario": args.scenario,
+        "server": "asgi" if args.asgi else "flask",
+        "workers": args.workers,
+        "shared_state": args.shared_state,
+        "env": parse_env(args.env),
+        "deliveries": len(events),
+        "elapsed": result["elapsed"],
+        "throughput": len(events) / result["elapsed"] if result["elapsed"] else 0,
+        "statuses": {str(k): v for k, v in result["statuses"].items()},
+        "ack_latency": latency_summary(result["latencies"]),
+        "end_to_end_latency": latency_summary(end_to_end_latencies(result["sent_at"], first_reply_at)),
+        "drained": drained,
+        "stages": stage_means(before, after),
+        "upstream": {
+            "slack": slack_state.snapshot(),
+            "articles": article_state.snapshot(),
+            "llm": llm_state.snapshot(),
+        },
+    }
+    if redis_state:
+        report["upstream"]["redis"] = redis_state.snapshot()
+    print_report(report)
+    if not drained:
+        print(f"Warning: only {len(first_reply_at)} of {len(result['sent_at'])} messages got a reply within {args.drain_timeout}s")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+
+    for server in servers:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Modules that should only be imported once a summary is actually needed
+HEAVY_MODULES = ("openai", "newspaper", "gpt4all", "aiohttp", "tiktoken", "lxml", "nltk")
+
+# Runs in a fresh interpreter: import the app, answer a url_verification challenge and a
+# reaction from a user outside the trigger group, then report what that cost.
+CHILD = """
+import json, resource, sys, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter() - started
+
+client = app.app.test_client()
+challenge = client.post("/events", json={"type": "url_verification", "challenge": "startup"})
+denied = client.post("/events", json={"team_id": "TBENCH", "type": "event_callback",
+                                      "event": {"type": "reaction_added", "user": "UOUTSIDER"}})
+
+print(json.dumps({
+    "import_seconds": imported,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "statuses": [challenge.status_code, denied.status_code],
+    "heavy_modules": sorted(name for name in %r if name in sys.modules),
+}))
+""" % (HEAVY_MODULES,)
+
+
+def startup_environment(data_dir, preload):
+    env = dict(os.environ)
+    env.update({
+        "PLATFORM": "slack",
+        "SLACK_BOT_USER_OAUTH_TOKENS": "TBENCH:xoxb-bench",
+        "SLACK_TRIGGER_GROUP": "UBENCH",
+        "LLM_PROVIDER": env.get("LLM_PROVIDER", "openai"),
+        "OPENAI_API_KEY": env.get("OPENAI_API_KEY", "sk-bench"),
+        "SHARED_STATE_PATH": os.path.join(data_dir, "shared_state.sqlite3"),
+        "SUMMARY_CACHE_PATH": os.path.join(data_dir, "summaries.sqlite3"),
+        "ARTICLE_CACHE_DIR": os.path.join(data_dir, "articles"),
+        "USE_NGROK": "False",
+        "LOG_LEVEL": "WARNING",
+        "PRELOAD_PLUGINS": "True" if preload else "False",
+    })
+    return env
+
+
+def measure(preload, importtime=False):
+    with tempfile.TemporaryDirectory(prefix="bridge-startup-") as data_dir:
+        command = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", CHILD]
+        result = subprocess.run(command, cwd=ROOT, env=startup_environment(data_dir, preload),
+                                capture_output=True, text=True, timeout=300)
+    if result.returncode != 0:
+        raise RuntimeError(f"App import failed:\n{result.stderr}")
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    if importtime:
+        report["slowest_imports"] = slowest_imports(result.stderr)
+    return report
+
+
+def slowest_imports(importtime_output, limit=15):
+    """Top-level packages by cumulative import time, from python -X importtime output."""
+    totals = {}
+    for line in importtime_output.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Nested imports are indented; only count top-level ones so nothing is counted twice
+        if not name.startswith("  "):
+            totals[name.strip()] = totals.get(name.strip(), 0) + int(cumulative)
+    return sorted(((name, us / 1e6) for name, us in totals.items()), key=lambda item: -item[1])[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure how long a worker takes to import the app and answer its first cheap requests."
+    )
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to start; the median is reported.")
+    parser.add_argument("--budget-seconds", type=float, default=1.5, help="Fail if the median import time is above this.")
+    parser.add_argument("--budget-mb", type=float, default=150, help="Fail if the median peak RSS is above this.")
+    parser.add_argument("--preload", action="store_true", help="Measure with PRELOAD_PLUGINS=True instead.")
+    parser.add_argument("--importtime", action="store_true", help="Also list the slowest imports.")
+    args = parser.parse_args()
+
+    reports = [measure(args.preload) for _ in range(args.runs)]
+    import_seconds = statistics.median(report["import_seconds"] for report in reports)
+    max_rss_mb = statistics.median(report["max_rss_mb"] for report in reports)
+    heavy_modules = sorted({name for report in reports for name in report["heavy_modules"]})
+
+    print(f"Mode: {'preload' if args.preload else 'lazy'}  runs: {args.runs}")
+    print(f"Import time (median): {import_seconds * 1000:.0f}ms  budget {args.budget_seconds * 1000:.0f}ms")
+    print(f"Peak RSS (median): {max_rss_mb:.1f}MB  budget {args.budget_mb:.0f}MB")
+    print(f"Statuses (url_verification, unauthorized reaction): {reports[0]['statuses']}")
+    print(f"Heavy modules loaded: {', '.join(heavy_modules) or 'none'}")
+
+    if args.importtime:
+        print("Slowest imports (cumulative):")
+        for name, seconds in measure(args.preload, importtime=True)["slowest_imports"]:
+            print(f"  {name:<40} {seconds * 1000:8.1f}ms")
+
+    failures = []
+    if import_seconds > args.budget_seconds:
+        failures.append(f"import time {import_seconds:.3f}s is over the {args.budget_seconds}s budget")
+    if max_rss_mb > args.budget_mb:
+        failures.append(f"peak RSS {max_rss_mb:.1f}MB is over the {args.budget_mb}MB budget")
+    if heavy_modules and not args.preload:
+        failures.append(f"{', '.join(heavy_modules)} imported before any summary was requested")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,12 @@
 import os
+from utils.plugins import PLATFORMS
 
-def get_platform():
+def get_platform(job_queue=None, background=True):
     platform = os.getenv("PLATFORM", "slack")
     
     if platform == "slack":
-        from integrations.slack_integration import SlackIntegration  # Move import here to avoid circular import
+        # The integration class is imported on first use, see utils/plugins.py
+        SlackIntegration = PLATFORMS.resolve("slack")
         
         # Use the new environment variable SLACK_BOT_USER_OAUTH_TOKENS
         tokens_str = os.getenv("SLACK_BOT_USER_OAUTH_TOKENS")
@@ -13,9 +15,24 @@ def get_platform():
             raise ValueError("Missing SLACK_BOT_USER_OAUTH_TOKENS environment variable.")
         
         # Return an instance of SlackIntegration, no need to pass individual bot tokens here
-        return SlackIntegration()
+        return SlackIntegration(job_queue=job_queue, background=background)
     
     raise ValueError("Unsupported platform configuration")
 
+def init_job_worker():
+    """Set up a job worker process so it can run the platform's background jobs."""
+    from dotenv import load_dotenv
+    from utils.structured_logging import configure_logging
+
+    load_dotenv()
+    configure_logging()
+    # Constructing the platform registers its job handlers in this process; background threads
+    # (the digest scheduler) only run in the web process
+    get_platform(background=False)
+
+    if os.getenv("GPT4ALL_WARM", "False").lower() == "true":
+        from processors.llm_processor import warm_up_local_model
+        warm_up_local_model()
+
 def get_ngrok_url():
     return os.getenv("NGROK_URL")
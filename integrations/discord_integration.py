@@ -1,13 +1,16 @@
 import os
-import requests
-from flask import jsonify
 from dotenv import load_dotenv
 from discord import Webhook, RequestsWebhookAdapter
 from integrations.platform_interface import PlatformIntegration
+from utils import http_client
+from utils.article_processing import fetch_article_content
+from utils.structured_logging import get_logger
 
 # Load environment variables from .env
 load_dotenv()
 
+log = get_logger(__name__)
+
 class DiscordIntegration(PlatformIntegration):
     def __init__(self):
         # Load Discord bot token and trigger group from the environment
@@ -26,19 +29,19 @@ class DiscordIntegration(PlatformIntegration):
         # Convert the string to a list of allowed user IDs
         return users_str.split(",")
 
-    def handle_event(self, data):
-        print(f"Received event data: {data}")
+    def handle_event(self, data, headers=None):
+        log.info("Received event", type=data.get("type"), user_id=data.get("user_id"), channel_id=data.get("channel_id"))
 
         # Extract user ID from the event data
         user_id = data.get("user_id")
         if not user_id:
-            print("No user ID found in the event data.")
-            return jsonify({"status": "No user ID found in the event data"}), 400
+            log.info("No user ID found in the event data")
+            return {"status": "No user ID found in the event data"}, 400
 
         # Check if the user is allowed to trigger workflows
         if user_id not in self.allowed_users:
-            print(f"Unauthorized user: {user_id}. Access denied.")
-            return jsonify({"status": "Access denied: unauthorized user"}), 403
+            log.info("Unauthorized user, access denied", user_id=user_id)
+            return {"status": "Access denied: unauthorized user"}, 403
 
         # Extract event type (e.g., message, reaction) and process it
         event_type = data.get("type")
@@ -47,17 +50,17 @@ class DiscordIntegration(PlatformIntegration):
         elif event_type == "reaction_add":
             return self.process_reaction(data)
         
-        print("Event not recognized.")
+        log.debug("Event not recognized", type=event_type)
         return {"status": "Event not recognized"}, 200
 
     def process_message(self, data):
         """Process a Discord message event."""
-        print(f"Processing message: {data['content']}")
+        log.info("Processing message", channel_id=data.get("channel_id"))
         message_content = data.get("content")
         channel_id = data.get("channel_id")
         
         if not message_content or not channel_id:
-            return jsonify({"status": "Invalid message data"}), 400
+            return {"status": "Invalid message data"}, 400
 
         # Process message content (you can add logic similar to Slack here)
         # For example, checking for URLs, fetching article content, etc.
@@ -68,59 +71,50 @@ class DiscordIntegration(PlatformIntegration):
                 if article_content:
                     # Here you could process the article with an LLM or other logic
                     summary = self.process_article_with_llm(article_content)
-                    print(f"Article summary: {summary}")
+                    log.info("Article summarized", url=url, summary=summary)
                     self.send_message(channel_id, summary)
 
-        return jsonify({"status": "Message processed"}), 200
+        return {"status": "Message processed"}, 200
 
     def process_reaction(self, data):
         """Process a Discord reaction event."""
-        print(f"Processing reaction: {data['emoji']['name']}")
         emoji = data['emoji']['name']
         channel_id = data['channel_id']
         message_id = data['message_id']
 
         if emoji == "newspaper":
-            print("Processing reaction ':newspaper:'")
+            log.info("Processing ':newspaper:' reaction", channel_id=channel_id, message_id=message_id)
             self.fetch_message(message_id, channel_id)
-            return jsonify({"status": "Reaction processed"}), 200
+            return {"status": "Reaction processed"}, 200
         
-        print(f"Reaction '{emoji}' not handled.")
-        return jsonify({"status": "Reaction not handled"}), 200
+        log.debug("Reaction not handled", reaction=emoji)
+        return {"status": "Reaction not handled"}, 200
 
     def fetch_message(self, message_id, channel_id):
         """Fetch a message from Discord."""
         url = f"https://discord.com/api/channels/{channel_id}/messages/{message_id}"
-        headers = {
-            "Authorization": f"Bot {self.bot_token}",
-            "Content-Type": "application/json"
-        }
 
-        response = requests.get(url, headers=headers)
+        response = http_client.get(url, token=self.bot_token, auth_scheme="Bot")
         if response.status_code == 200:
             message = response.json()
-            print(f"Fetched message: {message['content']}")
+            log.debug("Fetched message", channel_id=channel_id, message_id=message_id, content=message["content"])
             return message
         else:
-            print(f"Failed to fetch message. Status code: {response.status_code}")
+            log.warning("Failed to fetch message", channel_id=channel_id, message_id=message_id, status_code=response.status_code)
             return None
 
     def send_message(self, channel_id, content):
         """Send a message to a Discord channel."""
         url = f"https://discord.com/api/channels/{channel_id}/messages"
-        headers = {
-            "Authorization": f"Bot {self.bot_token}",
-            "Content-Type": "application/json"
-        }
         data = {
             "content": content
         }
 
-        response = requests.post(url, headers=headers, json=data)
+        response = http_client.post(url, token=self.bot_token, auth_scheme="Bot", json=data)
         if response.status_code == 200:
-            print("Message sent successfully")
+            log.info("Message sent", channel_id=channel_id)
         else:
-            print(f"Failed to send message. Status code: {response.status_code}")
+            log.warning("Failed to send message", channel_id=channel_id, status_code=response.status_code)
         return response.json()
 
     def extract_urls_from_text(self, text):
@@ -130,15 +124,8 @@ class DiscordIntegration(PlatformIntegration):
 
     def fetch_article(self, url):
         """Fetch article content from a URL (similar to Slack implementation)."""
-        print(f"Fetching article from URL: {url}")
-        try:
-            article = Article(url)
-            article.download()
-            article.parse()
-            return article.text
-        except Exception as e:
-            print(f"Error fetching article: {e}")
-            return None
+        log.debug("Fetching article", url=url)
+        return fetch_article_content(url)
 
     def process_article_with_llm(self, article_content):
         """Process an article using an LLM (you can integrate your LLM logic here)."""
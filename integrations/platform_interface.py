@@ -1,9 +1,10 @@
+import asyncio
 from abc import ABC, abstractmethod
 
 class PlatformIntegration(ABC):
     @abstractmethod
-    def handle_event(self, data):
-        """Process an incoming event from the platform."""
+    def handle_event(self, data, headers=None):
+        """Process an incoming event from the platform, with the HTTP request headers if available."""
         pass
 
     @abstractmethod
@@ -15,3 +16,18 @@ class PlatformIntegration(ABC):
     def send_message(self, channel, message):
         """Send a message to a channel."""
         pass
+
+    # Async variants used by the ASGI app. By default they run the sync methods in a worker thread;
+    # integrations override them with native asyncio implementations.
+
+    async def handle_event_async(self, data, headers=None):
+        """Process an incoming event from the platform without blocking the event loop."""
+        return await asyncio.to_thread(self.handle_event, data, headers)
+
+    async def fetch_message_async(self, message_id, channel):
+        """Fetch a message based on message ID and channel without blocking the event loop."""
+        return await asyncio.to_thread(self.fetch_message, message_id, channel)
+
+    async def send_message_async(self, channel, message):
+        """Send a message to a channel without blocking the event loop."""
+        return await asyncio.to_thread(self.send_message, channel, message)
@@ -1,24 +1,100 @@
+import asyncio
+import contextvars
 import os
-import requests
-from flask import jsonify
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
-from newspaper import Article
 from integrations.platform_interface import PlatformIntegration
-from processors.llm_processor import process_article_with_llm
-from utils.article_processing import extract_urls_from_text
+from integrations.slack_stream_writer import SlackStreamWriter
+from processors.duplicate_index import DuplicateIndex
+from processors.llm_processor import (
+    consume_stream, process_article_with_llm, process_article_with_llm_async, stream_article_with_llm, summarize_digest,
+    summary_version, summary_versions,
+)
+from utils import http_client
+from utils.article_cache import canonicalize_url
+from utils.article_processing import extract_urls_from_text, fetch_article_content, fetch_article_content_async
+from utils.dedup_store import DedupStore
+from utils.digest_store import DigestStore
+from utils.job_queue import QueueFullError, register_async_handler, register_handler
+from utils.message_buffer import MessageBuffer
+from utils.metrics import CACHE_REQUESTS, DEDUP_DROPS, ERRORS, get_trace_id, new_trace_id, register_collector, span
+from utils.rate_limiter import BULK, lane, slack_rate_limit
+from utils.structured_logging import get_logger
+from utils.ttl_cache import TTLCache
 
 # Load environment variables from .env
 load_dotenv()
 
-# A set to track processed message timestamps to prevent reprocessing
-processed_messages = set()
+# Slack Web API root; overridable so benchmarks can point the bridge at a local stand-in
+SLACK_API_BASE_URL = os.getenv("SLACK_API_BASE_URL", "https://slack.com/api")
+
+# Job kind for summarizing the message behind a ':newspaper:' reaction
+SUMMARIZE_REACTION = "summarize_reaction"
+
+# Slack errors that mean a cached auth.test result or channel lookup can no longer be trusted
+AUTH_ERRORS = {"token_revoked", "invalid_auth", "account_inactive", "not_authed"}
+CHANNEL_ERRORS = {"channel_not_found", "not_in_channel", "is_archived"}
+
+log = get_logger(__name__)
+
+def message_dedup_key(team_id, channel, message_ts):
+    return f"message:{team_id}:{channel}:{message_ts}"
+
+def reaction_failed(result):
+    """Whether a summarize_reaction result is a failure worth retrying on the next reaction."""
+    body, status_code = result[0], result[1]
+    return status_code >= 500 or body.get("status") == "No articles could be summarized"
+
+# Set by SlackIntegration.__init__; read by the metrics collector registered below
+_live_integration = None
+
+def collect_slack_metrics():
+    """Expose the live integration's cache counters as Prometheus samples."""
+    if _live_integration is None:
+        return []
+    return _live_integration.collect_cache_metrics()
+
+register_collector(collect_slack_metrics)
 
 class SlackIntegration(PlatformIntegration):
-    def __init__(self):
+    def __init__(self, job_queue=None, background=True):
         # Load workspace tokens from environment
         self.workspace_tokens = self.load_workspace_tokens()
         # Load the list of allowed user IDs from the environment
         self.allowed_users = self.load_allowed_users()
+        # Background queue for the slow pipeline; without one, events are processed inline
+        self.job_queue = job_queue
+        register_handler(SUMMARIZE_REACTION, self.summarize_reaction)
+        register_async_handler(SUMMARIZE_REACTION, self.summarize_reaction_async)
+        # Tracks processed events and messages to prevent reprocessing, shared by all workers on this host
+        self.dedup_store = DedupStore()
+        # auth.test and conversations.info answers are stable for hours, so cache them per workspace/channel
+        self.auth_cache = TTLCache(default_ttl=float(os.getenv("SLACK_AUTH_CACHE_TTL", "3600")))
+        self.channel_cache = TTLCache(default_ttl=float(os.getenv("SLACK_CHANNEL_CACHE_TTL", "3600")))
+        self.negative_cache_ttl = float(os.getenv("SLACK_NEGATIVE_CACHE_TTL", "60"))
+        # Syndicated copies of an already summarized article reuse its summary and link its thread
+        self.duplicate_index = DuplicateIndex() if os.getenv("DUPLICATE_DETECTION", "True").lower() == "true" else None
+        # Recent message events, so a reaction can usually be served without a history fetch
+        self.message_buffer = MessageBuffer()
+        # The most recently created integration is the one serving requests; /metrics reports its caches
+        global _live_integration
+        _live_integration = self
+        # How many links of one message are fetched and summarized at the same time
+        self.url_concurrency = int(os.getenv("SLACK_URL_CONCURRENCY", "4"))
+        # "per_link" posts one threaded reply per article, "combined" posts a single reply
+        self.reply_mode = os.getenv("SLACK_REPLY_MODE", "per_link")
+        # Stream per-link summaries into their reply with chat.update while the LLM generates them
+        self.stream_replies = os.getenv("SLACK_STREAM_REPLIES", "False").lower() == "true"
+        # Channels that get one digest per window instead of a reply per reaction
+        self.digest_windows = self.load_digest_windows()
+        self.digest_store = None
+        if self.digest_windows:
+            self.digest_store = DigestStore()
+            # Job worker processes only run jobs; the web workers post the digests
+            if background:
+                self.start_digest_scheduler()
 
     def load_workspace_tokens(self):
         """Load the Slack bot tokens from the environment variable and return them as a dictionary."""
@@ -42,6 +118,22 @@ class SlackIntegration(PlatformIntegration):
         # Convert the string to a list of allowed user IDs
         return users_str.split(",")
 
+    def load_digest_windows(self):
+        """
+        Parse SLACK_DIGEST_CHANNELS, e.g. "C0123,C0456:900" or "*" for every channel, into
+        {channel: window seconds}; channels without a window use SLACK_DIGEST_WINDOW.
+        """
+        default_window = float(os.getenv("SLACK_DIGEST_WINDOW", "600"))
+        windows = {}
+        for entry in filter(None, os.getenv("SLACK_DIGEST_CHANNELS", "").split(",")):
+            channel, _, window = entry.strip().partition(":")
+            windows[channel] = float(window) if window else default_window
+        return windows
+
+    def digest_window(self, channel):
+        """The channel's digest window in seconds, or None if it gets per-article replies."""
+        return self.digest_windows.get(channel, self.digest_windows.get("*"))
+
     def get_token_for_workspace(self, team_id):
         """Retrieve the Slack token for a given workspace based on the team_id."""
         token = self.workspace_tokens.get(team_id)
@@ -50,28 +142,95 @@ class SlackIntegration(PlatformIntegration):
         return token
 
     def test_auth(self, team_id):
-        """Test Slack API authentication and log the result."""
+        """Test Slack API authentication, log the result and return the auth info (cached while valid)."""
+        auth_info = self.auth_cache.get(team_id)
+        if auth_info is not None:
+            return auth_info
+
         bot_token = self.get_token_for_workspace(team_id)
-        url = "https://slack.com/api/auth.test"
-        headers = {
-            "Authorization": f"Bearer {bot_token}",
-            "Content-Type": "application/json"
-        }
-        response = requests.get(url, headers=headers)
-        auth_info = response.json()
+        url = f"{SLACK_API_BASE_URL}/auth.test"
+        with span("slack_auth_test"):
+            response = http_client.get(url, token=bot_token, rate_limit=slack_rate_limit(team_id, "auth.test"))
+        return self.cache_auth_info(team_id, response.json())
 
-        # Log the auth info to the console
+    def cache_auth_info(self, team_id, auth_info):
         if auth_info.get("ok"):
-            print(f"Authentication successful! Bot User ID: {auth_info['user_id']}, Team: {auth_info['team']}")
+            log.info("Slack authentication successful", team_id=team_id, bot_user_id=auth_info["user_id"], team=auth_info["team"])
+            self.auth_cache.set(team_id, auth_info)
         else:
-            print(f"Authentication failed: {auth_info.get('error')}")
+            log.warning("Slack authentication failed", team_id=team_id, error=auth_info.get("error"))
+        return auth_info
+
+    def get_channel_info(self, team_id, channel, bot_token):
+        """Return the conversations.info response for a channel, caching successes and channel_not_found."""
+        cache_key = (team_id, channel)
+        response_json = self.channel_cache.get(cache_key)
+        if response_json is not None:
+            return response_json
 
-    def handle_event(self, data):
-        print(f"Received event data: {data}")
+        info_url = f"{SLACK_API_BASE_URL}/conversations.info"
+        params = {
+            "channel": channel
+        }
+        with span("slack_conversations_info"):
+            info_response = http_client.get(info_url, token=bot_token, params=params,
+                                            rate_limit=slack_rate_limit(team_id, "conversations.info"))
+        return self.cache_channel_info(cache_key, info_response.status_code, info_response.json())
+
+    def cache_channel_info(self, cache_key, status_code, response_json):
+        if status_code == 200 and response_json.get("ok", False):
+            self.channel_cache.set(cache_key, response_json)
+        elif response_json.get("error") == "channel_not_found":
+            # Negative caching: don't ask again for every reaction in a channel we can't see
+            self.channel_cache.set(cache_key, response_json, ttl=self.negative_cache_ttl)
+        elif response_json.get("error") in AUTH_ERRORS:
+            # The cached auth.test result no longer holds for this workspace
+            self.invalidate_caches_for_error(*cache_key, response_json["error"])
+        return response_json
+
+    def invalidate_caches_for_error(self, team_id, channel, error):
+        """Drop cached auth/channel metadata after Slack reports it is no longer valid."""
+        if error in AUTH_ERRORS:
+            log.warning("Invalidating cached workspace metadata", team_id=team_id, error=error)
+            self.auth_cache.invalidate(team_id)
+            self.channel_cache.invalidate_where(lambda key: key[0] == team_id)
+        elif error in CHANNEL_ERRORS:
+            self.channel_cache.invalidate((team_id, channel))
+
+    def cache_stats(self):
+        """Return hit/miss counters for the Slack metadata caches."""
+        return {"auth": self.auth_cache.stats(), "channel": self.channel_cache.stats(), "message": self.message_buffer.stats()}
+
+    def collect_cache_metrics(self):
+        """Expose the metadata cache counters as Prometheus samples."""
+        samples = []
+        for cache_name, stats in self.cache_stats().items():
+            for result, count in (("hit", stats["hits"]), ("miss", stats["misses"])):
+                samples.append((
+                    "bridge_slack_metadata_cache_requests_total", "Slack metadata cache lookups by cache and result.",
+                    "counter", {"cache": cache_name, "result": result}, count,
+                ))
+        buffer_stats = self.message_buffer.stats()
+        samples.append(("bridge_message_buffer_entries", "Messages held in the message buffer.", "gauge", {}, buffer_stats["size"]))
+        samples.append(("bridge_message_buffer_bytes", "Approximate size of the message buffer.", "gauge", {}, buffer_stats["bytes"]))
+        if self.digest_store is not None:
+            samples.append(("bridge_digest_pending_messages", "Flagged messages waiting for their channel digest.", "gauge", {}, self.digest_store.pending()))
+        return samples
+
+    def handle_event(self, data, headers=None):
+        event = data.get("event", {})
+        log.info("Received event", event_id=data.get("event_id"), type=data.get("type"),
+                 event_type=event.get("type"), team_id=data.get("team_id"), user_id=event.get("user"))
+
+        # Slack numbers its redeliveries when we were too slow to acknowledge
+        headers = headers or {}
+        retry_num = int(headers.get("X-Slack-Retry-Num", 0))
+        if retry_num:
+            log.info("Slack retry", retry_num=retry_num, reason=headers.get("X-Slack-Retry-Reason"), event_id=data.get("event_id"))
 
         # Handle Slack's URL verification event
         if data.get("type") == "url_verification":
-            print("Responding to Slack verification challenge.")
+            log.info("Responding to Slack verification challenge")
             return data["challenge"], 200, {"Content-Type": "text/plain"}
 
         # Get team_id from the event data to determine the correct token
@@ -79,139 +238,355 @@ class SlackIntegration(PlatformIntegration):
         if not team_id:
             raise ValueError("team_id not found in the event data.")
 
+        # Remember messages as they arrive so a later reaction doesn't have to fetch them again.
+        # Anyone may author a message; only whoever reacts has to be in the trigger group.
+        if event.get("type") == "message":
+            return self.remember_message(team_id, event)
+
         # Get user_id from the event data
         user_id = data.get("event", {}).get("user")
         if not user_id:
-            print("No user ID found in the event data.")
-            return jsonify({"status": "No user ID found in the event data"}), 400
+            log.info("No user ID found in the event data", event_id=data.get("event_id"))
+            return {"status": "No user ID found in the event data"}, 400
 
         # Check if the user is allowed to trigger workflows
         if user_id not in self.allowed_users:
-            print(f"Unauthorized user: {user_id}. Access denied.")
-            return jsonify({"status": "Access denied: unauthorized user"}), 403
-
-        # Test authentication for the workspace (team_id)
-        self.test_auth(team_id)
+            log.info("Unauthorized user, access denied", user_id=user_id)
+            return {"status": "Access denied: unauthorized user"}, 403
 
         if "event" in data:
             event_type = data["event"]["type"]
-            print(f"Detected event type: {event_type}")
 
-            if event_type == "message" and "subtype" not in data["event"]:
-                print(f"New message event in channel {data['event']['channel']}, but waiting for a reaction before processing.")
-                return jsonify({"status": "Message event received but ignored"}), 200
+            if event_type == "reaction_added":
+                return self.process_reaction(data["event"], team_id, data.get("event_id"), retry_num)
 
-            elif event_type == "reaction_added":
-                print(f"Processing reaction added event for reaction {data['event']['reaction']}")
-                return self.process_reaction(data["event"], team_id)
-
-        print("Event not recognized or no 'event' field found.")
+        log.debug("Event not recognized or no 'event' field found", event_id=data.get("event_id"))
         return {"status": "Event not recognized"}, 200
 
+    def remember_message(self, team_id, event):
+        """Keep a message event in the buffer (messages are only summarized once someone reacts to them)."""
+        subtype = event.get("subtype")
+        channel = event.get("channel")
+        if subtype == "message_deleted":
+            self.message_buffer.remove(team_id, channel, event.get("deleted_ts"))
+        elif subtype == "message_changed":
+            self.buffer_message(team_id, channel, event["message"])
+        elif subtype in (None, "bot_message", "thread_broadcast", "file_share"):
+            self.buffer_message(team_id, channel, event)
+        return {"status": "Message event recorded"}, 200
+
+    def buffer_message(self, team_id, channel, message):
+        if "bot_id" in message:
+            # Bot messages (including our own summaries) are never summarized, so their text isn't kept
+            entry = {"ts": message["ts"], "text": "", "urls": [], "bot_id": message["bot_id"]}
+        else:
+            text = message.get("text", "")
+            entry = {"ts": message["ts"], "text": text, "urls": self.unique_urls(text)}
+        self.message_buffer.record(team_id, channel, entry)
+
     def process_message(self, text, channel, thread_ts, team_id):
-        print(f"Processing message: {text}")
-        urls = extract_urls_from_text(text)
-        if urls:
-            print(f"Found URLs in message: {urls}")
-            for url in urls:
-                article_content = self.fetch_article(url)
-                if article_content:
-                    summary = process_article_with_llm(article_content)
-                    print(f"Article summary: {summary}")
-
-                    # Send the summary as a reply in the thread
+        urls = self.unique_urls(text)
+        if not urls:
+            log.info("No URLs found in the message", channel=channel, thread_ts=thread_ts)
+            return {"status": "No URLs found"}, 200
+
+        log.info("Processing message", channel=channel, thread_ts=thread_ts, urls=len(urls))
+        summaries = {}
+        # Streaming only applies to per-link replies; a combined reply needs every summary first
+        stream_target = (channel, thread_ts, team_id) if self.stream_replies and self.reply_mode == "per_link" else None
+
+        # Fan out so the wall time is close to the slowest link rather than the sum
+        with ThreadPoolExecutor(max_workers=min(self.url_concurrency, len(urls))) as executor:
+            # Each link runs in a copy of this context so it keeps the trace id
+            futures = {
+                executor.submit(contextvars.copy_context().run, self.summarize_url, url, stream_target, (channel, thread_ts, team_id)): url
+                for url in urls
+            }
+            for future in as_completed(futures):
+                url = futures[future]
+                summary = future.result()
+                if not summary:
+                    continue
+                summaries[url] = summary
+
+                if self.reply_mode == "per_link" and not stream_target:
+                    # Send the summary as a reply in the thread as soon as it is ready
                     self.send_message(channel, summary, thread_ts, team_id)
 
-                    return jsonify({"summary": summary}), 200
-        else:
-            print("No URLs found in the message.")
-        return jsonify({"status": "No URLs found"}), 200
+        if not summaries:
+            return {"status": "No articles could be summarized"}, 200
+
+        if self.reply_mode == "combined":
+            self.send_message(channel, self.combine_summaries(urls, summaries), thread_ts, team_id)
+
+        return {"summaries": summaries}, 200
+
+    def unique_urls(self, text):
+        """Extract the message's links; links that only differ by tracking parameters or fragments are kept once."""
+        urls = []
+        seen = set()
+        for url in extract_urls_from_text(text):
+            canonical_url = canonicalize_url(url)
+            if canonical_url not in seen:
+                seen.add(canonical_url)
+                urls.append(url)
+        return urls
+
+    def combine_summaries(self, urls, summaries):
+        """Format the summaries of several links as one reply, in the order the links appeared."""
+        ordered = [(url, summaries[url]) for url in urls if url in summaries]
+        if len(ordered) == 1:
+            return ordered[0][1]
+        return "\n\n".join(f"*<{url}>*\n{summary}" for url, summary in ordered)
+
+    def summarize_url(self, url, stream_target=None, thread=None):
+        """Fetch and summarize one article, returning None if either step fails.
+
+        With a (channel, thread_ts, team_id) stream_target, the summary is streamed into its own reply.
+        thread is the (channel, thread_ts, team_id) the summary is for, recorded for near-duplicates.
+        """
+        writer = None
+        try:
+            article_content = self.fetch_article(url)
+            if not article_content:
+                return None
+
+            duplicate = self.find_duplicate(url, article_content)
+            if duplicate:
+                permalink = None
+                if self.should_link_original(duplicate, thread):
+                    permalink = self.get_permalink(duplicate["team_id"], duplicate["channel"], duplicate["thread_ts"])
+                summary = self.reused_summary(duplicate, permalink)
+                if stream_target:
+                    self.send_message(stream_target[0], summary, stream_target[1], stream_target[2])
+                return summary
+
+            with span("llm_summary"):
+                if stream_target:
+                    writer = SlackStreamWriter(self, *stream_target)
+                    writer.start()
+                    _, config = consume_stream(stream_article_with_llm(article_content), writer.write)
+                    summary = writer.close()
+                else:
+                    summary, config = process_article_with_llm(article_content)
+
+            log.info("Article summarized", url=url, summary=summary, summary_chars=len(summary))
+            self.index_summary(url, article_content, summary, thread, summary_version(config))
+            return summary
+        except Exception as e:
+            log.warning("Error summarizing article", url=url, error=repr(e))
+            ERRORS.inc(kind="summarize_url")
+            if writer:
+                writer.fail(f"Sorry, the summary of <{url}> could not be completed.")
+            return None
+
+    def find_duplicate(self, url, article_content):
+        """The indexed near-duplicate of an article (see DuplicateIndex.find), or None."""
+        if self.duplicate_index is None:
+            return None
+        with span("duplicate_lookup"):
+            duplicate = self.duplicate_index.find(article_content, summary_versions())
+        CACHE_REQUESTS.inc(cache="duplicate", result="hit" if duplicate else "miss")
+        if duplicate:
+            log.info("Near-duplicate article, reusing its summary", url=url, original_url=duplicate["url"],
+                     similarity=round(duplicate["similarity"], 3))
+        return duplicate
+
+    def index_summary(self, url, article_content, summary, thread, version):
+        """Index a summary under the version of the route that wrote it (see llm_processor.summary_version)."""
+        if self.duplicate_index is None or not summary or not summary.strip():
+            return
+        channel, thread_ts, team_id = thread or (None, None, None)
+        try:
+            self.duplicate_index.add(article_content, version, summary, url, team_id, channel, thread_ts)
+        except Exception as e:
+            log.warning("Could not index summary for near-duplicates", url=url, error=repr(e))
+
+    def should_link_original(self, duplicate, thread):
+        """Link the original thread if it is in the same workspace and not the thread being answered."""
+        if not thread or not duplicate["thread_ts"]:
+            return False
+        channel, thread_ts, team_id = thread
+        return duplicate["team_id"] == team_id and (duplicate["channel"], duplicate["thread_ts"]) != (channel, thread_ts)
+
+    def reused_summary(self, duplicate, permalink):
+        if not permalink:
+            return duplicate["summary"]
+        return f"{duplicate['summary']}\n\n_Same story as <{duplicate['url']}>, summarized in <{permalink}|this thread>._"
+
+    def get_permalink(self, team_id, channel, message_ts):
+        """Link to a message, or None if Slack can't provide one."""
+        bot_token = self.get_token_for_workspace(team_id)
+        with span("slack_get_permalink"):
+            response = http_client.get(f"{SLACK_API_BASE_URL}/chat.getPermalink", token=bot_token,
+                                       params={"channel": channel, "message_ts": message_ts},
+                                       rate_limit=slack_rate_limit(team_id, "chat.getPermalink"))
+        return self.permalink_from_response(channel, response.json())
+
+    def permalink_from_response(self, channel, response_json):
+        if not response_json.get("ok", False):
+            log.warning("Could not get permalink", channel=channel, error=response_json.get("error"))
+            return None
+        return response_json["permalink"]
 
-    def process_reaction(self, event, team_id):
+    def process_reaction(self, event, team_id, event_id=None, retry_num=0):
         reaction = event["reaction"]
         message_ts = event["item"]["ts"]
         channel = event["item"]["channel"]
 
-        print(f"Detected reaction: {reaction}")
-
-        # Ensure that we only process the same message once by using its timestamp
-        if message_ts in processed_messages:
-            print(f"Message {message_ts} already processed, skipping.")
-            return {"status": "Message already processed"}, 200
-
         if reaction == "newspaper":
-            print("Processing reaction ':newspaper:'")
-
-            # Add message timestamp to the processed_messages set to avoid reprocessing
-            processed_messages.add(message_ts)
-
-            # Ensure the bot does not respond to its own messages
-            return self.fetch_message(message_ts, channel, message_ts, team_id)
-
-        print(f"Reaction '{reaction}' not handled.")
+            # Ensure that we only process the same message (and the same delivery) once. The message
+            # key is released again if summarizing fails, so a later reaction can retry it.
+            message_key = message_dedup_key(team_id, channel, message_ts)
+            event_keys = [f"event:{event_id}"] if event_id else []
+            if not self.dedup_store.claim(*event_keys, releasable=[message_key]):
+                log.info("Message already processed, skipping", channel=channel, message_ts=message_ts, retry_num=retry_num)
+                DEDUP_DROPS.inc(retry="true" if retry_num else "false")
+                # Tell Slack not to redeliver an event we have already taken care of
+                return {"status": "Message already processed"}, 200, {"X-Slack-No-Retry": "1"}
+
+            log.info("Processing ':newspaper:' reaction", team_id=team_id, channel=channel, message_ts=message_ts)
+
+            # A buffered copy of the message travels with the job, so workers in other processes can use it too
+            message = self.message_buffer.get(team_id, channel, message_ts)
+            CACHE_REQUESTS.inc(cache="message", result="hit" if message is not None else "miss")
+            if message is not None:
+                if self.is_bot_message(message, channel):
+                    return {"status": "Ignored bot's own message"}, 200
+                if not message["urls"]:
+                    return {"status": "No URLs found"}, 200
+
+            if self.digest_window(channel) is not None:
+                # Digest channels are summarized in one pass per window by the digest scheduler
+                try:
+                    self.digest_store.add(team_id, channel, message_ts, message)
+                except Exception:
+                    # Forget the message so Slack's retry gets another chance
+                    self.dedup_store.release(message_key, *event_keys)
+                    raise
+                log.info("Message added to the channel digest", channel=channel, message_ts=message_ts)
+                return {"status": "Added to digest"}, 200
+
+            job = {
+                "team_id": team_id, "channel": channel, "message_ts": message_ts,
+                "message": message, "trace_id": get_trace_id(),
+            }
+            if self.job_queue is None:
+                return self.summarize_reaction(job)
+
+            # Acknowledge right away and let a background worker run the pipeline
+            try:
+                self.job_queue.submit(SUMMARIZE_REACTION, job)
+            except QueueFullError as e:
+                log.warning("Could not queue reaction", message_ts=message_ts, error=str(e))
+                ERRORS.inc(kind="queue_full")
+                # Forget the message so Slack's retry gets another chance
+                self.dedup_store.release(message_key, *event_keys)
+                return {"status": "Busy, try again later"}, 503
+            except Exception:
+                self.dedup_store.release(message_key, *event_keys)
+                raise
+
+            return {"status": "Reaction queued"}, 200
+
+        log.debug("Reaction not handled", reaction=reaction)
         return {"status": "Reaction not handled"}, 200
 
-    def fetch_article(self, url):
-        print(f"Fetching article from URL: {url}")
+    def summarize_reaction(self, job):
+        """Fetch, summarize and reply to the message behind a ':newspaper:' reaction."""
+        team_id = job["team_id"]
+        # Continue the trace of the request that queued this job
+        new_trace_id(job.get("trace_id"))
+
+        with span("summarize_reaction"):
+            try:
+                # Test authentication for the workspace (team_id)
+                self.test_auth(team_id)
+
+                # Ensure the bot does not respond to its own messages
+                result = self.fetch_message(job["message_ts"], job["channel"], job["message_ts"], team_id, job.get("message"))
+            except Exception:
+                self.release_failed_reaction(job)
+                raise
+        if reaction_failed(result):
+            self.release_failed_reaction(job)
+        return result
+
+    def release_failed_reaction(self, job):
+        """Forget a message whose summary failed, so a new reaction can retry it; its event stays claimed."""
+        self.release_failed_messages(job["team_id"], job["channel"], [job["message_ts"]])
+
+    def release_failed_messages(self, team_id, channel, message_timestamps):
+        """Forget messages of a channel whose summary failed, so new reactions can retry them."""
+        if not message_timestamps:
+            return
+        log.info("Summarizing failed, releasing messages for another reaction", channel=channel, message_ts=message_timestamps)
         try:
-            article = Article(url)
-            article.download()
-            article.parse()
-            return article.text
+            self.dedup_store.release(*(message_dedup_key(team_id, channel, message_ts) for message_ts in message_timestamps))
         except Exception as e:
-            print(f"Error fetching article: {e}")
-            return None
+            log.warning("Could not release the message claims", channel=channel, message_ts=message_timestamps, error=repr(e))
+
+    def fetch_article(self, url):
+        log.debug("Fetching article", url=url)
+        return fetch_article_content(url)
 
-    def fetch_message(self, message_id, channel, thread_ts, team_id):
-        print(f"Fetching message with ID {message_id} from channel {channel}")
+    def fetch_message(self, message_id, channel, thread_ts, team_id, message=None):
+        # A message buffered from its message event needs no conversations.info/history calls
+        if message is not None:
+            if self.is_bot_message(message, channel):
+                return {"status": "Ignored bot's own message"}, 200
+            return self.process_message(message["text"], channel, thread_ts, team_id)
 
-        bot_token = self.get_token_for_workspace(team_id)
-        formatted_ts = f"{float(message_id):.6f}"
+        message, result = self.get_message(message_id, channel, team_id)
+        if message is None:
+            return result
+        return self.process_message(message["text"], channel, thread_ts, team_id)
 
-        # Use the conversations.info API to get channel details (for both public and private)
-        info_url = "https://slack.com/api/conversations.info"
-        headers = {
-            "Authorization": f"Bearer {bot_token}",
-            "Content-Type": "application/json"
-        }
-        params = {
-            "channel": channel
-        }
+    def get_message(self, message_id, channel, team_id):
+        """Look a message up with conversations.history; returns (message, None) or (None, response) like handle_history_response."""
+        log.debug("Fetching message", message_ts=message_id, channel=channel)
 
-        # Check the channel type (public or private)
-        info_response = requests.get(info_url, headers=headers, params=params)
-        response_json = info_response.json()
+        bot_token = self.get_token_for_workspace(team_id)
+        formatted_ts = f"{float(message_id):.6f}"
 
-        if info_response.status_code != 200 or not response_json.get("ok", False):
-            print(f"Failed to retrieve channel info: {response_json}")
-            if response_json.get("error") == "channel_not_found":
-                print(f"Error: Bot may not be a member of the private channel {channel}. Please invite the bot to the channel.")
-            return {"status": "Failed to retrieve channel info"}, 500
+        # Use the conversations.info API to check the channel type (public or private)
+        response_json = self.get_channel_info(team_id, channel, bot_token)
+        if not response_json.get("ok", False):
+            return None, self.channel_info_failed(channel, response_json)
 
         # Use conversations.history for fetching messages (works for both public and private)
-        url = "https://slack.com/api/conversations.history"
+        url = f"{SLACK_API_BASE_URL}/conversations.history"
 
         # Fetch the message history
-        params = {
+        with span("slack_conversations_history"):
+            response = http_client.get(url, token=bot_token, params=self.history_params(formatted_ts, channel),
+                                      rate_limit=slack_rate_limit(team_id, "conversations.history"))
+
+        return self.handle_history_response(team_id, channel, formatted_ts, response.status_code, response.json())
+
+    def channel_info_failed(self, channel, response_json):
+        log.warning("Failed to retrieve channel info", channel=channel, error=response_json.get("error"))
+        if response_json.get("error") == "channel_not_found":
+            log.warning("Bot may not be a member of the private channel, please invite it", channel=channel)
+        return {"status": "Failed to retrieve channel info"}, 500
+
+    def history_params(self, formatted_ts, channel):
+        return {
             "channel": channel,
             "latest": formatted_ts,  # Use the formatted timestamp
             "limit": 1,
             "inclusive": True
         }
 
-        response = requests.get(url, headers=headers, params=params)
-
-        print(f"Response status code: {response.status_code}")
-        print(f"Response content: {response.json()}")
-
+    def handle_history_response(self, team_id, channel, formatted_ts, status_code, response_json):
+        """Return (message, None) for a message worth processing, or (None, response) explaining why not."""
         # Check for successful API response
-        if response.status_code == 200:
-            response_json = response.json()
-
+        if status_code == 200:
             # Check if the API response is okay and contains messages
             if not response_json.get("ok", False):
-                print(f"Slack API error: {response_json.get('error')}")
-                return {"status": "Slack API error", "error": response_json.get("error")}, 500
+                log.warning("Slack API error", method="conversations.history", channel=channel, error=response_json.get("error"))
+                self.invalidate_caches_for_error(team_id, channel, response_json.get("error"))
+                return None, ({"status": "Slack API error", "error": response_json.get("error")}, 500)
 
             messages = response_json.get("messages", [])
 
@@ -219,27 +594,45 @@ class SlackIntegration(PlatformIntegration):
                 message = messages[0]
 
                 # Avoid recursive processing if the message is from the bot itself
-                if 'bot_id' in message:
-                    print("Ignoring message from the bot to prevent recursion.")
-                    return {"status": "Ignored bot's own message"}, 200
+                if self.is_bot_message(message, channel):
+                    return None, ({"status": "Ignored bot's own message"}, 200)
 
-                print(f"Fetched message: {message['text']}")
-                return self.process_message(message["text"], channel, thread_ts, team_id)
+                log.debug("Fetched message", channel=channel, message_ts=formatted_ts, text=message["text"])
+                return message, None
 
-            print(f"No messages found for message_id {formatted_ts}")
-            return {"status": "No messages found"}, 404
+            log.info("No messages found", channel=channel, message_ts=formatted_ts)
+            return None, ({"status": "No messages found"}, 404)
         else:
-            print(f"Failed to fetch message. Status code: {response.status_code}")
-            return {"status": "Failed to fetch message"}, response.status_code
+            log.warning("Failed to fetch message", channel=channel, message_ts=formatted_ts, status_code=status_code)
+            return None, ({"status": "Failed to fetch message"}, status_code)
 
-    def send_message(self, channel, message, thread_ts=None, team_id=None):
+    def is_bot_message(self, message, channel):
+        if 'bot_id' in message:
+            log.debug("Ignoring message from the bot to prevent recursion", channel=channel, message_ts=message.get("ts"))
+            return True
+        return False
+
+    def update_message(self, channel, message_ts, message, team_id):
+        """Replace the text of a message the bot posted earlier."""
         bot_token = self.get_token_for_workspace(team_id)
-        print(f"Sending message to channel {channel}: {message}")
-        url = "https://slack.com/api/chat.postMessage"
-        headers = {
-            "Authorization": f"Bearer {bot_token}",
-            "Content-Type": "application/json"
+        url = f"{SLACK_API_BASE_URL}/chat.update"
+        data = {
+            "channel": channel,
+            "ts": message_ts,
+            "text": message
         }
+
+        with span("slack_update_message"):
+            response = http_client.post(url, token=bot_token, json=data, rate_limit=slack_rate_limit(team_id, "chat.update"))
+        response_json = response.json()
+        if not response_json.get("ok", False):
+            log.warning("Failed to update message", channel=channel, message_ts=message_ts, error=response_json.get("error"))
+            self.invalidate_caches_for_error(team_id, channel, response_json.get("error"))
+        return response_json
+
+    def send_message(self, channel, message, thread_ts=None, team_id=None):
+        bot_token = self.get_token_for_workspace(team_id)
+        url = f"{SLACK_API_BASE_URL}/chat.postMessage"
         data = {
             "channel": channel,
             "text": message
@@ -249,6 +642,253 @@ class SlackIntegration(PlatformIntegration):
         if thread_ts:
             data["thread_ts"] = thread_ts
 
-        response = requests.post(url, headers=headers, json=data)
-        print(f"Message sent. Response: {response.json()}")
-        return response.json()
+        with span("slack_post_message"):
+            response = http_client.post(url, token=bot_token, json=data, rate_limit=slack_rate_limit(team_id, "chat.postMessage", channel))
+        response_json = response.json()
+        self.log_send_result(channel, thread_ts, message, response_json)
+        if not response_json.get("ok", False):
+            self.invalidate_caches_for_error(team_id, channel, response_json.get("error"))
+        return response_json
+
+    def log_send_result(self, channel, thread_ts, message, response_json):
+        if response_json.get("ok", False):
+            log.info("Message sent", channel=channel, thread_ts=thread_ts, ts=response_json.get("ts"), text=message)
+        else:
+            log.warning("Failed to send message", channel=channel, thread_ts=thread_ts, error=response_json.get("error"))
+
+    def start_digest_scheduler(self):
+        """Post due channel digests from a background thread; every worker polls, but each digest is taken once."""
+        interval = float(os.getenv("DIGEST_POLL_INTERVAL", "10"))
+        threading.Thread(target=self.run_digest_scheduler, args=(interval,), name="digest-scheduler", daemon=True).start()
+
+    def run_digest_scheduler(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                due, dropped = self.digest_store.take_due(self.digest_window)
+            except Exception as e:
+                log.error("Could not read pending digests", exc_info=e)
+                continue
+            # Messages whose digest failed for good can be flagged again by a new reaction
+            for team_id, channel, message_ts in dropped:
+                self.release_failed_messages(team_id, channel, [message_ts])
+            for team_id, channel, items in due:
+                # Until done() the items stay in the store, and a failed digest is taken again later
+                try:
+                    response = self.post_digest(team_id, channel, items)
+                    if response is not None and not response.get("ok", False):
+                        raise RuntimeError(f"chat.postMessage failed: {response.get('error')}")
+                    self.digest_store.done(team_id, channel, items)
+                except Exception as e:
+                    log.error("Digest failed, it will be retried", channel=channel, messages=len(items), exc_info=e)
+                    ERRORS.inc(kind="digest")
+
+    def post_digest(self, team_id, channel, items):
+        """Summarize the articles of every message flagged in a channel's window and post them as one digest."""
+        new_trace_id()
+        # Digests are bulk work: interactive reactions in other channels get the rate limits first
+        with lane(BULK), span("slack_digest"):
+            self.test_auth(team_id)
+
+            urls = []
+            seen = set()
+            failed_lookups = []
+            for message_ts, message in items:
+                if message is None:
+                    message, _ = self.get_message(message_ts, channel, team_id)
+                    if message is None:
+                        failed_lookups.append(message_ts)
+                elif self.is_bot_message(message, channel):
+                    message = None
+                for url in self.unique_urls(message["text"]) if message else []:
+                    canonical_url = canonicalize_url(url)
+                    if canonical_url not in seen:
+                        seen.add(canonical_url)
+                        urls.append(url)
+            # The digest goes ahead without messages that could not be looked up; a new reaction can retry them
+            self.release_failed_messages(team_id, channel, failed_lookups)
+            if not urls:
+                log.info("No URLs found for the digest", channel=channel, messages=len(items))
+                return None
+
+            log.info("Building digest", channel=channel, messages=len(items), urls=len(urls))
+            with ThreadPoolExecutor(max_workers=min(self.url_concurrency, len(urls))) as executor:
+                futures = [executor.submit(contextvars.copy_context().run, self.fetch_article, url) for url in urls]
+                articles = [(url, future.result()) for url, future in zip(urls, futures)]
+            articles = [(url, text) for url, text in articles if text]
+            if not articles:
+                log.info("No articles could be fetched for the digest", channel=channel, urls=len(urls))
+                self.release_failed_messages(team_id, channel, [message_ts for message_ts, _ in items])
+                return None
+
+            with span("llm_summary"):
+                digest = summarize_digest(articles)
+            return self.send_message(channel, self.format_digest(digest, articles, len(items)), team_id=team_id)
+
+    def format_digest(self, digest, articles, flagged):
+        """The digest message: a header, the digest itself and the numbered sources it cites."""
+        sources = "\n".join(f"[{number}] <{url}>" for number, (url, _) in enumerate(articles, start=1))
+        return f"*Situation digest* ({len(articles)} articles from {flagged} flagged messages)\n\n{digest}\n\n*Sources*\n{sources}"
+
+    # Native asyncio pipeline used by the ASGI app (asgi_app.py). It mirrors the sync methods above
+    # and shares their caching, dedup and response handling. async_http_client (aiohttp) is imported
+    # inside these methods so the Flask app never loads it.
+
+    async def handle_event_async(self, data, headers=None):
+        # With a job queue, handle_event only validates, deduplicates and enqueues; its dedup claims,
+        # digest writes and shared-state calls still block, so it runs in a worker thread, and the
+        # job it submits is handed back to this loop
+        if self.job_queue is not None:
+            self.job_queue.bind(asyncio.get_running_loop())
+            return await asyncio.to_thread(self.handle_event, data, headers)
+        return await super().handle_event_async(data, headers)
+
+    async def summarize_reaction_async(self, job):
+        team_id = job["team_id"]
+        new_trace_id(job.get("trace_id"))
+        with span("summarize_reaction"):
+            try:
+                await self.test_auth_async(team_id)
+                result = await self.fetch_message_async(job["message_ts"], job["channel"], job["message_ts"], team_id, job.get("message"))
+            except Exception:
+                await asyncio.to_thread(self.release_failed_reaction, job)
+                raise
+        if reaction_failed(result):
+            await asyncio.to_thread(self.release_failed_reaction, job)
+        return result
+
+    async def test_auth_async(self, team_id):
+        from utils import async_http_client
+
+        auth_info = self.auth_cache.get(team_id)
+        if auth_info is not None:
+            return auth_info
+
+        bot_token = self.get_token_for_workspace(team_id)
+        with span("slack_auth_test"):
+            response = await async_http_client.get(f"{SLACK_API_BASE_URL}/auth.test", token=bot_token,
+                                                   rate_limit=slack_rate_limit(team_id, "auth.test"))
+        return self.cache_auth_info(team_id, response.json())
+
+    async def get_channel_info_async(self, team_id, channel, bot_token):
+        from utils import async_http_client
+
+        cache_key = (team_id, channel)
+        response_json = self.channel_cache.get(cache_key)
+        if response_json is not None:
+            return response_json
+
+        info_url = f"{SLACK_API_BASE_URL}/conversations.info"
+        with span("slack_conversations_info"):
+            info_response = await async_http_client.get(info_url, token=bot_token, params={"channel": channel},
+                                                        rate_limit=slack_rate_limit(team_id, "conversations.info"))
+        return self.cache_channel_info(cache_key, info_response.status_code, info_response.json())
+
+    async def fetch_message_async(self, message_id, channel, thread_ts, team_id, message=None):
+        from utils import async_http_client
+
+        if message is not None:
+            if self.is_bot_message(message, channel):
+                return {"status": "Ignored bot's own message"}, 200
+            return await self.process_message_async(message["text"], channel, thread_ts, team_id)
+
+        log.debug("Fetching message", message_ts=message_id, channel=channel)
+
+        bot_token = self.get_token_for_workspace(team_id)
+        formatted_ts = f"{float(message_id):.6f}"
+
+        response_json = await self.get_channel_info_async(team_id, channel, bot_token)
+        if not response_json.get("ok", False):
+            return self.channel_info_failed(channel, response_json)
+
+        url = f"{SLACK_API_BASE_URL}/conversations.history"
+        with span("slack_conversations_history"):
+            response = await async_http_client.get(url, token=bot_token, params=self.history_params(formatted_ts, channel),
+                                                   rate_limit=slack_rate_limit(team_id, "conversations.history"))
+
+        message, result = self.handle_history_response(team_id, channel, formatted_ts, response.status_code, response.json())
+        if message is None:
+            return result
+        return await self.process_message_async(message["text"], channel, thread_ts, team_id)
+
+    async def process_message_async(self, text, channel, thread_ts, team_id):
+        urls = self.unique_urls(text)
+        if not urls:
+            log.info("No URLs found in the message", channel=channel, thread_ts=thread_ts)
+            return {"status": "No URLs found"}, 200
+
+        log.info("Processing message", channel=channel, thread_ts=thread_ts, urls=len(urls))
+        summaries = {}
+        semaphore = asyncio.Semaphore(self.url_concurrency)
+
+        async def summarize(url):
+            async with semaphore:
+                summary = await self.summarize_url_async(url, (channel, thread_ts, team_id))
+            if summary:
+                summaries[url] = summary
+                if self.reply_mode == "per_link":
+                    await self.send_message_async(channel, summary, thread_ts, team_id)
+
+        await asyncio.gather(*(summarize(url) for url in urls))
+
+        if not summaries:
+            return {"status": "No articles could be summarized"}, 200
+
+        if self.reply_mode == "combined":
+            await self.send_message_async(channel, self.combine_summaries(urls, summaries), thread_ts, team_id)
+
+        return {"summaries": summaries}, 200
+
+    async def summarize_url_async(self, url, thread=None):
+        try:
+            log.debug("Fetching article", url=url)
+            article_content = await fetch_article_content_async(url)
+            if not article_content:
+                return None
+
+            duplicate = await asyncio.to_thread(self.find_duplicate, url, article_content)
+            if duplicate:
+                permalink = None
+                if self.should_link_original(duplicate, thread):
+                    permalink = await self.get_permalink_async(duplicate["team_id"], duplicate["channel"], duplicate["thread_ts"])
+                return self.reused_summary(duplicate, permalink)
+
+            with span("llm_summary"):
+                summary, config = await process_article_with_llm_async(article_content)
+            log.info("Article summarized", url=url, summary=summary, summary_chars=len(summary))
+            await asyncio.to_thread(self.index_summary, url, article_content, summary, thread, summary_version(config))
+            return summary
+        except Exception as e:
+            log.warning("Error summarizing article", url=url, error=repr(e))
+            ERRORS.inc(kind="summarize_url")
+            return None
+
+    async def get_permalink_async(self, team_id, channel, message_ts):
+        from utils import async_http_client
+
+        bot_token = self.get_token_for_workspace(team_id)
+        with span("slack_get_permalink"):
+            response = await async_http_client.get(f"{SLACK_API_BASE_URL}/chat.getPermalink", token=bot_token,
+                                                   params={"channel": channel, "message_ts": message_ts},
+                                                   rate_limit=slack_rate_limit(team_id, "chat.getPermalink"))
+        return self.permalink_from_response(channel, response.json())
+
+    async def send_message_async(self, channel, message, thread_ts=None, team_id=None):
+        from utils import async_http_client
+
+        bot_token = self.get_token_for_workspace(team_id)
+        data = {
+            "channel": channel,
+            "text": message
+        }
+        if thread_ts:
+            data["thread_ts"] = thread_ts
+
+        with span("slack_post_message"):
+            response = await async_http_client.post(f"{SLACK_API_BASE_URL}/chat.postMessage", token=bot_token, json=data,
+                                                    rate_limit=slack_rate_limit(team_id, "chat.postMessage", channel))
+        response_json = response.json()
+        self.log_send_result(channel, thread_ts, message, response_json)
+        if not response_json.get("ok", False):
+            self.invalidate_caches_for_error(team_id, channel, response_json.get("error"))
+        return response_json
@@ -0,0 +1,69 @@
+import os
+import time
+
+
+class SlackStreamWriter:
+    """Posts a placeholder reply and keeps editing it with chat.update as LLM output streams in."""
+
+    def __init__(self, integration, channel, thread_ts, team_id, interval=None, min_chars=None):
+        self.integration = integration
+        self.channel = channel
+        self.thread_ts = thread_ts
+        self.team_id = team_id
+        # Coalesce updates so a single reply stays well inside chat.update's rate limit
+        self.interval = interval if interval is not None else float(os.getenv("SLACK_STREAM_UPDATE_INTERVAL", "1.5"))
+        self.min_chars = min_chars if min_chars is not None else int(os.getenv("SLACK_STREAM_MIN_CHARS", "40"))
+        self.placeholder = os.getenv("SLACK_STREAM_PLACEHOLDER", "_Summarizing..._")
+        # Posted in place of an empty answer, which Slack would reject (no_text), leaving the placeholder up
+        self.empty_note = os.getenv("SLACK_STREAM_EMPTY_NOTE", "_No summary could be generated for this link._")
+        self.text = ""
+        self.message_ts = None
+        # The placeholder is only tried once; if it fails, the text is buffered for one final post
+        self.started = False
+        self._last_update = 0.0
+        self._published_length = 0
+
+    def start(self):
+        """Post the placeholder reply that later updates will edit."""
+        self.started = True
+        response = self.integration.send_message(self.channel, self.placeholder, self.thread_ts, self.team_id)
+        self.message_ts = response.get("ts")
+        self._last_update = time.monotonic()
+
+    def write(self, piece):
+        """Append generated text, pushing an update when enough time and text have accumulated."""
+        if not self.started:
+            self.start()
+        self.text += piece
+        due = time.monotonic() - self._last_update >= self.interval
+        if due and len(self.text) - self._published_length >= self.min_chars:
+            self.flush()
+
+    def flush(self, final=False):
+        if self.message_ts is None:
+            return
+        # A trailing ellipsis shows readers the reply is still being written
+        text = self.text.strip() if final else f"{self.text.strip()} ..."
+        self.integration.update_message(self.channel, self.message_ts, text, self.team_id)
+        self._last_update = time.monotonic()
+        self._published_length = len(self.text)
+
+    def close(self):
+        """Publish the complete text and return it."""
+        if not self.text.strip():
+            if self.message_ts is None:
+                self.integration.send_message(self.channel, self.empty_note, self.thread_ts, self.team_id)
+            else:
+                self.integration.update_message(self.channel, self.message_ts, self.empty_note, self.team_id)
+            return ""
+        if self.message_ts is None:
+            # Nothing was streamed (an empty answer, or the placeholder couldn't be posted), so post what we have
+            self.integration.send_message(self.channel, self.text.strip(), self.thread_ts, self.team_id)
+        else:
+            self.flush(final=True)
+        return self.text.strip()
+
+    def fail(self, message):
+        """Replace a partial reply with an error note after generation failed."""
+        if self.message_ts is not None:
+            self.integration.update_message(self.channel, self.message_ts, message, self.team_id)
@@ -0,0 +1,116 @@
+import re
+
+# Rough characters-per-token ratios used when no tokenizer is available
+CHARS_PER_TOKEN = {"openai": 4.0, "gpt4all": 3.5}
+
+
+# tiktoken is optional and only imported once; encodings are cached per model
+_tiktoken = None
+_tiktoken_checked = False
+_encodings = {}
+
+
+def get_encoding(model):
+    """The tiktoken encoding for an OpenAI model, or None if tiktoken isn't installed."""
+    global _tiktoken, _tiktoken_checked
+    if not _tiktoken_checked:
+        try:
+            import tiktoken
+            _tiktoken = tiktoken
+        except ImportError:
+            pass
+        _tiktoken_checked = True
+    if _tiktoken is None:
+        return None
+
+    encoding = _encodings.get(model)
+    if encoding is None:
+        try:
+            encoding = _tiktoken.encoding_for_model(model)
+        except KeyError:
+            encoding = _tiktoken.get_encoding("cl100k_base")
+        _encodings[model] = encoding
+    return encoding
+
+
+def estimate_tokens(text, provider, model=None):
+    """Estimate how many tokens text costs for a provider."""
+    if provider == "openai":
+        encoding = get_encoding(model)
+        if encoding is not None:
+            return len(encoding.encode(text))
+    return int(len(text) / CHARS_PER_TOKEN.get(provider, 4.0)) + 1
+
+
+def split_oversized_paragraph(paragraph, max_tokens, provider, model=None):
+    """Split a paragraph that alone exceeds the budget on sentence boundaries (or hard-cut as a last resort)."""
+    pieces = []
+    current = []
+    current_tokens = 0
+    separator_tokens = estimate_tokens(" ", provider, model)
+    # Each sentence is counted once and the counts summed (with the separators that join them),
+    # instead of re-counting the growing piece
+    for sentence in re.split(r"(?<=[.!?])\s+", paragraph):
+        tokens = estimate_tokens(sentence, provider, model) + (separator_tokens if current else 0)
+        if current and current_tokens + tokens > max_tokens:
+            pieces.append(" ".join(current))
+            current, current_tokens = [], 0
+            tokens -= separator_tokens
+        current.append(sentence)
+        current_tokens += tokens
+    current = " ".join(current).strip()
+
+    # A single "sentence" can still be too long (tables, run-on scraped text)
+    max_chars = int(max_tokens * CHARS_PER_TOKEN.get(provider, 4.0))
+    result = []
+    for piece in pieces + ([current] if current else []):
+        while len(piece) > 1 and estimate_tokens(piece, provider, model) > max_tokens:
+            cut = hard_cut_length(piece, max_tokens, max_chars, provider, model)
+            result.append(piece[:cut])
+            piece = piece[cut:]
+        result.append(piece)
+    return result
+
+
+def hard_cut_length(text, max_tokens, max_chars, provider, model=None):
+    """The length of the longest prefix of text, starting from max_chars, that fits in max_tokens."""
+    cut = min(max_chars, len(text))
+    while cut > 1:
+        tokens = estimate_tokens(text[:cut], provider, model)
+        if tokens <= max_tokens:
+            return cut
+        # Shrink in proportion to the overshoot, and always by at least one character
+        cut = min(cut - 1, int(cut * max_tokens / tokens))
+    return max(cut, 1)
+
+
+def split_into_chunks(text, max_tokens, provider, model=None):
+    """Split text on paragraph boundaries into chunks of at most max_tokens each."""
+    paragraphs = [p.strip() for p in re.split(r"\n\s*\n", text) if p.strip()]
+    chunks = []
+    current = []
+    current_tokens = 0
+    # Paragraphs are joined with a blank line, which costs tokens too
+    separator_tokens = estimate_tokens("\n\n", provider, model)
+
+    for paragraph in paragraphs:
+        tokens = estimate_tokens(paragraph, provider, model)
+        if tokens > max_tokens:
+            if current:
+                chunks.append("\n\n".join(current))
+                current, current_tokens = [], 0
+            chunks.extend(split_oversized_paragraph(paragraph, max_tokens, provider, model))
+            continue
+
+        if current:
+            tokens += separator_tokens
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append("\n\n".join(current))
+            current, current_tokens = [], 0
+            tokens -= separator_tokens
+        current.append(paragraph)
+        current_tokens += tokens
+
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
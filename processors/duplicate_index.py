@@ -0,0 +1,155 @@
+import hashlib
+import itertools
+import os
+import re
+import threading
+import time
+
+from utils.shared_state import connect_sqlite
+
+# Syndicated copies of a story (wire reports under many URLs, each with its own boilerplate) have
+# nearly the same text, so their 64-bit SimHash fingerprints differ in only a few bits. Fingerprints
+# are split into BANDS bands of 8 bits: two fingerprints within BANDS - 1 bits of each other share
+# at least one band exactly, so candidates are found with an index lookup instead of a scan.
+FINGERPRINT_BITS = 64
+BANDS = 8
+BAND_BITS = FINGERPRINT_BITS // BANDS
+SHINGLE_WORDS = 4
+# Texts with fewer shingles give unstable fingerprints and are neither indexed nor matched
+MIN_SHINGLES = 50
+
+
+def shingles(text):
+    words = re.findall(r"\w+", text.lower())
+    return {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+
+
+def simhash(text):
+    """64-bit SimHash of the text's word shingles, or None if the text is too short to fingerprint."""
+    features = shingles(text)
+    if len(features) < MIN_SHINGLES:
+        return None
+    hashes = [format(int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big"), "064b") for feature in features]
+    # Each bit of the fingerprint is the majority vote of that bit over all shingle hashes
+    half = len(hashes) / 2
+    return int("".join("1" if column.count("1") > half else "0" for column in zip(*hashes)), 2)
+
+
+def _signed(value):
+    # SQLite integers are signed 64-bit
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+class DuplicateIndex:
+    """
+    On-disk SimHash index of summarized articles, shared by all workers on a host via SQLite (WAL).
+    Each entry remembers the summary and the thread it was posted in, so a near-duplicate article
+    can reuse the summary and point at the original thread.
+    """
+
+    def __init__(self, path=None, threshold=None, max_age=None, max_entries=None):
+        self.path = path or os.getenv("DUPLICATE_INDEX_PATH", "data/duplicates.sqlite3")
+        self.threshold = threshold if threshold is not None else float(os.getenv("DUPLICATE_SIMILARITY", "0.9"))
+        # Bands can only guarantee finding fingerprints within BANDS - 1 differing bits
+        self.max_distance = min(BANDS - 1, int((1 - self.threshold) * FINGERPRINT_BITS))
+        self.max_age = max_age if max_age is not None else float(os.getenv("DUPLICATE_MAX_AGE", "259200"))
+        self.max_entries = max_entries or int(os.getenv("DUPLICATE_MAX_ENTRIES", "20000"))
+        self._local = threading.local()
+        # itertools.count so concurrent jobs don't lose increments
+        self._adds = itertools.count(1)
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS articles ("
+            "id INTEGER PRIMARY KEY, fingerprint INTEGER NOT NULL, version TEXT NOT NULL, summary TEXT NOT NULL, "
+            "url TEXT, team_id TEXT, channel TEXT, thread_ts TEXT, created_at REAL NOT NULL)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS bands ("
+            "band INTEGER NOT NULL, value INTEGER NOT NULL, article_id INTEGER NOT NULL, "
+            "PRIMARY KEY (band, value, article_id)) WITHOUT ROWID"
+        )
+
+    def _connect(self):
+        return connect_sqlite(self._local, self.path)
+
+    @staticmethod
+    def bands(fingerprint):
+        mask = (1 << BAND_BITS) - 1
+        return [(band, (fingerprint >> (band * BAND_BITS)) & mask) for band in range(BANDS)]
+
+    def find(self, text, versions):
+        """
+        Return the closest indexed article summarized under one of versions (see
+        llm_processor.summary_versions) as a dict with summary, url, team_id, channel, thread_ts and
+        similarity, or None.
+        """
+        fingerprint = simhash(text)
+        if fingerprint is None:
+            return None
+        if isinstance(versions, str):
+            versions = [versions]
+
+        conditions = " OR ".join("(b.band = ? AND b.value = ?)" for _ in range(BANDS))
+        params = [value for pair in self.bands(fingerprint) for value in pair]
+        rows = self._connect().execute(
+            "SELECT DISTINCT a.fingerprint, a.summary, a.url, a.team_id, a.channel, a.thread_ts "
+            f"FROM bands b JOIN articles a ON a.id = b.article_id WHERE ({conditions}) "
+            f"AND a.version IN ({', '.join('?' for _ in versions)}) AND a.created_at > ?",
+            (*params, *versions, time.time() - self.max_age),
+        ).fetchall()
+
+        best = None
+        for stored, summary, url, team_id, channel, thread_ts in rows:
+            distance = bin(fingerprint ^ (stored % (1 << 64))).count("1")
+            if distance > self.max_distance or (best is not None and distance >= best["distance"]):
+                continue
+            best = {"summary": summary, "url": url, "team_id": team_id, "channel": channel, "thread_ts": thread_ts,
+                    "distance": distance, "similarity": 1 - distance / FINGERPRINT_BITS}
+        return best
+
+    def add(self, text, version, summary, url=None, team_id=None, channel=None, thread_ts=None):
+        """Index a summarized article together with the thread its summary was posted in."""
+        fingerprint = simhash(text)
+        if fingerprint is None:
+            return
+
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            article_id = conn.execute(
+                "INSERT INTO articles (fingerprint, version, summary, url, team_id, channel, thread_ts, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (_signed(fingerprint), version, summary, url, team_id, channel, thread_ts, time.time()),
+            ).lastrowid
+            conn.executemany(
+                "INSERT INTO bands (band, value, article_id) VALUES (?, ?, ?)",
+                [(band, value, article_id) for band, value in self.bands(fingerprint)],
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        # Old and surplus entries are only cleaned up now and then to keep adds cheap
+        if next(self._adds) % 100 == 0:
+            self.purge()
+
+    def purge(self):
+        """Delete entries older than max_age and the oldest beyond max_entries."""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "DELETE FROM articles WHERE created_at <= ? OR id IN ("
+                "SELECT id FROM articles ORDER BY id DESC LIMIT -1 OFFSET ?)",
+                (time.time() - self.max_age, self.max_entries),
+            )
+            conn.execute("DELETE FROM bands WHERE article_id NOT IN (SELECT id FROM articles)")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
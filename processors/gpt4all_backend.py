@@ -0,0 +1,47 @@
+import threading
+from processors.llm_router import offload
+from processors.model_pool import ModelPool
+
+# Local GPT4All backend, imported only when LLM_PROVIDER=gpt4all is first used. The gpt4all
+# package itself is imported by the pool when the first model instance is loaded.
+
+# Resident GPT4All models, created on first use
+_model_pool = None
+_model_pool_lock = threading.Lock()
+
+
+def get_model_pool(config):
+    global _model_pool
+    with _model_pool_lock:
+        if _model_pool is None:
+            _model_pool = ModelPool(config["model_path"])
+        elif _model_pool.model_path != config["model_path"]:
+            # Pools are sized to the machine's memory, so only one model is kept resident
+            raise ValueError(f"GPT4All model {_model_pool.model_path} is already loaded; only one local model is supported")
+        return _model_pool
+
+
+def pool_stats():
+    """Model pool stats, or None before the pool exists."""
+    return _model_pool.stats() if _model_pool is not None else None
+
+
+def warm(config):
+    """Load the local model(s) now instead of on the first request."""
+    get_model_pool(config).warm()
+
+
+def generate(prompt, config):
+    # Models stay loaded in the pool, which also limits concurrent generate calls
+    response = get_model_pool(config).generate(prompt)
+    return response.strip()
+
+
+async def generate_async(prompt, config):
+    # Local inference is CPU-bound, so keep it off the event loop; the router's slot stays taken
+    # until the thread is done, even if the caller stops waiting for it
+    return await offload(generate, prompt, config)
+
+
+def stream(prompt, config):
+    return get_model_pool(config).stream(prompt)
@@ -1,46 +1,490 @@
-from utils.llm_config import get_llm_config
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from processors.chunking import estimate_tokens, split_into_chunks
+from processors.summary_cache import SummaryCache
+from processors.llm_router import LLMRouter
+from utils.llm_config import get_route_configs
+from utils.metrics import CACHE_REQUESTS, register_collector, span
+from utils.plugins import LLM_BACKENDS
+from utils.rate_limiter import current_lane, lane, llm_rate_limit
+from utils.structured_logging import get_logger
 
+log = get_logger(__name__)
 
-# Load the LLM configuration from .env
-llm_config = get_llm_config()
+SUMMARY_PROMPT_FILE = "process_article_with_llm.txt"
+CHUNK_PROMPT_FILE = "summarize_article_chunk.txt"
+BATCH_PROMPT_FILE = "summarize_article_batch.txt"
+DIGEST_PROMPT_FILE = "situation_digest.txt"
+
+# Articles above this many tokens are summarized chunk by chunk (map) and then combined (reduce)
+CHUNK_THRESHOLD_TOKENS = int(os.getenv("LLM_CHUNK_THRESHOLD_TOKENS", "6000"))
+CHUNK_TOKENS = int(os.getenv("LLM_CHUNK_TOKENS", "3000"))
+MAP_CONCURRENCY = int(os.getenv("LLM_MAP_CONCURRENCY", "4"))
+MAX_REDUCE_ROUNDS = 3
+# Most articles packed into one digest request (they also have to fit in LLM_CHUNK_THRESHOLD_TOKENS)
+DIGEST_BATCH_ARTICLES = int(os.getenv("DIGEST_BATCH_ARTICLES", "8"))
+
+# Completion tokens reserved against the provider's tokens-per-minute budget for each call
+EXPECTED_OUTPUT_TOKENS = int(os.getenv("LLM_EXPECTED_OUTPUT_TOKENS", "400"))
+# Pause applied to the provider's buckets after a 429 that came without Retry-After
+RATE_LIMIT_PAUSE = float(os.getenv("LLM_RATE_LIMIT_PAUSE", "5"))
+
+# Persistent summary cache, created on first use
+_summary_cache = None
+
+def get_summary_cache():
+    global _summary_cache
+    if _summary_cache is None:
+        _summary_cache = SummaryCache()
+        # Summaries made with an older prompt will never be hit again, so free their space
+        _summary_cache.purge_other_versions(load_summary_prompts())
+    return _summary_cache
+
+# Router over the LLM routes configured in .env, created on first use rather than at import time
+_router = None
+
+def get_router():
+    global _router
+    if _router is None:
+        _router = LLMRouter(get_route_configs(), generate_on_route, generate_on_route_async, stream_on_route)
+    return _router
+
+def current_llm_config():
+    """The preferred route's configuration."""
+    return get_router().routes[0].config
+
+def estimate_config(text):
+    """Config of the route a prompt with text would go to first; its tokenizer sizes chunks of text."""
+    return get_router().route_for(prompt_tokens(text)).config
+
+def warm_up_local_model():
+    """Load the local model(s) now instead of on the first request."""
+    for route in get_router().routes:
+        warm = getattr(route.backend, "warm", None)
+        if warm:
+            warm(route.config)
+
+def model_pool_stats():
+    """Stats of the local model pool, or None if the local backend hasn't been used."""
+    backend = LLM_BACKENDS.loaded("gpt4all")
+    return backend.pool_stats() if backend else None
+
+def collect_model_pool_metrics():
+    """Expose model pool stats as Prometheus samples."""
+    stats = model_pool_stats()
+    if stats is None:
+        return []
+    return [
+        ("bridge_model_pool_instances_loaded", "Local model instances loaded.", "gauge", {}, stats["loaded"]),
+        ("bridge_model_pool_in_use", "Local model instances currently generating.", "gauge", {}, stats["in_use"]),
+        ("bridge_model_pool_requests_total", "Local generate calls.", "counter", {}, stats["requests"]),
+        ("bridge_model_pool_queue_wait_seconds_total", "Time spent waiting for a free model instance.", "counter", {}, stats["queue_wait_seconds_total"]),
+        ("bridge_model_pool_inference_seconds_total", "Time spent in local inference.", "counter", {}, stats["inference_seconds_total"]),
+    ]
+
+register_collector(collect_model_pool_metrics)
+
+def collect_route_metrics():
+    """Expose each route's recent latency and error rate as Prometheus samples."""
+    if _router is None:
+        return []
+    samples = []
+    for route in _router.routes:
+        stats = route.stats()
+        if stats["p95_seconds"] is not None:
+            samples.append(("bridge_llm_route_p95_seconds", "Recent p95 latency of successful calls per LLM route.", "gauge", {"route": route.name}, stats["p95_seconds"]))
+        samples.append(("bridge_llm_route_error_rate", "Share of recent calls per LLM route that failed or timed out.", "gauge", {"route": route.name}, stats["error_rate"]))
+    return samples
+
+register_collector(collect_route_metrics)
+
+def get_llm_stats():
+    """Return metrics for the LLM layer, e.g. model pool queue-wait and inference time."""
+    stats = {}
+    if _router is not None:
+        stats["llm_routes"] = _router.stats()
+    pool_stats = model_pool_stats()
+    if pool_stats is not None:
+        stats["model_pool"] = pool_stats
+    return stats
+
+def load_summary_prompts():
+    """Both prompt templates that shape a summary, used to version the summary cache."""
+    return load_prompt(SUMMARY_PROMPT_FILE) + load_prompt(CHUNK_PROMPT_FILE)
+
+def summary_version(config=None):
+    """Tag that changes whenever summaries would come out differently (prompts, provider or model)."""
+    config = config or current_llm_config()
+    return f"{SummaryCache.prompt_version(load_summary_prompts())}:{config['provider']}:{config['model'] or ''}"
+
+def summary_versions():
+    """The summary_version of every configured route; a summary written by any of them is reused."""
+    return [summary_version(route.config) for route in get_router().routes]
+
+def summary_keys(summary_cache, prompt_templates, article_text):
+    """(cache key, route config) for every configured route."""
+    return [(summary_cache.key_for(prompt_templates, route.config["provider"], route.config["model"], article_text), route.config)
+            for route in get_router().routes]
+
+def cached_summary(summary_cache, keys):
+    """(summary, config of the route that wrote it) from the cache, or None."""
+    for key, config in keys:
+        summary = summary_cache.get(key)
+        if summary is not None:
+            return summary, config
+    return None
+
+def store_summary(summary_cache, prompt_templates, article_text, summary, config):
+    """Cache a summary under the key of the route that actually wrote it."""
+    if not summary or not summary.strip():
+        # An empty answer is a failed generation; caching it would replay the failure on every reaction
+        log.info("Empty summary, not caching it", provider=config["provider"], model=config["model"])
+        return
+    key = summary_cache.key_for(prompt_templates, config["provider"], config["model"], article_text)
+    summary_cache.set(key, prompt_templates, summary)
 
 def process_article_with_llm(article_text):
-    prompt = load_prompt("process_article_with_llm.txt")
+    """Summarize an article; returns (summary, config of the route whose model wrote it)."""
+    prompt = load_prompt(SUMMARY_PROMPT_FILE)
+
+    # A byte-identical article under the same prompts and any configured model is answered from the cache
+    summary_cache = get_summary_cache()
+    prompt_templates = load_summary_prompts()
+    keys = summary_keys(summary_cache, prompt_templates, article_text)
+    found = cached_summary(summary_cache, keys)
+    if found is not None:
+        log.debug("Summary cache hit")
+        CACHE_REQUESTS.inc(cache="summary", result="hit")
+        return found
+    CACHE_REQUESTS.inc(cache="summary", result="miss")
+
+    # Which route will answer isn't known yet, so the claim doesn't depend on it
+    claim_key = summary_cache.key_for(prompt_templates, "any", None, article_text)
+    claimed, found = claim_or_wait(summary_cache, claim_key, lambda: cached_summary(summary_cache, keys))
+    if found is not None:
+        return found
+    try:
+        config = estimate_config(article_text)
+        if estimate_tokens(article_text, config["provider"], config["model"]) > CHUNK_THRESHOLD_TOKENS:
+            summary, config = map_reduce_summary(prompt, article_text)
+        else:
+            # Short articles: replace placeholder with actual article text and make a single call
+            summary, config = call_llm_with_route(prompt.replace("{{article_text}}", article_text))
+
+        store_summary(summary_cache, prompt_templates, article_text, summary, config)
+    finally:
+        if claimed:
+            summary_cache.release(claim_key)
+    return summary, config
+
+def claim_or_wait(summary_cache, claim_key, lookup):
+    """
+    Claim summarizing an article, or, if another worker (on any host sharing the state) already is,
+    wait for its summary instead of paying for the same LLM calls twice. Returns (claimed, what
+    lookup found), lookup being what reads the summary from the cache.
+    """
+    try:
+        if summary_cache.claim(claim_key):
+            return True, None
+    except Exception as e:
+        # Without the shared state, summarize anyway rather than not at all
+        log.warning("Could not claim summarizing the article", error=repr(e))
+        return False, None
+    log.debug("Article is being summarized by another worker, waiting for its summary")
+    found = summary_cache.wait_for(claim_key, lookup)
+    if found is not None:
+        CACHE_REQUESTS.inc(cache="summary", result="coalesced")
+    return False, found
+
+async def claim_or_wait_async(summary_cache, claim_key, lookup):
+    try:
+        if await asyncio.to_thread(summary_cache.claim, claim_key):
+            return True, None
+    except Exception as e:
+        log.warning("Could not claim summarizing the article", error=repr(e))
+        return False, None
+    log.debug("Article is being summarized by another worker, waiting for its summary")
+    found = await summary_cache.wait_for_async(claim_key, lookup)
+    if found is not None:
+        CACHE_REQUESTS.inc(cache="summary", result="coalesced")
+    return False, found
+
+def map_reduce_summary(prompt, article_text):
+    """
+    Summarize each chunk of a long article in parallel, then reduce the notes with the main prompt.
+    Returns (summary, config of the route that wrote it).
+    """
+    # The final pass produces the bullet summary defined by the main prompt
+    return call_llm_with_route(prompt.replace("{{article_text}}", reduce_to_notes(article_text)))
+
+def reduce_to_notes(article_text):
+    """Condense a long article into per-chunk notes that fit in a single summary call."""
+    chunk_prompt = load_prompt(CHUNK_PROMPT_FILE)
+
+    notes = article_text
+    for _ in range(MAX_REDUCE_ROUNDS):
+        # Count with the tokenizer of the route the notes are headed for
+        config = estimate_config(notes)
+        provider, model = config["provider"], config["model"]
+        if estimate_tokens(notes, provider, model) <= CHUNK_THRESHOLD_TOKENS:
+            break
+        chunks = split_into_chunks(notes, CHUNK_TOKENS, provider, model)
+        log.info("Summarizing chunks in parallel", chunks=len(chunks))
+        partials = call_llm_parallel([chunk_prompt.replace("{{article_text}}", chunk) for chunk in chunks])
+        notes = "\n\n".join(partials)
+    return notes
+
+def call_llm_parallel(prompts):
+    """Run call_llm over several prompts on a small pool, returning the answers in order."""
+    # Pool threads don't inherit the caller's context, so carry its rate-limit lane over
+    priority = current_lane()
 
-    # Replace placeholder with actual article text
-    prompt_with_article = prompt.replace("{{article_text}}", article_text)
+    def call(prompt):
+        with lane(priority):
+            return call_llm(prompt)
 
-    # Call the appropriate LLM based on the configuration
-    if llm_config["provider"] == "openai":
-        return process_with_openai(prompt_with_article)
-    elif llm_config["provider"] == "gpt4all":
-        return process_with_gpt4all(prompt_with_article)
+    with ThreadPoolExecutor(max_workers=min(MAP_CONCURRENCY, len(prompts))) as executor:
+        return list(executor.map(call, prompts))
+
+def summarize_digest(articles):
+    """
+    Write one situation digest for several (url, text) articles, numbered in the given order.
+    Short articles share LLM requests: everything that fits goes into a single digest call,
+    otherwise batches of articles are condensed to notes in parallel first (map/reduce).
+    """
+    config = current_llm_config()
+    provider, model = config["provider"], config["model"]
+
+    blocks = []
+    for number, (url, text) in enumerate(articles, start=1):
+        # An article too long to share a request is condensed on its own first
+        if estimate_tokens(text, provider, model) > CHUNK_THRESHOLD_TOKENS:
+            text = reduce_to_notes(text)
+        blocks.append(f"[{number}] {url}\n{text}")
+
+    # Greedily pack consecutive articles into batches that fit in one request
+    batches, batch, batch_tokens = [], [], 0
+    for block in blocks:
+        tokens = estimate_tokens(block, provider, model)
+        if batch and (batch_tokens + tokens > CHUNK_THRESHOLD_TOKENS or len(batch) >= DIGEST_BATCH_ARTICLES):
+            batches.append(batch)
+            batch, batch_tokens = [], 0
+        batch.append(block)
+        batch_tokens += tokens
+    if batch:
+        batches.append(batch)
+
+    if len(batches) == 1:
+        digest_input = "\n\n".join(batches[0])
     else:
-        raise ValueError(f"Unsupported LLM provider: {llm_config['provider']}")
+        log.info("Condensing digest batches in parallel", articles=len(articles), batches=len(batches))
+        batch_prompt = load_prompt(BATCH_PROMPT_FILE)
+        partials = call_llm_parallel([batch_prompt.replace("{{article_text}}", "\n\n".join(batch)) for batch in batches])
+        digest_input = reduce_to_notes("\n\n".join(partials))
+
+    with span("llm_digest", provider=provider):
+        return call_llm(load_prompt(DIGEST_PROMPT_FILE).replace("{{article_text}}", digest_input))
+
+async def process_article_with_llm_async(article_text):
+    """Async variant of process_article_with_llm for the ASGI pipeline; also returns (summary, config)."""
+    prompt = load_prompt(SUMMARY_PROMPT_FILE)
+
+    summary_cache = get_summary_cache()
+    prompt_templates = load_summary_prompts()
+    keys = summary_keys(summary_cache, prompt_templates, article_text)
+    found = await asyncio.to_thread(cached_summary, summary_cache, keys)
+    if found is not None:
+        log.debug("Summary cache hit")
+        CACHE_REQUESTS.inc(cache="summary", result="hit")
+        return found
+    CACHE_REQUESTS.inc(cache="summary", result="miss")
+
+    claim_key = summary_cache.key_for(prompt_templates, "any", None, article_text)
+    claimed, found = await claim_or_wait_async(summary_cache, claim_key, lambda: cached_summary(summary_cache, keys))
+    if found is not None:
+        return found
+    try:
+        original_text = article_text
+        config = estimate_config(article_text)
+        if estimate_tokens(article_text, config["provider"], config["model"]) > CHUNK_THRESHOLD_TOKENS:
+            article_text = await reduce_to_notes_async(article_text)
+        summary, config = await call_llm_with_route_async(prompt.replace("{{article_text}}", article_text))
+
+        await asyncio.to_thread(store_summary, summary_cache, prompt_templates, original_text, summary, config)
+    finally:
+        if claimed:
+            await asyncio.to_thread(summary_cache.release, claim_key)
+    return summary, config
+
+async def reduce_to_notes_async(article_text):
+    """Async variant of reduce_to_notes; chunk calls are multiplexed on the event loop."""
+    chunk_prompt = load_prompt(CHUNK_PROMPT_FILE)
+    semaphore = asyncio.Semaphore(MAP_CONCURRENCY)
+
+    async def summarize_chunk(chunk):
+        async with semaphore:
+            return await call_llm_async(chunk_prompt.replace("{{article_text}}", chunk))
+
+    notes = article_text
+    for _ in range(MAX_REDUCE_ROUNDS):
+        config = estimate_config(notes)
+        provider, model = config["provider"], config["model"]
+        if estimate_tokens(notes, provider, model) <= CHUNK_THRESHOLD_TOKENS:
+            break
+        chunks = split_into_chunks(notes, CHUNK_TOKENS, provider, model)
+        log.info("Summarizing chunks concurrently", chunks=len(chunks))
+        partials = await asyncio.gather(*(summarize_chunk(chunk) for chunk in chunks))
+        notes = "\n\n".join(partials)
+    return notes
+
+def stream_article_with_llm(article_text):
+    """
+    Like process_article_with_llm, but yields the summary piece by piece as the LLM generates it;
+    the generator returns (summary, config), see consume_stream.
+    """
+    prompt = load_prompt(SUMMARY_PROMPT_FILE)
+
+    summary_cache = get_summary_cache()
+    prompt_templates = load_summary_prompts()
+    keys = summary_keys(summary_cache, prompt_templates, article_text)
+    found = cached_summary(summary_cache, keys)
+    if found is not None:
+        log.debug("Summary cache hit")
+        CACHE_REQUESTS.inc(cache="summary", result="hit")
+        yield found[0]
+        return found
+    CACHE_REQUESTS.inc(cache="summary", result="miss")
+
+    claim_key = summary_cache.key_for(prompt_templates, "any", None, article_text)
+    claimed, found = claim_or_wait(summary_cache, claim_key, lambda: cached_summary(summary_cache, keys))
+    if found is not None:
+        yield found[0]
+        return found
+    try:
+        # Long articles are condensed first; only the final (reduce) call is streamed
+        original_text = article_text
+        config = estimate_config(article_text)
+        if estimate_tokens(article_text, config["provider"], config["model"]) > CHUNK_THRESHOLD_TOKENS:
+            article_text = reduce_to_notes(article_text)
+
+        pieces = []
+        with span("llm_stream", provider=config["provider"]):
+            stream = stream_llm(prompt.replace("{{article_text}}", article_text))
+            try:
+                while True:
+                    try:
+                        piece = next(stream)
+                    except StopIteration as finished:
+                        # The stream returns the config of the route that answered
+                        config = finished.value
+                        break
+                    pieces.append(piece)
+                    yield piece
+            finally:
+                # Closed early (the consumer failed), the route gives its slot back now rather than at GC
+                stream.close()
+
+        summary = "".join(pieces).strip()
+        store_summary(summary_cache, prompt_templates, original_text, summary, config)
+    finally:
+        if claimed:
+            summary_cache.release(claim_key)
+    return summary, config
+
+def consume_stream(stream, write):
+    """
+    Pass each piece of a stream to write; returns the stream's return value. If write raises, the
+    stream is closed right away, so its finally blocks (claims, route slots) run before the error propagates.
+    """
+    try:
+        while True:
+            try:
+                piece = next(stream)
+            except StopIteration as finished:
+                return finished.value
+            write(piece)
+    finally:
+        stream.close()
+
+def rate_limit_for(prompt, config):
+    """The provider's request and token buckets this prompt has to clear, or None if it has no limits."""
+    tokens = estimate_tokens(prompt, config["provider"], config["model"]) + EXPECTED_OUTPUT_TOKENS
+    return llm_rate_limit(config["provider"], tokens)
+
+def pause_after_rate_limit_error(rate_limit, error):
+    """Hold back every caller of the provider after it answered 429, honouring its Retry-After."""
+    if rate_limit is None or getattr(error, "http_status", None) != 429:
+        return
+    try:
+        delay = float((getattr(error, "headers", None) or {}).get("retry-after"))
+    except (TypeError, ValueError):
+        delay = RATE_LIMIT_PAUSE
+    rate_limit.pause(delay)
+
+def prompt_tokens(prompt):
+    config = current_llm_config()
+    return estimate_tokens(prompt, config["provider"], config["model"])
+
+def call_llm(prompt):
+    """Send a fully rendered prompt to the best route for its length (see processors/llm_router.py)."""
+    return call_llm_with_route(prompt)[0]
+
+def call_llm_with_route(prompt):
+    """Like call_llm, but returns (answer, config of the route that answered)."""
+    answer, route = get_router().generate(prompt, prompt_tokens(prompt))
+    return answer, route.config
+
+async def call_llm_async(prompt):
+    """Async variant of call_llm; local inference runs in a worker thread."""
+    return (await call_llm_with_route_async(prompt))[0]
+
+async def call_llm_with_route_async(prompt):
+    answer, route = await get_router().generate_async(prompt, prompt_tokens(prompt))
+    return answer, route.config
+
+def stream_llm(prompt):
+    """
+    Yield the output of the best route for a rendered prompt as it is generated; the generator
+    returns the config of the route that answered.
+    """
+    route = yield from get_router().stream(prompt, prompt_tokens(prompt))
+    return route.config
+
+def generate_on_route(config, prompt):
+    """One call on one route, within the provider's rate limits."""
+    rate_limit = rate_limit_for(prompt, config)
+    if rate_limit:
+        rate_limit.acquire()
+    with span("llm_call", provider=config["provider"]):
+        try:
+            return LLM_BACKENDS.resolve(config["provider"]).generate(prompt, config)
+        except Exception as e:
+            pause_after_rate_limit_error(rate_limit, e)
+            raise
+
+async def generate_on_route_async(config, prompt):
+    rate_limit = rate_limit_for(prompt, config)
+    if rate_limit:
+        await rate_limit.acquire_async()
+    with span("llm_call", provider=config["provider"]):
+        try:
+            return await LLM_BACKENDS.resolve(config["provider"]).generate_async(prompt, config)
+        except Exception as e:
+            pause_after_rate_limit_error(rate_limit, e)
+            raise
+
+def stream_on_route(config, prompt):
+    rate_limit = rate_limit_for(prompt, config)
+    if rate_limit:
+        rate_limit.acquire()
+    try:
+        yield from LLM_BACKENDS.resolve(config["provider"]).stream(prompt, config)
+    except Exception as e:
+        pause_after_rate_limit_error(rate_limit, e)
+        raise
 
 def load_prompt(prompt_file):
     # Load the prompt from the file in the prompts directory
     with open(f"prompts/{prompt_file}", "r") as file:
         return file.read()
-
-import openai
-
-def process_with_openai(prompt):
-    # If using a GPT-3.5-turbo or GPT-4 model (chat-based models)
-    response = openai.ChatCompletion.create(
-        model="gpt-4o-mini",  # You can switch this to "gpt-4" if needed
-        messages=[
-            {"role": "system", "content": "You are a helpful assistant."},
-            {"role": "user", "content": prompt},
-        ]
-    )
-
-    # Extract the generated response
-    return response['choices'][0]['message']['content']
-
-def process_with_gpt4all(prompt):
-    # Implement processing using GPT4All or another local model
-    from gpt4all import GPT4All
-    model = GPT4All(llm_config["model_path"])
-    response = model.generate(prompt)
-    return response.strip()
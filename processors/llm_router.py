@@ -0,0 +1,369 @@
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from utils.metrics import counter
+from utils.plugins import LLM_BACKENDS
+from utils.structured_logging import get_logger
+
+log = get_logger(__name__)
+
+# Recent calls per route that its latency and error rate are judged on
+STATS_WINDOW = int(os.getenv("LLM_ROUTE_WINDOW", "50"))
+MIN_SAMPLES = 5
+# A route above this error rate or p95 latency (seconds) is only used once the healthy ones failed
+MAX_ERROR_RATE = float(os.getenv("LLM_ROUTE_MAX_ERROR_RATE", "0.5"))
+LATENCY_BUDGET = float(os.getenv("LLM_ROUTE_LATENCY_BUDGET", "30"))
+# Hedging: if the first route hasn't answered after its p95 latency, ask the next route as well
+HEDGE = os.getenv("LLM_HEDGE", "False").lower() == "true"
+HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+HEDGE_MIN_DELAY = float(os.getenv("LLM_HEDGE_MIN_DELAY", "1"))
+# Calls run on this pool so a caller can stop waiting for one that hangs
+THREADS = int(os.getenv("LLM_ROUTER_THREADS", "32"))
+# Most calls one route may have running, counting abandoned ones that haven't finished yet; a busy
+# route is skipped, so a hanging backend can't tie up every pool thread
+MAX_IN_FLIGHT = int(os.getenv("LLM_ROUTE_MAX_IN_FLIGHT", "8"))
+
+ROUTE_REQUESTS = counter("bridge_llm_route_requests_total", "LLM calls by route and outcome (ok, error, timeout, hedge).")
+
+_executor = None
+_executor_lock = threading.Lock()
+
+# Set while _call_async runs a route; offload() hands the route's in-flight slot to the thread it starts
+_slot_holder = contextvars.ContextVar("llm_route_slot_holder", default=None)
+
+
+class LLMUnavailableError(Exception):
+    """Raised when every route that could take a prompt failed or timed out."""
+
+
+def get_executor(threads=THREADS):
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="llm-route")
+        return _executor
+
+
+async def offload(func, *args):
+    """
+    Run a blocking call in a thread, for backends whose generate_async wraps a sync call. A thread
+    can't be cancelled, so the slot of the route being called is only released once the thread
+    finishes, even if the caller timed out or lost a hedge race long before.
+    """
+    future = get_executor().submit(contextvars.copy_context().run, func, *args)
+    holder = _slot_holder.get()
+    if holder is not None:
+        holder(future)
+    return await asyncio.wrap_future(future)
+
+
+class Route:
+    """One backend and model the router can send prompts to, with its recent latency and errors."""
+
+    def __init__(self, config):
+        self.config = config
+        self.name = f"{config['provider']}:{config['model']}"
+        self.max_tokens = config.get("max_tokens")
+        self.timeout = config.get("timeout") or 60
+        # (seconds, ok) of the most recent calls
+        self.samples = deque(maxlen=STATS_WINDOW)
+        self.lock = threading.Lock()
+        # Released when a call really finishes, not when its caller gives up on it
+        self.slots = threading.BoundedSemaphore(MAX_IN_FLIGHT)
+
+    @property
+    def backend(self):
+        return LLM_BACKENDS.resolve(self.config["provider"])
+
+    def record(self, seconds, outcome):
+        with self.lock:
+            self.samples.append((seconds, outcome == "ok"))
+        ROUTE_REQUESTS.inc(route=self.name, result=outcome)
+
+    def p95(self):
+        """95th percentile latency of recent successful calls, or None with too few of them."""
+        with self.lock:
+            latencies = sorted(seconds for seconds, ok in self.samples if ok)
+        if len(latencies) < HEDGE_MIN_SAMPLES:
+            return None
+        return latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+
+    def error_rate(self):
+        with self.lock:
+            if len(self.samples) < MIN_SAMPLES:
+                return 0.0
+            return sum(1 for _, ok in self.samples if not ok) / len(self.samples)
+
+    def healthy(self):
+        p95 = self.p95()
+        return self.error_rate() <= MAX_ERROR_RATE and (p95 is None or p95 <= LATENCY_BUDGET)
+
+    def stats(self):
+        return {"p95_seconds": self.p95(), "error_rate": self.error_rate(), "healthy": self.healthy(), "calls": len(self.samples)}
+
+
+class LLMRouter:
+    """
+    Sends each prompt to the first suitable route: routes are tried in configured order, skipping
+    those whose max_tokens the prompt exceeds, with unhealthy routes moved to the end. A route
+    that errors or doesn't answer within its timeout is given up on and the next one is tried;
+    with LLM_HEDGE, the next route is also asked once the first is slower than its usual p95.
+    A route with LLM_ROUTE_MAX_IN_FLIGHT calls still running (abandoned ones included) is skipped.
+
+    generate(config, prompt), generate_async(config, prompt) and stream(config, prompt) make the
+    actual call on a route (the LLM processor adds rate limiting and tracing).
+    """
+
+    def __init__(self, configs, generate, generate_async, stream):
+        self.routes = [Route(config) for config in configs]
+        self._generate = generate
+        self._generate_async = generate_async
+        self._stream = stream
+        # Enough threads for every route to be at its in-flight limit
+        get_executor(max(THREADS, MAX_IN_FLIGHT * len(self.routes)))
+
+    def route_for(self, tokens):
+        """The route a prompt of about tokens tokens would be sent to first."""
+        return self.candidates(tokens)[0]
+
+    def next_free(self, routes, busy):
+        """
+        The next route from the iterator with a free in-flight slot (taken for the caller); busy
+        routes are set aside in busy. Returns None when the iterator is exhausted.
+        """
+        for route in routes:
+            if route.slots.acquire(blocking=False):
+                return route
+            log.warning("LLM route is at its in-flight limit, skipping it", route=route.name, limit=MAX_IN_FLIGHT)
+            busy.append(route)
+        return None
+
+    def wait_for_slot(self, busy):
+        """Block until the first busy route frees a slot (within its timeout); returns it or None."""
+        while busy:
+            route = busy.pop(0)
+            if route.slots.acquire(timeout=route.timeout):
+                return route
+        return None
+
+    def candidates(self, tokens):
+        fitting = [route for route in self.routes if route.max_tokens is None or tokens <= route.max_tokens]
+        if not fitting:
+            # Nothing is meant for prompts this long; the route with the largest limit is the best bet
+            fitting = [max(self.routes, key=lambda route: route.max_tokens)]
+        # Stable sort: healthy routes first, each group in configured order
+        return sorted(fitting, key=lambda route: not route.healthy())
+
+    def hedge_delay(self, route):
+        if not HEDGE:
+            return None
+        p95 = route.p95()
+        return max(HEDGE_MIN_DELAY, p95) if p95 is not None else None
+
+    def _call(self, route, prompt, attempt):
+        started = attempt["started"] = time.monotonic()
+        try:
+            result = self._generate(route.config, prompt)
+        except Exception:
+            if not attempt["abandoned"]:
+                route.record(time.monotonic() - started, "error")
+            raise
+        finally:
+            route.slots.release()
+        if not attempt["abandoned"]:
+            route.record(time.monotonic() - started, "ok")
+        return result
+
+    def generate(self, prompt, tokens):
+        """Answer a prompt of about tokens tokens from the first route that manages to; returns (answer, route)."""
+        routes = iter(self.candidates(tokens))
+        busy = []
+        # future -> (route, attempt state)
+        pending = {}
+        last_error = None
+
+        def launch(outcome=None, route=None):
+            if route is not None:
+                if not route.slots.acquire(blocking=False):
+                    return None
+            else:
+                route = self.next_free(routes, busy)
+                if route is None and not pending:
+                    # Every route left is busy and nothing else is running: wait for a slot
+                    route = self.wait_for_slot(busy)
+                if route is None:
+                    return None
+            if outcome:
+                ROUTE_REQUESTS.inc(route=route.name, result=outcome)
+            attempt = {"abandoned": False, "started": None}
+            # Each call runs in a copy of this context so it keeps the trace id and rate-limit lane
+            future = get_executor().submit(contextvars.copy_context().run, self._call, route, prompt, attempt)
+            pending[future] = (route, attempt)
+            return route
+
+        first = launch()
+        if first is None:
+            raise LLMUnavailableError("Every LLM route is at its in-flight limit")
+        delay = self.hedge_delay(first)
+        hedge_at = time.monotonic() + delay if delay else None
+
+        while pending:
+            # A call's timeout runs from when it started, not from when it was queued for a thread
+            deadlines = [attempt["started"] + route.timeout for route, attempt in pending.values() if attempt["started"] is not None]
+            wake = min(deadlines) if deadlines else time.monotonic() + 0.05
+            if hedge_at:
+                wake = min(wake, hedge_at)
+            done, _ = wait(list(pending), timeout=max(0, wake - time.monotonic()), return_when=FIRST_COMPLETED)
+
+            for future in done:
+                route, _ = pending.pop(future)
+                try:
+                    return future.result(), route
+                except Exception as e:
+                    last_error = e
+                    log.warning("LLM route failed", route=route.name, error=repr(e))
+
+            now = time.monotonic()
+            for future, (route, attempt) in list(pending.items()):
+                if attempt["started"] is not None and now >= attempt["started"] + route.timeout:
+                    # The call can't be cancelled; it finishes in the background (holding its
+                    # route's slot until then) and is ignored
+                    del pending[future]
+                    attempt["abandoned"] = True
+                    route.record(route.timeout, "timeout")
+                    last_error = TimeoutError(f"{route.name} did not answer within {route.timeout}s")
+                    log.warning("LLM route timed out", route=route.name, timeout=route.timeout)
+
+            if hedge_at and now >= hedge_at and pending:
+                hedge_at = None
+                # With no other route left, the same route is asked a second time
+                hedge = launch("hedge") or launch("hedge", first)
+                if hedge:
+                    log.info("LLM call is slow, sending a hedged request", route=first.name, hedge_route=hedge.name)
+            if not pending:
+                # Fail over to the next route
+                launch()
+
+        raise LLMUnavailableError("No LLM route could answer") from last_error
+
+    async def _call_async(self, route, prompt):
+        started = time.monotonic()
+        threads = []
+
+        def hold_slot(future):
+            # Only the first thread takes the slot over; it is released exactly once
+            if not threads:
+                threads.append(future)
+                future.add_done_callback(lambda _: route.slots.release())
+
+        # wait_for runs the call in a task, which copies this context with the holder set
+        token = _slot_holder.set(hold_slot)
+        try:
+            result = await asyncio.wait_for(self._generate_async(route.config, prompt), route.timeout)
+        except asyncio.CancelledError:
+            # Lost a hedge race; not the route's fault
+            raise
+        except asyncio.TimeoutError:
+            route.record(route.timeout, "timeout")
+            raise TimeoutError(f"{route.name} did not answer within {route.timeout}s")
+        except Exception:
+            route.record(time.monotonic() - started, "error")
+            raise
+        finally:
+            _slot_holder.reset(token)
+            if not threads:
+                route.slots.release()
+        route.record(time.monotonic() - started, "ok")
+        return result
+
+    async def generate_async(self, prompt, tokens):
+        """Async variant of generate; the losing call of a hedge is cancelled."""
+        routes = iter(self.candidates(tokens))
+        busy = []
+        pending = {}
+        last_error = None
+
+        async def launch(outcome=None, route=None):
+            if route is not None:
+                if not route.slots.acquire(blocking=False):
+                    return None
+            else:
+                route = self.next_free(routes, busy)
+                if route is None and not pending:
+                    route = await asyncio.to_thread(self.wait_for_slot, busy)
+                if route is None:
+                    return None
+            if outcome:
+                ROUTE_REQUESTS.inc(route=route.name, result=outcome)
+            pending[asyncio.ensure_future(self._call_async(route, prompt))] = route
+            return route
+
+        first = await launch()
+        if first is None:
+            raise LLMUnavailableError("Every LLM route is at its in-flight limit")
+        delay = self.hedge_delay(first)
+        hedge_at = time.monotonic() + delay if delay else None
+
+        try:
+            while pending:
+                timeout = max(0, hedge_at - time.monotonic()) if hedge_at else None
+                done, _ = await asyncio.wait(list(pending), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    route = pending.pop(task)
+                    try:
+                        return task.result(), route
+                    except Exception as e:
+                        last_error = e
+                        log.warning("LLM route failed", route=route.name, error=repr(e))
+
+                if hedge_at and time.monotonic() >= hedge_at and pending:
+                    hedge_at = None
+                    hedge = await launch("hedge") or await launch("hedge", first)
+                    if hedge:
+                        log.info("LLM call is slow, sending a hedged request", route=first.name, hedge_route=hedge.name)
+                if not pending:
+                    await launch()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        raise LLMUnavailableError("No LLM route could answer") from last_error
+
+    def stream(self, prompt, tokens):
+        """
+        Stream from the first route that starts answering; a route that fails mid-answer is not
+        retried. The generator returns the route that answered.
+        """
+        routes = iter(self.candidates(tokens))
+        busy = []
+        last_error = None
+        while True:
+            route = self.next_free(routes, busy) or self.wait_for_slot(busy)
+            if route is None:
+                break
+            started = time.monotonic()
+            answered = False
+            try:
+                for piece in self._stream(route.config, prompt):
+                    answered = True
+                    yield piece
+            except Exception as e:
+                route.record(time.monotonic() - started, "error")
+                if answered:
+                    raise
+                last_error = e
+                log.warning("LLM route failed", route=route.name, error=repr(e))
+                continue
+            finally:
+                route.slots.release()
+            route.record(time.monotonic() - started, "ok")
+            return route
+        raise LLMUnavailableError("No LLM route could answer") from last_error
+
+    def stats(self):
+        return {route.name: route.stats() for route in self.routes}
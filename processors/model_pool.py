@@ -0,0 +1,150 @@
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from utils.structured_logging import get_logger
+
+log = get_logger(__name__)
+
+# How long a request waits for a busy instance before giving up (and letting the router fail over)
+ACQUIRE_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+
+
+def available_memory_bytes():
+    """Best-effort estimate of free RAM, or None where the platform doesn't expose it."""
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_AVPHYS_PAGES")
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def default_instance_count(model_path):
+    """Size the pool to what fits in RAM, with at least two cores per instance."""
+    cores = os.cpu_count() or 1
+    by_cores = max(1, cores // 2)
+    memory = available_memory_bytes()
+    try:
+        model_size = os.path.getsize(model_path)
+    except OSError:
+        model_size = 0
+    if not memory or not model_size:
+        return 1
+    # Leave headroom for the KV cache and the rest of the process
+    by_memory = max(1, int(memory // (model_size * 1.5)))
+    return min(by_cores, by_memory)
+
+
+class ModelPool:
+    """Keeps local GPT4All models resident and hands them out to one generate call at a time."""
+
+    def __init__(self, model_path, instances=None, loader=None):
+        self.model_path = model_path
+        self.instances = instances or int(os.getenv("GPT4ALL_INSTANCES", "0")) or default_instance_count(model_path)
+        self.threads_per_instance = max(1, (os.cpu_count() or 1) // self.instances)
+        self._loader = loader or self.load_model
+        self._idle = queue.Queue()
+        self._loaded = 0
+        self._in_use = 0
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.requests = 0
+        self.queue_wait_seconds = 0.0
+        self.max_queue_wait_seconds = 0.0
+        self.inference_seconds = 0.0
+
+    def load_model(self):
+        from gpt4all import GPT4All
+        log.info("Loading GPT4All model", model_path=self.model_path, threads=self.threads_per_instance)
+        return GPT4All(self.model_path, n_threads=self.threads_per_instance)
+
+    def warm(self):
+        """Load every instance up front so the first requests don't pay for it."""
+        while True:
+            with self._lock:
+                if self._loaded >= self.instances:
+                    return
+                self._loaded += 1
+            try:
+                model = self._loader()
+            except Exception:
+                # Don't count an instance that never loaded, or acquire would wait for it forever
+                with self._lock:
+                    self._loaded -= 1
+                raise
+            self._idle.put(model)
+
+    @contextmanager
+    def acquire(self, timeout=ACQUIRE_TIMEOUT):
+        """Borrow a model instance, loading a new one if the pool isn't full yet."""
+        started = time.monotonic()
+        model = None
+        try:
+            model = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_load = self._loaded < self.instances
+                if can_load:
+                    self._loaded += 1
+            if can_load:
+                try:
+                    model = self._loader()
+                except Exception:
+                    with self._lock:
+                        self._loaded -= 1
+                    raise
+            else:
+                # Every instance is busy: wait for one to be returned
+                try:
+                    model = self._idle.get(timeout=timeout)
+                except queue.Empty:
+                    raise TimeoutError(f"No GPT4All instance became free within {timeout}s") from None
+
+        waited = time.monotonic() - started
+        with self._lock:
+            self._in_use += 1
+            self.queue_wait_seconds += waited
+            self.max_queue_wait_seconds = max(self.max_queue_wait_seconds, waited)
+        try:
+            yield model
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            self._idle.put(model)
+
+    def generate(self, prompt, **kwargs):
+        """Run generate on a pooled model and record queue-wait and inference time."""
+        with self.acquire() as model:
+            started = time.monotonic()
+            try:
+                return model.generate(prompt, **kwargs)
+            finally:
+                elapsed = time.monotonic() - started
+                with self._lock:
+                    self.requests += 1
+                    self.inference_seconds += elapsed
+
+    def stream(self, prompt, **kwargs):
+        """Yield tokens from a pooled model, keeping the instance borrowed until generation finishes."""
+        with self.acquire() as model:
+            started = time.monotonic()
+            try:
+                yield from model.generate(prompt, streaming=True, **kwargs)
+            finally:
+                elapsed = time.monotonic() - started
+                with self._lock:
+                    self.requests += 1
+                    self.inference_seconds += elapsed
+
+    def stats(self):
+        with self._lock:
+            return {
+                "instances": self.instances,
+                "loaded": self._loaded,
+                "in_use": self._in_use,
+                "requests": self.requests,
+                "queue_wait_seconds_total": round(self.queue_wait_seconds, 3),
+                "queue_wait_seconds_max": round(self.max_queue_wait_seconds, 3),
+                "inference_seconds_total": round(self.inference_seconds, 3),
+            }
@@ -0,0 +1,46 @@
+import openai
+
+# OpenAI chat completions backend, imported only when LLM_PROVIDER=openai is first used
+
+
+def chat_messages(prompt):
+    return [
+        {"role": "system", "content": "You are a helpful assistant."},
+        {"role": "user", "content": prompt},
+    ]
+
+
+def generate(prompt, config):
+    # If using a GPT-3.5-turbo or GPT-4 model (chat-based models)
+    response = openai.ChatCompletion.create(
+        model=config["model"],  # Set OPENAI_MODEL to switch, e.g. to "gpt-4"
+        messages=chat_messages(prompt),
+        request_timeout=config.get("timeout"),
+    )
+
+    # Extract the generated response
+    return response['choices'][0]['message']['content']
+
+
+async def generate_async(prompt, config):
+    response = await openai.ChatCompletion.acreate(
+        model=config["model"],
+        messages=chat_messages(prompt),
+        request_timeout=config.get("timeout"),
+    )
+    return response['choices'][0]['message']['content']
+
+
+def stream(prompt, config):
+    response = openai.ChatCompletion.create(
+        model=config["model"],
+        messages=chat_messages(prompt),
+        request_timeout=config.get("timeout"),
+        stream=True
+    )
+
+    # Each streamed chunk carries the next piece of the answer in its delta
+    for chunk in response:
+        content = chunk['choices'][0]['delta'].get('content')
+        if content:
+            yield content
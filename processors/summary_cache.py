@@ -0,0 +1,150 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+from utils.shared_state import connect_sqlite, get_shared_state
+from utils.structured_logging import get_logger
+
+log = get_logger(__name__)
+
+# Bump to invalidate every stored summary, e.g. after changing how summaries are post-processed
+SUMMARY_CACHE_VERSION = 1
+
+
+def normalize_article_text(article_text):
+    """Collapse whitespace so cosmetic differences in extraction don't defeat the cache."""
+    return re.sub(r"\s+", " ", article_text).strip()
+
+
+class SummaryCache:
+    """
+    Persistent LRU cache of LLM summaries keyed by prompt, provider, model and article text.
+    With a shared state backend on another host (Redis), summaries are also stored there so every
+    host reuses them, and claim/wait_for let one worker summarize while the others wait for it.
+    """
+
+    def __init__(self, path=None, max_entries=None, state=None):
+        self.path = path or os.getenv("SUMMARY_CACHE_PATH", "data/summaries.sqlite3")
+        self.max_entries = max_entries or int(os.getenv("SUMMARY_CACHE_MAX_ENTRIES", "5000"))
+        self.state = state or get_shared_state()
+        self.shared_ttl = float(os.getenv("SUMMARY_CACHE_SHARED_TTL", "604800"))
+        # A claim outlives a crashed worker by at most claim_ttl; others wait up to claim_wait for a summary
+        self.claim_ttl = float(os.getenv("SUMMARY_CLAIM_TTL", "300"))
+        self.claim_wait = float(os.getenv("SUMMARY_CLAIM_WAIT", "120"))
+        self._local = threading.local()
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connect().execute(
+            "CREATE TABLE IF NOT EXISTS summaries ("
+            "key TEXT PRIMARY KEY, prompt_version TEXT NOT NULL, summary TEXT NOT NULL, last_used REAL NOT NULL)"
+        )
+
+    def _connect(self):
+        return connect_sqlite(self._local, self.path)
+
+    @staticmethod
+    def prompt_version(prompt_template):
+        """Version tag for a prompt template; changes whenever the template file changes."""
+        digest = hashlib.sha256(prompt_template.encode("utf-8")).hexdigest()[:16]
+        return f"{SUMMARY_CACHE_VERSION}:{digest}"
+
+    def key_for(self, prompt_template, provider, model, article_text):
+        parts = [self.prompt_version(prompt_template), provider, model or "", normalize_article_text(article_text)]
+        return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Return the cached summary for key, or None."""
+        conn = self._connect()
+        row = conn.execute("SELECT summary FROM summaries WHERE key = ?", (key,)).fetchone()
+        if row is not None:
+            conn.execute("UPDATE summaries SET last_used = ? WHERE key = ?", (time.time(), key))
+            return row[0]
+        if not self.state.remote:
+            return None
+
+        try:
+            shared = self.state.get(f"summary:{key}")
+        except Exception as e:
+            log.warning("Shared summary cache unavailable", error=repr(e))
+            return None
+        if shared is None:
+            return None
+        entry = json.loads(shared)
+        self.store(key, entry["prompt_version"], entry["summary"])
+        return entry["summary"]
+
+    def set(self, key, prompt_template, summary):
+        """Store a summary (also in the shared state if that is remote)."""
+        prompt_version = self.prompt_version(prompt_template)
+        self.store(key, prompt_version, summary)
+        if self.state.remote:
+            try:
+                self.state.set(f"summary:{key}", json.dumps({"prompt_version": prompt_version, "summary": summary}), self.shared_ttl)
+            except Exception as e:
+                log.warning("Shared summary cache unavailable", error=repr(e))
+
+    def claim(self, key):
+        """Claim summarizing the article behind key; False while another worker is already at it."""
+        return self.state.claim([f"summarizing:{key}"], self.claim_ttl)
+
+    def release(self, key):
+        self.state.release([f"summarizing:{key}"])
+
+    def wait_for(self, key, lookup=None):
+        """
+        Wait for the worker holding the claim on key to store its summary; None if it gave up or took
+        too long. lookup reads the summary (by default get(key)), for claims that cover several keys.
+        """
+        lookup = lookup or (lambda: self.get(key))
+        deadline = time.monotonic() + self.claim_wait
+        delay = 0.1
+        while time.monotonic() < deadline:
+            time.sleep(delay)
+            summary = lookup()
+            if summary is not None:
+                return summary
+            if self.state.get(f"summarizing:{key}") is None:
+                # Released without a summary (it failed); one more look in case it was stored just before
+                return lookup()
+            delay = min(delay * 2, 1.0)
+        return None
+
+    async def wait_for_async(self, key, lookup=None):
+        """Async variant of wait_for."""
+        lookup = lookup or (lambda: self.get(key))
+        deadline = time.monotonic() + self.claim_wait
+        delay = 0.1
+        while time.monotonic() < deadline:
+            await asyncio.sleep(delay)
+            summary = await asyncio.to_thread(lookup)
+            if summary is not None:
+                return summary
+            if await asyncio.to_thread(self.state.get, f"summarizing:{key}") is None:
+                return await asyncio.to_thread(lookup)
+            delay = min(delay * 2, 1.0)
+        return None
+
+    def store(self, key, prompt_version, summary):
+        """Store a summary locally and evict the least recently used entries beyond max_entries."""
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO summaries (key, prompt_version, summary, last_used) VALUES (?, ?, ?, ?)",
+            (key, prompt_version, summary, time.time()),
+        )
+        conn.execute(
+            "DELETE FROM summaries WHERE key IN ("
+            "SELECT key FROM summaries ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    def purge_other_versions(self, prompt_template):
+        """Drop summaries produced with any other prompt template or cache version."""
+        self._connect().execute(
+            "DELETE FROM summaries WHERE prompt_version != ?", (self.prompt_version(prompt_template),)
+        )
@@ -0,0 +1,106 @@
+import asyncio
+import importlib
+import json
+import sys
+
+import pytest
+
+pytest.importorskip("dotenv")
+pytest.importorskip("aiohttp")
+
+
+@pytest.fixture
+def asgi(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("PLATFORM", "slack")
+    monkeypatch.setenv("SLACK_BOT_USER_OAUTH_TOKENS", "TTEST:xoxb-test")
+    monkeypatch.setenv("SLACK_TRIGGER_GROUP", "UTEST")
+    monkeypatch.setenv("SLACK_DIGEST_CHANNELS", "")
+    monkeypatch.setenv("DUPLICATE_DETECTION", "False")
+    monkeypatch.setenv("SHARED_STATE", "sqlite")
+    monkeypatch.setenv("SHARED_STATE_PATH", str(tmp_path / "shared_state.sqlite3"))
+    monkeypatch.setattr("utils.shared_state._state", None)
+    sys.modules.pop("asgi_app", None)
+    return importlib.import_module("asgi_app")
+
+
+def reaction_event(event_id):
+    return {
+        "type": "event_callback", "team_id": "TTEST", "event_id": event_id,
+        "event": {"type": "reaction_added", "user": "UTEST", "reaction": "newspaper",
+                  "item": {"channel": "CTEST", "ts": "1700000000.000100"}},
+    }
+
+
+async def post_event(app, data):
+    """POST data to /events through the ASGI interface; returns (status, body)."""
+    body = json.dumps(data).encode("utf-8")
+    received = []
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        received.append(message)
+
+    await app({"type": "http", "method": "POST", "path": "/events", "headers": []}, receive, send)
+    return received[0]["status"], json.loads(received[1]["body"])
+
+
+def test_reaction_is_queued_on_the_event_loop(asgi, monkeypatch):
+    from integrations.slack_integration import SUMMARIZE_REACTION
+    from utils.job_queue import register_async_handler
+
+    jobs = []
+
+    async def summarize(job):
+        jobs.append(job)
+
+    register_async_handler(SUMMARIZE_REACTION, summarize)
+
+    async def scenario():
+        status, body = await post_event(asgi.app, reaction_event("Ev1"))
+        await asgi.job_queue.shutdown(timeout=5)
+        return status, body
+
+    status, body = asyncio.run(scenario())
+    assert (status, body) == (200, {"status": "Reaction queued"})
+    assert [job["message_ts"] for job in jobs] == ["1700000000.000100"]
+
+
+def test_failed_submit_releases_the_dedup_claim(asgi, monkeypatch):
+    def fail(kind, payload):
+        raise RuntimeError("queue unavailable")
+
+    monkeypatch.setattr(asgi.job_queue, "_schedule", fail)
+    with pytest.raises(RuntimeError):
+        asyncio.run(post_event(asgi.app, reaction_event("Ev2")))
+
+    monkeypatch.setattr(asgi.job_queue, "_schedule", lambda kind, payload: None)
+    status, body = asyncio.run(post_event(asgi.app, reaction_event("Ev2")))
+    assert (status, body) == (200, {"status": "Reaction queued"})
+
+
+def test_failed_job_releases_the_message_but_not_the_event(asgi, monkeypatch):
+    from integrations.slack_integration import SUMMARIZE_REACTION
+    from utils.job_queue import register_async_handler
+
+    integration = asgi.platform
+
+    async def outage(*args):
+        raise RuntimeError("LLM unavailable")
+
+    monkeypatch.setattr(integration, "test_auth_async", outage)
+    register_async_handler(SUMMARIZE_REACTION, integration.summarize_reaction_async)
+
+    async def scenario():
+        first = await post_event(asgi.app, reaction_event("Ev3"))
+        await asgi.job_queue.shutdown(timeout=5)
+        return first
+
+    assert asyncio.run(scenario()) == (200, {"status": "Reaction queued"})
+
+    monkeypatch.setattr(asgi.job_queue, "_schedule", lambda kind, payload: None)
+    # Slack redelivering the same event is still dropped, a new reaction gets another try
+    assert asyncio.run(post_event(asgi.app, reaction_event("Ev3"))) == (200, {"status": "Message already processed"})
+    assert asyncio.run(post_event(asgi.app, reaction_event("Ev4"))) == (200, {"status": "Reaction queued"})
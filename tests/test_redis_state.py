@@ -0,0 +1,106 @@
+import os
+import socketserver
+import threading
+import uuid
+
+import pytest
+
+from benchmarks.fake_redis import encode, read_command, start_fake_redis
+from utils.redis_state import RedisState
+
+# The claim script is Lua run by the server, so its semantics are only really tested against a
+# Redis server: set TEST_REDIS_URL (e.g. redis://127.0.0.1:6379/15) to include it. The fake Redis
+# used by the benchmarks has its own Python equivalent of the script and is tested as well.
+TEST_REDIS_URL = os.getenv("TEST_REDIS_URL")
+
+
+@pytest.fixture(params=["redis", "fake_redis"])
+def state(request):
+    if request.param == "redis":
+        if not TEST_REDIS_URL:
+            pytest.skip("TEST_REDIS_URL is not set")
+        # A fresh prefix per test keeps runs apart without flushing the database
+        yield RedisState(TEST_REDIS_URL, key_prefix=f"test:{uuid.uuid4().hex}:")
+        return
+    server, _ = start_fake_redis()
+    try:
+        yield RedisState(f"redis://127.0.0.1:{server.server_address[1]}/0")
+    finally:
+        server.shutdown()
+
+
+def test_claim_sets_nothing_when_one_key_is_taken(state):
+    assert state.claim(["b"], 60)
+    assert not state.claim(["a", "b"], 60)
+    assert state.get("a") is None
+    assert state.claim(["a"], 60)
+
+
+def test_claim_sets_every_key_with_the_ttl(state):
+    assert state.claim(["a", "b"], 60, value="worker-1")
+    assert state.get("a") == state.get("b") == "worker-1"
+    ttls = state.execute(("PTTL", state._key("a")), ("PTTL", state._key("b")))
+    assert all(0 < ttl <= 60000 for ttl in ttls)
+
+
+def test_two_key_race_has_exactly_one_winner(state):
+    for trial in range(300):
+        keys = [f"{trial}:a", f"{trial}:b"]
+        barrier = threading.Barrier(2)
+        results = []
+
+        def claim(order):
+            barrier.wait()
+            results.append(state.claim(order, 60))
+
+        threads = [threading.Thread(target=claim, args=(order,)) for order in (keys, keys[::-1])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert sorted(results) == [False, True], f"trial {trial}: {results}"
+
+
+def start_lossy_server():
+    """A server that answers PING, drops the connection on the first other command, then answers with null."""
+    received = []
+
+    class LossyHandler(socketserver.StreamRequestHandler):
+        def handle(self):
+            while True:
+                args = read_command(self.rfile)
+                if not args:
+                    return
+                name = args[0].decode().upper()
+                received.append(name)
+                if name != "PING" and received.count(name) == 1:
+                    return
+                self.wfile.write(encode(b"PONG" if name == "PING" else None))
+
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), LossyHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, received
+
+
+def test_lost_reply_is_not_resent_for_a_claim():
+    server, received = start_lossy_server()
+    try:
+        state = RedisState(f"redis://127.0.0.1:{server.server_address[1]}/0")
+        state.execute(("PING",))
+        with pytest.raises(ConnectionError):
+            state.claim(["a"], 60)
+        assert received.count("EVAL") == 1
+    finally:
+        server.shutdown()
+
+
+def test_lost_reply_is_resent_for_a_read():
+    server, received = start_lossy_server()
+    try:
+        state = RedisState(f"redis://127.0.0.1:{server.server_address[1]}/0")
+        state.execute(("PING",))
+        assert state.get("a") is None
+        assert received.count("GET") == 2
+    finally:
+        server.shutdown()
@@ -0,0 +1,264 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from utils.article_download import download, download_async
+from utils.metrics import CACHE_REQUESTS, span
+from utils.plugins import EXTRACTORS
+from utils.shared_state import get_shared_state
+from utils.structured_logging import get_logger
+
+log = get_logger(__name__)
+
+# Query parameters that only track where a click came from and never change the page
+TRACKING_PARAMS = {"fbclid", "gclid", "dclid", "msclkid", "igshid", "mc_cid", "mc_eid", "ref", "ref_src", "cmpid", "smid", "ocid"}
+TRACKING_PREFIXES = ("utm_",)
+DEFAULT_PORTS = {"http": "80", "https": "443"}
+EVICT_SCAN_EVERY = 100
+
+
+def canonicalize_url(url):
+    """Normalize a URL so trivially different links to the same article share a cache entry."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and str(parts.port) != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+
+    query = [
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    ]
+    path = parts.path or "/"
+    # Fragments never reach the server, so they can't change the article
+    return urlunsplit((scheme, host, path, urlencode(sorted(query)), ""))
+
+
+class ArticleCache:
+    """
+    On-disk cache of extracted articles, keyed by a hash of the canonical URL. With a shared state
+    backend on another host (Redis), entries are also stored there so every host reuses them.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=None, freshness=None, state=None):
+        self.cache_dir = cache_dir or os.getenv("ARTICLE_CACHE_DIR", "data/articles")
+        self.max_bytes = max_bytes or int(os.getenv("ARTICLE_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+        # How long (seconds) an entry is served without asking the origin whether it changed
+        self.freshness = freshness if freshness is not None else float(os.getenv("ARTICLE_CACHE_FRESHNESS", "3600"))
+        self.user_agent = os.getenv("ARTICLE_USER_AGENT", "Mozilla/5.0 (compatible; mycelial-bridge/1.0)")
+        # Name of the extractor plugin that turns a page into title/text (see utils/plugins.py), and the
+        # one tried when it fails or finds less than min_text_chars of text (empty to disable)
+        self.extractor = os.getenv("ARTICLE_EXTRACTOR", "lxml")
+        self.fallback_extractor = os.getenv("ARTICLE_FALLBACK_EXTRACTOR", "newspaper")
+        self.min_text_chars = int(os.getenv("ARTICLE_MIN_TEXT_CHARS", "200"))
+        self.state = state or get_shared_state()
+        self.shared_ttl = float(os.getenv("ARTICLE_CACHE_SHARED_TTL", "86400"))
+        self._evict_lock = threading.Lock()
+        # Bytes this process believes the cache holds (None until the first scan), so eviction only
+        # walks the directory when it is likely over budget, or every EVICT_SCAN_EVERY stores to
+        # account for other workers' writes
+        self._total_bytes = None
+        self._stores_since_scan = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def key_for(self, url):
+        return hashlib.sha256(canonicalize_url(url).encode("utf-8")).hexdigest()
+
+    def path_for(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def load(self, key):
+        try:
+            with open(self.path_for(key), "r", encoding="utf-8") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            pass
+        if not self.state.remote:
+            return None
+
+        try:
+            shared = self.state.get(f"article:{key}")
+        except Exception as e:
+            log.warning("Shared article cache unavailable", error=repr(e))
+            return None
+        if shared is None:
+            return None
+        entry = json.loads(shared)
+        self.write_file(key, entry)
+        return entry
+
+    def save(self, key, entry):
+        """Store an entry on disk (and in the shared state if that is remote)."""
+        self.write_file(key, entry)
+        if self.state.remote:
+            try:
+                self.state.set(f"article:{key}", json.dumps(entry), self.shared_ttl)
+            except Exception as e:
+                log.warning("Shared article cache unavailable", error=repr(e))
+
+    def write_file(self, key, entry):
+        path = self.path_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temp file first so concurrent readers never see a partial entry
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(entry, file)
+        size = os.path.getsize(tmp_path)
+        os.replace(tmp_path, path)
+        with self._evict_lock:
+            self._stores_since_scan += 1
+            if self._total_bytes is not None:
+                # Overwrites are counted twice; that only brings the next scan forward
+                self._total_bytes += size
+
+    def get_article(self, url):
+        """Return the cached article entry for url, revalidating or downloading it when needed."""
+        key, entry, headers = self.lookup(url)
+        if headers is None:
+            return entry
+
+        try:
+            with span("article_download"):
+                response = download(url, headers=headers)
+        except Exception as e:
+            return self.serve_stale(url, entry, e)
+        return self.store_response(url, key, entry, response)
+
+    async def get_article_async(self, url):
+        """Async variant of get_article; disk access and parsing run in worker threads."""
+        key, entry, headers = await asyncio.to_thread(self.lookup, url)
+        if headers is None:
+            return entry
+
+        try:
+            with span("article_download"):
+                response = await download_async(url, headers=headers)
+        except Exception as e:
+            return self.serve_stale(url, entry, e)
+        return await asyncio.to_thread(self.store_response, url, key, entry, response)
+
+    def lookup(self, url):
+        """Return (key, entry, request headers); headers is None when the entry is fresh enough to serve."""
+        key = self.key_for(url)
+        entry = self.load(key)
+
+        if entry and time.time() - entry["validated_at"] < self.freshness:
+            try:
+                # Touch the file so eviction treats it as recently used
+                os.utime(self.path_for(key))
+            except FileNotFoundError:
+                # Evicted by another worker just now
+                entry = None
+            else:
+                log.debug("Article cache hit", url=url)
+                CACHE_REQUESTS.inc(cache="article", result="hit")
+                return key, entry, None
+
+        CACHE_REQUESTS.inc(cache="article", result="miss")
+        headers = {"User-Agent": self.user_agent}
+        if entry:
+            # Conditional revalidation: the origin answers 304 if nothing changed
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return key, entry, headers
+
+    def serve_stale(self, url, entry, error):
+        if entry:
+            log.warning("Article revalidation failed, serving stale copy", url=url, error=str(error))
+            return entry
+        raise error
+
+    def store_response(self, url, key, entry, response):
+        """Turn a download (or 304) into a cache entry, save it and return it."""
+        now = time.time()
+        if response.status_code == 304 and entry:
+            log.debug("Article not modified, extending cache entry", url=url)
+            entry["validated_at"] = now
+            self.save(key, entry)
+            return entry
+
+        if response.status_code != 200:
+            if entry:
+                log.warning("Article revalidation failed, serving stale copy", url=url, status_code=response.status_code)
+                return entry
+            raise ValueError(f"Failed to download {url}: HTTP {response.status_code}")
+
+        entry = self.extract(url, response)
+        entry["validated_at"] = now
+        self.save(key, entry)
+
+        # Also store the article under the URL redirects led to, so links to it hit directly
+        final_key = self.key_for(response.url)
+        if final_key != key:
+            self.save(final_key, entry)
+
+        self.evict()
+        return entry
+
+    def extract(self, url, response):
+        """Parse a downloaded page with the configured extractor (or its fallback) into a cache entry."""
+        html = response.text
+        fields = self.run_extractor(self.extractor, response.url, html)
+        if self.fallback_extractor and self.fallback_extractor != self.extractor and len((fields or {}).get("text", "")) < self.min_text_chars:
+            log.debug("Extractor found little text, trying the fallback", url=url, extractor=self.extractor, fallback=self.fallback_extractor)
+            fallback_fields = self.run_extractor(self.fallback_extractor, response.url, html)
+            if fallback_fields and len(fallback_fields["text"]) > len((fields or {}).get("text", "")):
+                fields = fallback_fields
+        if fields is None:
+            raise ValueError(f"Failed to extract {url}")
+        return {
+            "url": url,
+            "final_url": response.url,
+            **fields,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "fetched_at": time.time(),
+        }
+
+    def run_extractor(self, name, url, html):
+        """Fields extracted by the named extractor plugin, or None if it failed."""
+        try:
+            extractor = EXTRACTORS.resolve(name)
+            with span("article_parse", extractor=name):
+                return extractor.extract(url, html)
+        except Exception as e:
+            log.warning("Article extraction failed", url=url, extractor=name, error=repr(e))
+            return None
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits in max_bytes."""
+        with self._evict_lock:
+            if self._total_bytes is not None and self._total_bytes <= self.max_bytes and self._stores_since_scan < EVICT_SCAN_EVERY:
+                return
+            self._stores_since_scan = 0
+            files = []
+            total = 0
+            for root, _, names in os.walk(self.cache_dir):
+                for name in names:
+                    if not name.endswith(".json"):
+                        continue
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    files.append((stat.st_mtime, stat.st_size, path))
+                    total += stat.st_size
+
+            files.sort()
+            for _, size, path in files:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
+            self._total_bytes = total
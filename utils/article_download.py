@@ -0,0 +1,167 @@
+import asyncio
+import codecs
+import os
+import re
+import threading
+import time
+from urllib.parse import urlsplit
+
+from utils import http_client
+from utils.metrics import counter
+
+# Article pages are downloaded as a stream and abandoned as soon as they turn out to be something
+# we can't summarize (a PDF, a video) or grow past the size cap, so one slow host or huge file
+# can't hold a worker or its memory for long.
+MAX_BYTES = int(os.getenv("ARTICLE_MAX_BYTES", str(5 * 1024 * 1024)))
+CONNECT_TIMEOUT = float(os.getenv("ARTICLE_CONNECT_TIMEOUT", "3.05"))
+READ_TIMEOUT = float(os.getenv("ARTICLE_READ_TIMEOUT", "10"))
+# Wall-clock budget for the whole download; the read timeout alone resets with every chunk
+DEADLINE = float(os.getenv("ARTICLE_DOWNLOAD_DEADLINE", "20"))
+CHUNK_SIZE = 64 * 1024
+
+# Pages without a Content-Type are sniffed by the extractor instead of being rejected
+HTML_CONTENT_TYPES = {"text/html", "application/xhtml+xml"}
+
+# Where a page declares its encoding when the Content-Type header doesn't: a byte order mark or a
+# <meta charset> / <meta http-equiv="Content-Type"> within the first bytes, as browsers look for it
+BOMS = ((codecs.BOM_UTF8, "utf-8-sig"), (codecs.BOM_UTF16_LE, "utf-16"), (codecs.BOM_UTF16_BE, "utf-16"))
+META_CHARSET = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([\w.:-]+)""", re.IGNORECASE)
+SNIFF_BYTES = 4096
+# Browsers read pages labelled Latin-1 or ASCII as windows-1252, and so do most servers that send them
+ENCODING_ALIASES = {"iso-8859-1": "cp1252", "latin-1": "cp1252", "latin1": "cp1252", "us-ascii": "cp1252", "ascii": "cp1252"}
+
+DOWNLOADS_REJECTED = counter("bridge_article_downloads_rejected_total", "Article downloads abandoned, by reason.")
+
+
+class ArticleDownloadError(ValueError):
+    """Raised when a page is not worth downloading: not HTML, too large or too slow."""
+
+    def __init__(self, url, reason, detail):
+        super().__init__(f"Rejected {url}: {detail}")
+        self.reason = reason
+
+
+class Page:
+    """A downloaded page (or a 304/error status with an empty body)."""
+
+    def __init__(self, status_code, headers, url, content=b"", encoding=None):
+        self.status_code = status_code
+        self.headers = headers
+        self.url = url
+        self.content = content
+        self.encoding = encoding
+
+    @property
+    def text(self):
+        encoding = sniff_encoding(self.content, self.encoding)
+        if encoding:
+            return self.content.decode(encoding, errors="replace")
+        # Nothing declared: UTF-8 if the page is valid UTF-8, else the usual legacy encoding of the web
+        try:
+            return self.content.decode("utf-8")
+        except UnicodeDecodeError:
+            return self.content.decode("cp1252", errors="replace")
+
+
+def known_encoding(name):
+    name = name.strip().lower()
+    name = ENCODING_ALIASES.get(name, name)
+    try:
+        return codecs.lookup(name).name
+    except LookupError:
+        return None
+
+
+def sniff_encoding(content, declared=None):
+    """The page's encoding from its byte order mark, the header's charset or a <meta> charset, in that order."""
+    for bom, name in BOMS:
+        if content.startswith(bom):
+            return name
+    if declared and known_encoding(declared):
+        return known_encoding(declared)
+    match = META_CHARSET.search(content[:SNIFF_BYTES])
+    return known_encoding(match.group(1).decode("ascii")) if match else None
+
+
+def reject(url, reason, detail):
+    DOWNLOADS_REJECTED.inc(reason=reason)
+    raise ArticleDownloadError(url, reason, detail)
+
+
+def charset(headers):
+    for param in headers.get("Content-Type", "").split(";")[1:]:
+        name, _, value = param.strip().partition("=")
+        if name.lower() == "charset" and value:
+            return value.strip('"\'')
+    return None
+
+
+def check_headers(url, headers):
+    """Reject pages that aren't HTML or announce a size above the cap before reading their body."""
+    content_type = headers.get("Content-Type", "").split(";")[0].strip().lower()
+    if content_type and content_type not in HTML_CONTENT_TYPES:
+        reject(url, "content_type", f"unsupported content type {content_type}")
+    length = headers.get("Content-Length")
+    if length and length.isdigit() and int(length) > MAX_BYTES:
+        reject(url, "too_large", f"{length} bytes is over the {MAX_BYTES} byte limit")
+
+
+def append_chunk(url, body, chunk, deadline):
+    body += chunk
+    if len(body) > MAX_BYTES:
+        reject(url, "too_large", f"body is over the {MAX_BYTES} byte limit")
+    if time.monotonic() > deadline:
+        reject(url, "deadline", f"download took longer than {DEADLINE}s")
+
+
+def download(url, headers=None):
+    """Download an HTML page within the size cap and deadline; raises ArticleDownloadError otherwise."""
+    deadline = time.monotonic() + DEADLINE
+    # A single attempt: retries and their backoff would run past the deadline
+    response = http_client.get(url, headers=headers, timeout=(CONNECT_TIMEOUT, min(READ_TIMEOUT, DEADLINE)),
+                               stream=True, max_retries=0)
+    # A read that stalls is cut off by closing the response once the deadline has passed
+    timer = threading.Timer(max(0.0, deadline - time.monotonic()), response.close)
+    timer.daemon = True
+    timer.start()
+    try:
+        if response.status_code != 200:
+            return Page(response.status_code, response.headers, response.url)
+        check_headers(url, response.headers)
+        body = bytearray()
+        try:
+            for chunk in response.iter_content(CHUNK_SIZE):
+                append_chunk(url, body, chunk, deadline)
+        except ArticleDownloadError:
+            raise
+        except Exception:
+            if time.monotonic() >= deadline:
+                reject(url, "deadline", f"download took longer than {DEADLINE}s")
+            raise
+        return Page(200, response.headers, response.url, bytes(body), charset(response.headers))
+    finally:
+        timer.cancel()
+        # Hands the connection back to the pool, or drops it if the body was not read to the end
+        response.close()
+
+
+async def download_async(url, headers=None):
+    """Async variant of download over the pooled aiohttp session for the host."""
+    try:
+        return await asyncio.wait_for(_download_async(url, headers, time.monotonic() + DEADLINE), DEADLINE)
+    except asyncio.TimeoutError:
+        reject(url, "deadline", f"download took longer than {DEADLINE}s")
+
+
+async def _download_async(url, headers, deadline):
+    from utils import async_http_client
+
+    session = async_http_client.get_session(urlsplit(url).netloc)
+    async with session.get(url, headers=headers) as raw:
+        if raw.status != 200:
+            return Page(raw.status, raw.headers, str(raw.url))
+        check_headers(url, raw.headers)
+        body = bytearray()
+        async for chunk in raw.content.iter_chunked(CHUNK_SIZE):
+            append_chunk(url, body, chunk, deadline)
+        return Page(200, raw.headers, str(raw.url), bytes(body), charset(raw.headers))
@@ -1,5 +1,18 @@
 import re
-from newspaper import Article
+from utils.article_cache import ArticleCache
+from utils.metrics import ERRORS, span
+from utils.structured_logging import get_logger
+
+log = get_logger(__name__)
+
+# Shared on-disk cache, created on first use
+_article_cache = None
+
+def get_article_cache():
+    global _article_cache
+    if _article_cache is None:
+        _article_cache = ArticleCache()
+    return _article_cache
 
 def extract_urls_from_text(text):
     # Extract URL inside angle brackets, and ensure no trailing `>`
@@ -10,10 +23,19 @@ def extract_urls_from_text(text):
 
 def fetch_article_content(url):
     try:
-        article = Article(url)
-        article.download()
-        article.parse()
-        return article.text
+        # Repeat links are served from the article cache without downloading or parsing again
+        with span("article_fetch"):
+            return get_article_cache().get_article(url)["text"]
+    except Exception as e:
+        log.warning("Error fetching article content", url=url, error=repr(e))
+        ERRORS.inc(kind="article_fetch")
+        return None
+
+async def fetch_article_content_async(url):
+    try:
+        with span("article_fetch"):
+            return (await get_article_cache().get_article_async(url))["text"]
     except Exception as e:
-        print(f"Error fetching article content: {e}")
+        log.warning("Error fetching article content", url=url, error=repr(e))
+        ERRORS.inc(kind="article_fetch")
         return None
@@ -0,0 +1,97 @@
+import asyncio
+import json
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from utils.http_client import (
+    CONNECT_TIMEOUT, IDEMPOTENT_METHODS, MAX_RETRIES, POOL_SIZE, READ_TIMEOUT, RETRY_STATUS_CODES, retry_delay,
+)
+from utils.metrics import HTTP_RETRIES
+from utils.structured_logging import get_logger
+
+log = get_logger(__name__)
+
+# One keep-alive session per upstream host; sessions belong to the event loop that created them
+_sessions = {}
+
+
+class AsyncResponse:
+    """The parts of a response the pipeline uses, read fully so the connection can go back to the pool."""
+
+    def __init__(self, status_code, headers, url, content, encoding):
+        self.status_code = status_code
+        self.headers = headers
+        self.url = url
+        self.content = content
+        self.encoding = encoding or "utf-8"
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding, errors="replace")
+
+    def json(self):
+        return json.loads(self.content)
+
+
+def get_session(host):
+    """Return the pooled aiohttp session for a host, creating it on first use."""
+    session = _sessions.get(host)
+    if session is None or session.closed:
+        connector = aiohttp.TCPConnector(limit_per_host=POOL_SIZE)
+        timeout = aiohttp.ClientTimeout(sock_connect=CONNECT_TIMEOUT, sock_read=READ_TIMEOUT)
+        session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        _sessions[host] = session
+    return session
+
+
+async def close_sessions():
+    """Close every pooled session, e.g. on ASGI lifespan shutdown."""
+    for session in list(_sessions.values()):
+        await session.close()
+    _sessions.clear()
+
+
+async def request(method, url, token=None, auth_scheme="Bearer", headers=None, max_retries=None, rate_limit=None, **kwargs):
+    """Async counterpart of http_client.request with the same timeout and retry policy."""
+    parts = urlsplit(url)
+    session = get_session(parts.netloc)
+    headers = dict(headers or {})
+    if token:
+        headers["Authorization"] = f"{auth_scheme} {token}"
+    max_retries = MAX_RETRIES if max_retries is None else max_retries
+    idempotent = method in IDEMPOTENT_METHODS
+
+    attempt = 0
+    while True:
+        if rate_limit:
+            await rate_limit.acquire_async()
+        try:
+            async with session.request(method, url, headers=headers, **kwargs) as raw:
+                response = AsyncResponse(raw.status, raw.headers, str(raw.url), await raw.read(), raw.charset)
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+            if attempt >= max_retries or not (idempotent or isinstance(e, aiohttp.ClientConnectorError)):
+                raise
+            delay = retry_delay(None, attempt)
+            log.info("Request failed, retrying", method=method, host=parts.netloc, path=parts.path, error=repr(e), delay=round(delay, 2))
+        else:
+            retryable = response.status_code == 429 or (idempotent and response.status_code in RETRY_STATUS_CODES)
+            if not retryable or attempt >= max_retries:
+                return response
+            delay = retry_delay(response, attempt)
+            log.info("Retryable response, retrying", method=method, host=parts.netloc, path=parts.path, status_code=response.status_code, delay=round(delay, 2))
+            if rate_limit and response.status_code == 429:
+                rate_limit.pause(delay)
+                delay = 0
+
+        HTTP_RETRIES.inc(host=parts.netloc)
+        await asyncio.sleep(delay)
+        attempt += 1
+
+
+async def get(url, **kwargs):
+    return await request("GET", url, **kwargs)
+
+
+async def post(url, **kwargs):
+    return await request("POST", url, **kwargs)
@@ -0,0 +1,84 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from utils.shared_state import get_shared_state
+
+
+class DedupStore:
+    """
+    Remembers which events were already handled, shared by all workers through the shared state
+    backend (SQLite on one host, Redis across hosts; see utils/shared_state.py).
+    """
+
+    def __init__(self, state=None, ttl=None, max_memory_entries=None):
+        self.state = state or get_shared_state()
+        self.ttl = ttl if ttl is not None else float(os.getenv("DEDUP_TTL_SECONDS", "86400"))
+        self.max_memory_entries = max_memory_entries or int(os.getenv("DEDUP_MEMORY_ENTRIES", "10000"))
+
+        # Small LRU in front of the shared state so hot duplicates never leave the process
+        self._memory = OrderedDict()
+        self._memory_lock = threading.Lock()
+
+    @staticmethod
+    def _key(key):
+        return f"dedup:{key}"
+
+    def _remember(self, key, expires_at):
+        with self._memory_lock:
+            self._memory[key] = expires_at
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
+
+    def _seen_in_memory(self, key, now):
+        with self._memory_lock:
+            expires_at = self._memory.get(key)
+            if expires_at is None:
+                return False
+            if expires_at <= now:
+                del self._memory[key]
+                return False
+            self._memory.move_to_end(key)
+            return True
+
+    def seen(self, key):
+        """Return True if the key was claimed and has not expired yet."""
+        now = time.time()
+        if self._seen_in_memory(key, now):
+            return True
+        # A claimed key holds the time its claim expires
+        expires_at = self.state.get(self._key(key))
+        if expires_at is not None:
+            self._remember(key, float(expires_at))
+            return True
+        return False
+
+    def claim(self, *keys, releasable=()):
+        """
+        Atomically claim all keys and releasable keys; return False (claiming nothing) if any of them was
+        already seen. Releasable keys stay out of the in-process LRU, since another process may release them.
+        """
+        now = time.time()
+        if any(self._seen_in_memory(key, now) for key in keys):
+            return False
+
+        expires_at = now + self.ttl
+        shared_keys = [self._key(key) for key in (*keys, *releasable)]
+        if not self.state.claim(shared_keys, self.ttl, value=repr(expires_at)):
+            return False
+        for key in keys:
+            self._remember(key, expires_at)
+        return True
+
+    def release(self, *keys):
+        """Forget claimed keys, e.g. when the work could not be started and should be retried."""
+        with self._memory_lock:
+            for key in keys:
+                self._memory.pop(key, None)
+        self.state.release([self._key(key) for key in keys])
+
+    def purge_expired(self):
+        """Delete expired claims from the shared state."""
+        self.state.purge_expired()
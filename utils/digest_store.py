@@ -0,0 +1,105 @@
+import json
+import os
+import threading
+import time
+
+from utils.shared_state import connect_sqlite
+from utils.structured_logging import get_logger
+
+log = get_logger(__name__)
+
+
+class DigestStore:
+    """
+    Messages flagged for a channel's next digest, shared by all workers on a host via SQLite (WAL).
+    A channel's digest is due once its oldest pending message has waited for the channel's window.
+    Taken messages stay in the store until their digest was posted (done), so a failed or crashed
+    digest is offered again after retry_after seconds, up to max_attempts times.
+    """
+
+    def __init__(self, path=None, retry_after=None, max_attempts=None):
+        self.path = path or os.getenv("DIGEST_DB_PATH", "data/digests.sqlite3")
+        self.retry_after = retry_after if retry_after is not None else float(os.getenv("DIGEST_RETRY_AFTER", "300"))
+        self.max_attempts = max_attempts or int(os.getenv("DIGEST_MAX_ATTEMPTS", "3"))
+        # sqlite3 connections cannot be shared between threads
+        self._local = threading.local()
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS digest_items ("
+            "team_id TEXT NOT NULL, channel TEXT NOT NULL, message_ts TEXT NOT NULL, "
+            "message TEXT, added_at REAL NOT NULL, taken_at REAL, attempts INTEGER NOT NULL DEFAULT 0, "
+            "PRIMARY KEY (team_id, channel, message_ts))"
+        )
+        # Stores created before digests were retried lack the columns that track it
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(digest_items)")}
+        if "taken_at" not in columns:
+            conn.execute("ALTER TABLE digest_items ADD COLUMN taken_at REAL")
+            conn.execute("ALTER TABLE digest_items ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0")
+
+    def _connect(self):
+        return connect_sqlite(self._local, self.path)
+
+    def add(self, team_id, channel, message_ts, message=None):
+        """Flag a message for the channel's next digest; message is its buffered copy, if any."""
+        self._connect().execute(
+            "INSERT OR IGNORE INTO digest_items (team_id, channel, message_ts, message, added_at) VALUES (?, ?, ?, ?, ?)",
+            (team_id, channel, message_ts, json.dumps(message) if message is not None else None, time.time()),
+        )
+
+    def take_due(self, window_for):
+        """
+        Take and return ([(team_id, channel, items)], dropped) for every channel whose digest is due,
+        where window_for(channel) gives the channel's window in seconds and items are (message_ts,
+        message) in the order they were flagged. Only one worker gets each digest; it must call done()
+        once the digest is posted. Messages that failed max_attempts times are dropped and returned as
+        [(team_id, channel, message_ts)] in dropped.
+        """
+        now = time.time()
+        available = "(taken_at IS NULL OR taken_at <= ?)"
+        conn = self._connect()
+        # BEGIN IMMEDIATE takes the write lock up front, so two workers cannot take the same digest
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            exhausted = f"{available} AND attempts >= ?"
+            params = (now - self.retry_after, self.max_attempts)
+            dropped = conn.execute(f"SELECT team_id, channel, message_ts FROM digest_items WHERE {exhausted}", params).fetchall()
+            conn.execute(f"DELETE FROM digest_items WHERE {exhausted}", params)
+            due = []
+            channels = conn.execute(
+                f"SELECT team_id, channel, MIN(added_at) FROM digest_items WHERE {available} GROUP BY team_id, channel",
+                (now - self.retry_after,),
+            ).fetchall()
+            for team_id, channel, oldest in channels:
+                # A channel that is no longer in digest mode has its leftovers posted right away
+                window = window_for(channel)
+                if window is not None and now - oldest < window:
+                    continue
+                condition = f"team_id = ? AND channel = ? AND {available}"
+                params = (team_id, channel, now - self.retry_after)
+                rows = conn.execute(
+                    f"SELECT message_ts, message FROM digest_items WHERE {condition} ORDER BY added_at", params
+                ).fetchall()
+                conn.execute(f"UPDATE digest_items SET taken_at = ?, attempts = attempts + 1 WHERE {condition}", (now, *params))
+                due.append((team_id, channel, [(ts, json.loads(message) if message else None) for ts, message in rows]))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        if dropped:
+            log.warning("Dropped flagged messages whose digest kept failing", messages=len(dropped), attempts=self.max_attempts)
+        return due, dropped
+
+    def done(self, team_id, channel, items):
+        """Forget the items of a digest that was posted."""
+        self._connect().executemany(
+            "DELETE FROM digest_items WHERE team_id = ? AND channel = ? AND message_ts = ?",
+            [(team_id, channel, message_ts) for message_ts, _ in items],
+        )
+
+    def pending(self):
+        """Number of messages waiting for a digest."""
+        return self._connect().execute("SELECT COUNT(*) FROM digest_items").fetchone()[0]
@@ -0,0 +1,154 @@
+import os
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+from utils.metrics import HTTP_RETRIES
+from utils.structured_logging import get_logger
+
+log = get_logger(__name__)
+
+# Timeouts (seconds) applied to every upstream call unless overridden
+CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3.05"))
+READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "30"))
+MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", "0.5"))
+BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", "30"))
+POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "20"))
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+# One keep-alive session per upstream host, shared by all integrations
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+# Discord rate-limit buckets: route -> bucket id, bucket id -> time it resets
+_discord_routes = {}
+_discord_bucket_resets = {}
+_discord_lock = threading.Lock()
+
+
+def get_session(host):
+    """Return the pooled session for a host, creating it on first use."""
+    with _sessions_lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _sessions[host] = session
+        return session
+
+
+def retry_delay(response, attempt):
+    """Seconds to wait before retrying, preferring the server's own hints over jittered backoff."""
+    if response is not None:
+        # Slack (and most APIs) send Retry-After in seconds on 429; Discord sends the remaining
+        # bucket window with sub-second precision. Both are capped so a bad header can't park a worker.
+        for header in ("Retry-After", "X-RateLimit-Reset-After"):
+            value = response.headers.get(header)
+            if value:
+                try:
+                    return min(BACKOFF_MAX, max(0.0, float(value)))
+                except ValueError:
+                    pass
+    # Full jitter exponential backoff
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+
+def _wait_for_discord_bucket(route):
+    with _discord_lock:
+        bucket = _discord_routes.get(route)
+        reset_at = _discord_bucket_resets.get(bucket, 0) if bucket else 0
+    delay = reset_at - time.monotonic()
+    if delay > 0:
+        log.info("Discord bucket exhausted, waiting", bucket=bucket, delay=round(delay, 2))
+        time.sleep(delay)
+
+
+def _track_discord_bucket(route, response):
+    bucket = response.headers.get("X-RateLimit-Bucket")
+    if not bucket:
+        return
+    with _discord_lock:
+        _discord_routes[route] = bucket
+        if response.headers.get("X-RateLimit-Remaining") == "0":
+            reset_after = float(response.headers.get("X-RateLimit-Reset-After", "0"))
+            _discord_bucket_resets[bucket] = time.monotonic() + reset_after
+        else:
+            _discord_bucket_resets.pop(bucket, None)
+
+
+def _never_connected(error):
+    """True when the request failed before a connection was made, so the server never saw it."""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    # requests wraps urllib3's MaxRetryError, whose reason is the underlying connect failure
+    reason = error.args[0] if error.args else None
+    reason = getattr(reason, "reason", reason)
+    return isinstance(reason, NewConnectionError)
+
+
+def request(method, url, token=None, auth_scheme="Bearer", headers=None, timeout=None, max_retries=None, rate_limit=None, **kwargs):
+    """
+    Send a request over the pooled session for the URL's host, retrying 429/5xx and connection errors.
+    With a rate_limit (see utils.rate_limiter), every attempt first waits for its tokens, and a 429
+    pauses those buckets for everyone instead of only this caller.
+    """
+    parts = urlsplit(url)
+    session = get_session(parts.netloc)
+    headers = dict(headers or {})
+    if token:
+        # Per-workspace auth header injection (Slack uses "Bearer", Discord uses "Bot")
+        headers["Authorization"] = f"{auth_scheme} {token}"
+    timeout = timeout or (CONNECT_TIMEOUT, READ_TIMEOUT)
+    max_retries = MAX_RETRIES if max_retries is None else max_retries
+    route = (method, parts.netloc, parts.path)
+    # A POST that may have reached the server (5xx, read timeout, dropped connection) is not retried,
+    # to avoid double posts; only failures to connect at all are safe to resend
+    idempotent = method in IDEMPOTENT_METHODS
+
+    attempt = 0
+    while True:
+        _wait_for_discord_bucket(route)
+        if rate_limit:
+            rate_limit.acquire()
+        try:
+            response = session.request(method, url, headers=headers, timeout=timeout, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            retryable = idempotent or _never_connected(e)
+            if attempt >= max_retries or not retryable:
+                raise
+            delay = retry_delay(None, attempt)
+            log.info("Request failed, retrying", method=method, host=parts.netloc, path=parts.path, error=repr(e), delay=round(delay, 2))
+        else:
+            _track_discord_bucket(route, response)
+            retryable = response.status_code == 429 or (idempotent and response.status_code in RETRY_STATUS_CODES)
+            if not retryable or attempt >= max_retries:
+                return response
+            delay = retry_delay(response, attempt)
+            log.info("Retryable response, retrying", method=method, host=parts.netloc, path=parts.path, status_code=response.status_code, delay=round(delay, 2))
+            # A streamed response holds its connection until closed
+            response.close()
+            if rate_limit and response.status_code == 429:
+                # The next acquire waits out the pause
+                rate_limit.pause(delay)
+                delay = 0
+
+        HTTP_RETRIES.inc(host=parts.netloc)
+        time.sleep(delay)
+        attempt += 1
+
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request("POST", url, **kwargs)
@@ -0,0 +1,164 @@
+import asyncio
+import atexit
+import os
+import threading
+from collections import namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor
+from utils.structured_logging import get_logger
+
+log = get_logger(__name__)
+
+# A unit of background work, e.g. Job("summarize_reaction", {"team_id": ..., ...})
+Job = namedtuple("Job", ["kind", "payload"])
+
+# Handlers are looked up by job kind inside the worker, so only the (picklable)
+# Job itself has to cross into a process pool.
+_handlers = {}
+# Coroutine handlers used by the asyncio/ASGI pipeline
+_async_handlers = {}
+
+
+class QueueFullError(Exception):
+    """Raised when a job cannot be enqueued because the queue is full or shutting down."""
+
+
+def register_handler(kind, handler):
+    """Register the callable that runs jobs of the given kind."""
+    _handlers[kind] = handler
+
+
+def register_async_handler(kind, handler):
+    """Register the coroutine function that runs jobs of the given kind on an event loop."""
+    _async_handlers[kind] = handler
+
+
+def run_job(job):
+    """Run a job with its registered handler (executed on a pool worker)."""
+    handler = _handlers.get(job.kind)
+    if handler is None:
+        raise ValueError(f"No handler registered for job kind: {job.kind}")
+    return handler(job.payload)
+
+
+class JobQueue:
+    def __init__(self, workers=None, max_queue_size=None, mode=None, submit_timeout=None, initializer=None):
+        # Load pool settings from the environment unless given explicitly
+        self.workers = workers or int(os.getenv("JOB_WORKERS", "4"))
+        self.max_queue_size = max_queue_size if max_queue_size is not None else int(os.getenv("JOB_QUEUE_SIZE", "100"))
+        self.mode = mode or os.getenv("JOB_POOL_MODE", "thread")
+        self.submit_timeout = submit_timeout if submit_timeout is not None else float(os.getenv("JOB_SUBMIT_TIMEOUT", "0.5"))
+
+        # One slot per running or waiting job; this is what bounds the queue depth
+        self._slots = threading.BoundedSemaphore(self.workers + self.max_queue_size)
+        self._accepting = True
+        self._executor = self.create_executor(initializer)
+
+        # Drain outstanding jobs when the interpreter exits
+        atexit.register(self.shutdown)
+
+    def create_executor(self, initializer):
+        """Create the thread or process pool that drains the queue."""
+        if self.mode == "thread":
+            # Threads share this process's handler registry, so no initializer is needed
+            return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="job-worker")
+        elif self.mode == "process":
+            # Worker processes must register their own handlers via the initializer
+            return ProcessPoolExecutor(max_workers=self.workers, initializer=initializer)
+        raise ValueError(f"Unsupported JOB_POOL_MODE: {self.mode}")
+
+    def submit(self, kind, payload):
+        """Enqueue a job, waiting at most submit_timeout seconds for a free slot."""
+        if not self._accepting:
+            raise QueueFullError("Job queue is shutting down.")
+
+        # Backpressure: refuse new work instead of letting the backlog grow without bound
+        if not self._slots.acquire(timeout=self.submit_timeout):
+            raise QueueFullError(f"Job queue is full ({self.workers} running, {self.max_queue_size} waiting).")
+
+        try:
+            future = self._executor.submit(run_job, Job(kind, payload))
+        except Exception:
+            self._slots.release()
+            raise
+
+        future.add_done_callback(self._on_job_done)
+        return future
+
+    def _on_job_done(self, future):
+        self._slots.release()
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            log.error("Background job failed", exc_info=error)
+
+    def shutdown(self, wait=True):
+        """Stop accepting jobs and, if wait is set, block until queued jobs have finished."""
+        if not self._accepting:
+            return
+        self._accepting = False
+        log.info("Draining job queue")
+        self._executor.shutdown(wait=wait)
+
+
+class AsyncJobQueue:
+    """Runs jobs as tasks on the running event loop, with the same submit contract as JobQueue."""
+
+    def __init__(self, max_in_flight=None):
+        self.max_in_flight = max_in_flight or int(os.getenv("ASYNC_MAX_IN_FLIGHT", "500"))
+        self._tasks = set()
+        self._accepting = True
+        self._loop = None
+
+    def bind(self, loop):
+        """Run jobs on loop, so submit also works from threads (e.g. code run with asyncio.to_thread)."""
+        self._loop = loop
+
+    def submit(self, kind, payload):
+        """Schedule a job on the running loop; from any other thread, on the bound loop once it has taken it."""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            if self._loop is None:
+                raise RuntimeError("AsyncJobQueue.submit called off the event loop before bind()")
+            scheduled = Future()
+
+            def schedule():
+                try:
+                    scheduled.set_result(self._schedule(kind, payload))
+                except Exception as e:
+                    scheduled.set_exception(e)
+
+            self._loop.call_soon_threadsafe(schedule)
+            return scheduled.result()
+        return self._schedule(kind, payload)
+
+    def _schedule(self, kind, payload):
+        if not self._accepting:
+            raise QueueFullError("Job queue is shutting down.")
+        if len(self._tasks) >= self.max_in_flight:
+            raise QueueFullError(f"Too many jobs in flight ({len(self._tasks)}).")
+
+        handler = _async_handlers.get(kind)
+        if handler is None:
+            raise ValueError(f"No async handler registered for job kind: {kind}")
+
+        task = asyncio.get_running_loop().create_task(handler(payload))
+        self._tasks.add(task)
+        task.add_done_callback(self._on_job_done)
+        return task
+
+    def _on_job_done(self, task):
+        self._tasks.discard(task)
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            log.error("Background job failed", exc_info=error)
+
+    async def shutdown(self, timeout=None):
+        """Stop accepting jobs and wait (up to timeout seconds) for in-flight jobs to finish."""
+        self._accepting = False
+        if self._tasks:
+            log.info("Draining in-flight jobs", jobs=len(self._tasks))
+            await asyncio.wait(set(self._tasks), timeout=timeout)
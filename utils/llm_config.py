@@ -1,16 +1,50 @@
 import os
 
-def get_llm_config():
-    llm_provider = os.getenv("LLM_PROVIDER", "openai")  # Default to OpenAI if not set
+def get_backend_config(llm_provider, model=None):
+    """Configuration of one provider; model overrides OPENAI_MODEL / GPT4ALL_MODEL_PATH."""
     if llm_provider == "openai":
         api_key = os.getenv("OPENAI_API_KEY")
         if not api_key:
             raise ValueError("Missing OPENAI_API_KEY in .env")
-        return {"provider": "openai", "api_key": api_key}
+        model = model or os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+        return {"provider": "openai", "api_key": api_key, "model": model}
     elif llm_provider == "gpt4all":
-        model_path = os.getenv("GPT4ALL_MODEL_PATH")
+        model_path = model or os.getenv("GPT4ALL_MODEL_PATH")
         if not model_path:
             raise ValueError("Missing GPT4ALL_MODEL_PATH in .env")
-        return {"provider": "gpt4all", "model_path": model_path}
+        return {"provider": "gpt4all", "model_path": model_path, "model": os.path.basename(model_path)}
     else:
         raise ValueError(f"Unsupported LLM provider: {llm_provider}")
+
+def get_llm_config():
+    return get_backend_config(os.getenv("LLM_PROVIDER", "openai"))  # Default to OpenAI if not set
+
+def get_route_configs():
+    """
+    The LLM routes in order of preference, from LLM_ROUTES, e.g.
+    "gpt4all@1500,openai:gpt-4o-mini@12000,openai:gpt-4o": provider, optional model (or model
+    path), and optionally the largest prompt in tokens the route should get. Without LLM_ROUTES,
+    LLM_PROVIDER is the only route.
+    """
+    timeout = float(os.getenv("LLM_TIMEOUT", "60"))
+    routes_str = os.getenv("LLM_ROUTES")
+    if not routes_str:
+        return [{**get_llm_config(), "max_tokens": None, "timeout": timeout}]
+
+    routes = []
+    for entry in filter(None, (entry.strip() for entry in routes_str.split(","))):
+        spec, _, max_tokens = entry.partition("@")
+        llm_provider, _, model = spec.partition(":")
+        config = get_backend_config(llm_provider, model or None)
+        routes.append({**config, "max_tokens": int(max_tokens) if max_tokens else None, "timeout": timeout})
+    # The process keeps a single pool of resident local models (see processors/gpt4all_backend.py)
+    if len({route["model_path"] for route in routes if route["provider"] == "gpt4all"}) > 1:
+        raise ValueError("LLM_ROUTES can use only one GPT4All model")
+    return routes
+
+def route_providers():
+    """Providers named in LLM_ROUTES (or LLM_PROVIDER), without validating their settings."""
+    routes_str = os.getenv("LLM_ROUTES")
+    if not routes_str:
+        return [os.getenv("LLM_PROVIDER", "openai")]
+    return sorted({entry.strip().partition("@")[0].partition(":")[0] for entry in routes_str.split(",") if entry.strip()})
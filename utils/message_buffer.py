@@ -0,0 +1,69 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Rough per-entry overhead (key, dict, bookkeeping) counted on top of the text itself
+ENTRY_OVERHEAD_BYTES = 200
+
+
+class MessageBuffer:
+    """
+    Recently seen chat messages kept in arrival order, keyed by (team, channel, ts). The oldest
+    messages fall out once the total size passes max_bytes or they are older than ttl seconds,
+    so a reaction on a recent message can be served without asking the platform for it again.
+    """
+
+    def __init__(self, max_bytes=None, ttl=None):
+        self.max_bytes = max_bytes or int(os.getenv("MESSAGE_BUFFER_MAX_BYTES", str(8 * 1024 * 1024)))
+        self.ttl = ttl if ttl is not None else float(os.getenv("MESSAGE_BUFFER_TTL", "21600"))
+        self.hits = 0
+        self.misses = 0
+        self.bytes = 0
+        # key -> (message, size, recorded_at); oldest first
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, team_id, channel, message):
+        """Store a message (a dict with at least ts and text), replacing an earlier version of it."""
+        key = (team_id, channel, message["ts"])
+        size = len(message.get("text", "").encode("utf-8")) + ENTRY_OVERHEAD_BYTES
+        now = time.monotonic()
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous[1]
+            self._entries[key] = (message, size, now)
+            self.bytes += size
+            self._expire(now)
+
+    def get(self, team_id, channel, ts):
+        """Return the buffered message, or None if it was never seen or has been evicted."""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            entry = self._entries.get((team_id, channel, ts))
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[0]
+
+    def remove(self, team_id, channel, ts):
+        with self._lock:
+            entry = self._entries.pop((team_id, channel, ts), None)
+            if entry is not None:
+                self.bytes -= entry[1]
+
+    def _expire(self, now):
+        # Entries are in arrival order, so both limits only ever trim from the front
+        while self._entries:
+            key, (_, size, recorded_at) = next(iter(self._entries.items()))
+            if self.bytes <= self.max_bytes and now - recorded_at < self.ttl:
+                break
+            del self._entries[key]
+            self.bytes -= size
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries), "bytes": self.bytes}
@@ -0,0 +1,167 @@
+import contextvars
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+# Lightweight in-process metrics with Prometheus text exposition. Values are per process,
+# so with several workers each one reports its own series.
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+# Stages slower than this are logged with their trace id
+SLOW_STAGE_SECONDS = float(os.getenv("METRICS_SLOW_STAGE_SECONDS", "5"))
+
+_metrics = {}
+_metrics_lock = threading.Lock()
+# Callables returning extra samples, e.g. hit/miss counters kept by caches themselves
+_collectors = []
+
+# Trace id of the request (or job) currently being handled
+_trace_id = contextvars.ContextVar("trace_id", default=None)
+
+# Plain stdlib logger: utils.structured_logging builds on this module
+log = logging.getLogger(__name__)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+class Counter:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(labels)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            counts, total, count = self._values.get(key, ([0] * len(self.buckets), 0.0, 0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            # The +Inf bucket equals the sample count
+            self._values[key] = (counts, total + value, count + 1)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, (counts, total, count) in sorted(self._values.items()):
+                for bound, bucket_count in zip(self.buckets, counts):
+                    lines.append(f"{self.name}_bucket{_format_labels(labels + (('le', bound),))} {bucket_count}")
+                lines.append(f"{self.name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {count}")
+                lines.append(f"{self.name}_sum{_format_labels(labels)} {total}")
+                lines.append(f"{self.name}_count{_format_labels(labels)} {count}")
+        return lines
+
+
+def counter(name, help_text):
+    """Return the counter with this name, creating it on first use."""
+    with _metrics_lock:
+        if name not in _metrics:
+            _metrics[name] = Counter(name, help_text)
+        return _metrics[name]
+
+
+def histogram(name, help_text, buckets=DEFAULT_BUCKETS):
+    """Return the histogram with this name, creating it on first use."""
+    with _metrics_lock:
+        if name not in _metrics:
+            _metrics[name] = Histogram(name, help_text, buckets)
+        return _metrics[name]
+
+
+def register_collector(collector):
+    """
+    Register a callable returning [(name, help, type, labels dict, value), ...] at scrape time.
+    Registering a function with the same qualified name again (e.g. after a module is re-imported)
+    replaces the earlier one, so its series are never emitted twice.
+    """
+    name = (collector.__module__, collector.__qualname__)
+    _collectors[:] = [c for c in _collectors if (c.__module__, c.__qualname__) != name]
+    _collectors.append(collector)
+
+
+# Metrics shared across the pipeline
+STAGE_SECONDS = histogram("bridge_stage_duration_seconds", "Time spent in each pipeline stage.")
+STAGE_ERRORS = counter("bridge_stage_errors_total", "Pipeline stages that raised an exception.")
+CACHE_REQUESTS = counter("bridge_cache_requests_total", "Cache lookups by cache and result (hit/miss).")
+DEDUP_DROPS = counter("bridge_dedup_drops_total", "Events dropped because they were already processed.")
+HTTP_RETRIES = counter("bridge_http_retries_total", "Upstream HTTP requests that were retried.")
+ERRORS = counter("bridge_errors_total", "Errors by kind.")
+
+
+def new_trace_id(trace_id=None):
+    """Start a trace for the current request or job, reusing trace_id if one is given."""
+    trace_id = trace_id or uuid.uuid4().hex[:16]
+    _trace_id.set(trace_id)
+    return trace_id
+
+
+def get_trace_id():
+    return _trace_id.get()
+
+
+@contextmanager
+def span(stage, **labels):
+    """Time a pipeline stage and count it as an error if it raises."""
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.inc(stage=stage, **labels)
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.observe(elapsed, stage=stage, **labels)
+        if elapsed >= SLOW_STAGE_SECONDS:
+            log.warning("Slow stage %s %s took %.3fs", stage, labels or "", elapsed)
+
+
+def render_prometheus():
+    """Render every metric in the Prometheus text exposition format."""
+    lines = []
+    with _metrics_lock:
+        metrics = list(_metrics.values())
+    for metric in metrics:
+        lines.extend(metric.render())
+
+    seen = set()
+    for collector in list(_collectors):
+        for name, help_text, metric_type, labels, value in collector():
+            if name not in seen:
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                seen.add(name)
+            lines.append(f"{name}{_format_labels(tuple(sorted(labels.items())))} {value}")
+    return "\n".join(lines) + "\n"
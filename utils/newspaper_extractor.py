@@ -0,0 +1,16 @@
+from newspaper import Article
+
+# newspaper3k article extraction, imported the first time a page has to be parsed
+
+
+def extract(url, html):
+    article = Article(url)
+    article.download(input_html=html)
+    article.parse()
+    return {
+        "title": article.title,
+        "text": article.text,
+        "authors": article.authors,
+        "publish_date": article.publish_date.isoformat() if article.publish_date else None,
+        "top_image": article.top_image,
+    }
@@ -0,0 +1,83 @@
+import importlib
+import os
+import threading
+
+from utils.llm_config import route_providers
+
+# Registries of the swappable parts of the pipeline. Entries are "module" or "module:attribute"
+# strings, so nothing is imported until a plugin is first used; a request that is rejected
+# early (403, url_verification) never pays for openai, newspaper or a local model runtime.
+
+
+class PluginRegistry:
+    def __init__(self, kind, specs=None):
+        self.kind = kind
+        self._specs = dict(specs or {})
+        self._loaded = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, spec):
+        """Add or replace a plugin, e.g. register("mistral", "processors.mistral_backend")."""
+        with self._lock:
+            self._specs[name] = spec
+            self._loaded.pop(name, None)
+
+    def names(self):
+        return sorted(self._specs)
+
+    def resolve(self, name):
+        """Import the named plugin on first use and return it (a module or the attribute after ':')."""
+        plugin = self._loaded.get(name)
+        if plugin is not None:
+            return plugin
+
+        with self._lock:
+            if name not in self._loaded:
+                spec = self._specs.get(name)
+                if spec is None:
+                    raise ValueError(f"Unsupported {self.kind}: {name}")
+                module_name, _, attribute = spec.partition(":")
+                module = importlib.import_module(module_name)
+                self._loaded[name] = getattr(module, attribute) if attribute else module
+            return self._loaded[name]
+
+    def loaded(self, name):
+        """The plugin if it has already been imported, else None (never triggers an import)."""
+        return self._loaded.get(name)
+
+
+# LLM backends: modules with generate(prompt, config), generate_async(prompt, config) and stream(prompt, config)
+LLM_BACKENDS = PluginRegistry("LLM provider", {
+    "openai": "processors.openai_backend",
+    "gpt4all": "processors.gpt4all_backend",
+})
+
+# Article extractors: modules with extract(url, html) returning title, text, authors, publish_date, top_image
+EXTRACTORS = PluginRegistry("article extractor", {
+    "lxml": "utils.lxml_extractor",
+    "newspaper": "utils.newspaper_extractor",
+})
+
+# Chat platforms: PlatformIntegration subclasses
+PLATFORMS = PluginRegistry("platform", {
+    "slack": "integrations.slack_integration:SlackIntegration",
+    "discord": "integrations.discord_integration:DiscordIntegration",
+})
+
+# Shared state backends: classes with claim, release, get, set, incr and delete (see utils/shared_state.py)
+STATE_BACKENDS = PluginRegistry("shared state backend", {
+    "sqlite": "utils.shared_state:SQLiteState",
+    "redis": "utils.redis_state:RedisState",
+})
+
+
+def preload_plugins():
+    """
+    Import the configured platform, LLM backend and extractor now. Meant for fork-based servers
+    (gunicorn --preload, process job workers): the parent pays the import cost once and the
+    forked workers share those pages instead of each importing on its first request.
+    """
+    PLATFORMS.resolve(os.getenv("PLATFORM", "slack"))
+    for provider in route_providers():
+        LLM_BACKENDS.resolve(provider)
+    EXTRACTORS.resolve(os.getenv("ARTICLE_EXTRACTOR", "lxml"))
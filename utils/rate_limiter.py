@@ -0,0 +1,288 @@
+import asyncio
+import contextvars
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from utils.metrics import histogram
+from utils.shared_state import get_shared_state
+from utils.structured_logging import get_logger
+
+log = get_logger(__name__)
+
+# Client-side token buckets for the upstream APIs, so the bridge stays just under Slack's and the
+# LLM provider's limits instead of running into 429s and retry storms. Callers wait for a token
+# before each attempt; a 429 that slips through pauses the bucket for the server's Retry-After.
+
+# Priority lanes: while an interactive caller (someone reacted and is waiting) is queued on a
+# bucket, bulk work (digests, backfills) on the same bucket holds back.
+INTERACTIVE = 0
+BULK = 1
+LANE_NAMES = {INTERACTIVE: "interactive", BULK: "bulk"}
+
+# Longest a caller waits for a token before giving up
+MAX_WAIT = float(os.getenv("RATE_LIMIT_MAX_WAIT", "120"))
+
+# Slack Web API tiers (requests per minute, per method and workspace) and the tier of each method used
+SLACK_TIER_LIMITS = {
+    "tier1": float(os.getenv("SLACK_TIER1_PER_MINUTE", "1")),
+    "tier2": float(os.getenv("SLACK_TIER2_PER_MINUTE", "20")),
+    "tier3": float(os.getenv("SLACK_TIER3_PER_MINUTE", "50")),
+    "tier4": float(os.getenv("SLACK_TIER4_PER_MINUTE", "100")),
+}
+SLACK_METHOD_TIERS = {
+    "auth.test": "tier4",
+    "conversations.info": "tier3",
+    "conversations.history": "tier3",
+    "chat.update": "tier3",
+    "chat.getPermalink": "tier4",
+    "chat.postMessage": "tier4",
+}
+# chat.postMessage is additionally limited to about one message per second per channel
+SLACK_CHANNEL_POSTS_PER_SECOND = float(os.getenv("SLACK_CHANNEL_POSTS_PER_SECOND", "1"))
+SLACK_CHANNEL_POST_BURST = float(os.getenv("SLACK_CHANNEL_POST_BURST", "3"))
+
+# With several worker processes or hosts, each one's buckets would allow the full rate on their own.
+# SHARED_RATE_LIMITS also counts every call in the shared state (see utils/shared_state.py), in
+# fixed windows of SHARED_RATE_LIMIT_WINDOW seconds, so the sum over all workers stays under the limit.
+SHARED_RATE_LIMITS = os.getenv("SHARED_RATE_LIMITS", "False").lower() == "true"
+SHARED_RATE_LIMIT_WINDOW = float(os.getenv("SHARED_RATE_LIMIT_WINDOW", "10"))
+# Waiters retry at a random point in the first part of the next window instead of all at its start
+SHARED_RATE_LIMIT_JITTER = 0.25
+
+RATE_LIMIT_WAIT = histogram("bridge_rate_limit_wait_seconds", "Time spent waiting for an outbound rate-limit token.")
+
+_lane = contextvars.ContextVar("rate_limit_lane", default=INTERACTIVE)
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+class RateLimitTimeout(Exception):
+    """Raised when no token became available within the maximum wait."""
+
+
+class TokenBucket:
+    """Refills at rate tokens per second up to capacity; a caller may take more than is left and go into debt."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        # Set from a server's Retry-After; nothing is granted before then
+        self.blocked_until = 0.0
+        self.waiting = {INTERACTIVE: 0, BULK: 0}
+        self.condition = threading.Condition()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def _try_take(self, amount, lane):
+        """Take amount tokens if allowed now; otherwise return how long to wait before trying again."""
+        now = time.monotonic()
+        self._refill(now)
+        if any(count for other, count in self.waiting.items() if other < lane):
+            # A higher-priority caller is queued; check back once it has had a chance to go
+            return 0.05
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        # Requests bigger than the whole bucket only need a full bucket, then leave it in debt
+        needed = min(amount, self.capacity)
+        if self.tokens >= needed:
+            self.tokens -= amount
+            return 0.0
+        return (needed - self.tokens) / self.rate
+
+    def acquire(self, amount=1, lane=INTERACTIVE, timeout=MAX_WAIT):
+        """Block until amount tokens are granted; returns the seconds waited."""
+        started = time.monotonic()
+        with self.condition:
+            self.waiting[lane] += 1
+            try:
+                while True:
+                    wait = self._try_take(amount, lane)
+                    if wait == 0:
+                        return time.monotonic() - started
+                    if time.monotonic() + wait - started > timeout:
+                        raise RateLimitTimeout(f"No rate-limit token within {timeout}s")
+                    self.condition.wait(wait)
+            finally:
+                self.waiting[lane] -= 1
+                self.condition.notify_all()
+
+    async def acquire_async(self, amount=1, lane=INTERACTIVE, timeout=MAX_WAIT):
+        """Like acquire, but sleeps on the event loop instead of blocking the thread."""
+        started = time.monotonic()
+        with self.condition:
+            self.waiting[lane] += 1
+        try:
+            while True:
+                with self.condition:
+                    wait = self._try_take(amount, lane)
+                if wait == 0:
+                    return time.monotonic() - started
+                if time.monotonic() + wait - started > timeout:
+                    raise RateLimitTimeout(f"No rate-limit token within {timeout}s")
+                await asyncio.sleep(wait)
+        finally:
+            with self.condition:
+                self.waiting[lane] -= 1
+                self.condition.notify_all()
+
+    def pause(self, seconds):
+        """Hold every caller back for seconds, e.g. after a 429 with Retry-After."""
+        with self.condition:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+class SharedWindow:
+    """
+    At most rate * window units per window seconds over all workers, counted in the shared state.
+    Each worker's own bucket smooths its calls; this caps their sum. Priority lanes and pauses after
+    a 429 stay per worker (the local buckets of the same RateLimit handle them).
+    """
+
+    def __init__(self, key, rate, window=SHARED_RATE_LIMIT_WINDOW):
+        self.key = ":".join(str(part) for part in key)
+        self.limit = rate * window
+        self.window = window
+        self.blocked_until = 0.0
+
+    def _try_take(self, amount):
+        """Count amount in the current window if it fits; otherwise return how long until the next window."""
+        now = time.time()
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        window_id = int(now // self.window)
+        try:
+            total = get_shared_state().incr(f"rate:{self.key}:{window_id}", amount, self.window * 2)
+        except Exception as e:
+            # Without the shared state the local buckets alone have to do
+            log.warning("Shared rate limit unavailable", key=self.key, error=repr(e))
+            return 0.0
+        # Requests bigger than a whole window go through as the first of a window
+        if total <= self.limit or total == amount:
+            return 0.0
+        # Give back what didn't fit, so rejected attempts don't use up the window for everyone else
+        try:
+            get_shared_state().incr(f"rate:{self.key}:{window_id}", -amount, self.window * 2)
+        except Exception as e:
+            log.warning("Shared rate limit unavailable", key=self.key, error=repr(e))
+        return (window_id + 1) * self.window - now + random.uniform(0, self.window * SHARED_RATE_LIMIT_JITTER)
+
+    def acquire(self, amount=1, lane=INTERACTIVE, timeout=MAX_WAIT):
+        """Block until amount fits in a window; returns the seconds waited."""
+        started = time.monotonic()
+        while True:
+            wait = self._try_take(amount)
+            if wait == 0:
+                return time.monotonic() - started
+            if time.monotonic() + wait - started > timeout:
+                raise RateLimitTimeout(f"No shared rate-limit capacity within {timeout}s")
+            time.sleep(wait)
+
+    async def acquire_async(self, amount=1, lane=INTERACTIVE, timeout=MAX_WAIT):
+        started = time.monotonic()
+        while True:
+            wait = await asyncio.to_thread(self._try_take, amount)
+            if wait == 0:
+                return time.monotonic() - started
+            if time.monotonic() + wait - started > timeout:
+                raise RateLimitTimeout(f"No shared rate-limit capacity within {timeout}s")
+            await asyncio.sleep(wait)
+
+    def pause(self, seconds):
+        self.blocked_until = max(self.blocked_until, time.time() + seconds)
+
+
+def get_bucket(key, rate, capacity):
+    """Return the shared bucket for key, creating it with rate/capacity on first use."""
+    with _buckets_lock:
+        bucket = _buckets.get(key)
+        if bucket is None:
+            bucket = _buckets[key] = TokenBucket(rate, capacity)
+        return bucket
+
+
+def get_shared_window(key, rate):
+    with _buckets_lock:
+        window = _buckets.get(("shared",) + key)
+        if window is None:
+            window = _buckets[("shared",) + key] = SharedWindow(key, rate)
+        return window
+
+
+def limits(key, rate, capacity, amount):
+    """Requirements for one limit: this worker's bucket for key, plus the shared window with SHARED_RATE_LIMITS."""
+    requirements = [(get_bucket(key, rate, capacity), amount)]
+    if SHARED_RATE_LIMITS:
+        requirements.append((get_shared_window(key, rate), amount))
+    return requirements
+
+
+def current_lane():
+    return _lane.get()
+
+
+@contextmanager
+def lane(priority):
+    """Run the enclosed calls (and tasks/threads started with a copy of this context) in a priority lane."""
+    token = _lane.set(priority)
+    try:
+        yield
+    finally:
+        _lane.reset(token)
+
+
+class RateLimit:
+    """The buckets (and token amounts) one upstream call has to clear before it is sent."""
+
+    def __init__(self, scope, requirements):
+        self.scope = scope
+        self.requirements = requirements
+
+    def acquire(self):
+        priority = current_lane()
+        waited = sum(bucket.acquire(amount, priority) for bucket, amount in self.requirements)
+        RATE_LIMIT_WAIT.observe(waited, scope=self.scope, lane=LANE_NAMES[priority])
+
+    async def acquire_async(self):
+        priority = current_lane()
+        waited = 0.0
+        for bucket, amount in self.requirements:
+            waited += await bucket.acquire_async(amount, priority)
+        RATE_LIMIT_WAIT.observe(waited, scope=self.scope, lane=LANE_NAMES[priority])
+
+    def pause(self, seconds):
+        for bucket, _ in self.requirements:
+            bucket.pause(seconds)
+
+
+def slack_rate_limit(team_id, api_method, channel=None):
+    """Buckets for one Slack Web API call: the method's tier for the workspace, plus the channel for posts."""
+    per_minute = SLACK_TIER_LIMITS[SLACK_METHOD_TIERS.get(api_method, "tier3")]
+    # Slack allows short bursts above the per-minute rate, so let a few calls through at once
+    requirements = limits(("slack", team_id, api_method), per_minute / 60, max(1.0, per_minute / 10), 1)
+    if api_method == "chat.postMessage" and channel:
+        requirements += limits(("slack_channel", team_id, channel), SLACK_CHANNEL_POSTS_PER_SECOND, SLACK_CHANNEL_POST_BURST, 1)
+    return RateLimit("slack", requirements)
+
+
+def llm_rate_limit(provider, tokens):
+    """
+    Buckets for one LLM call: requests and tokens per minute for the provider, from e.g.
+    OPENAI_RPM / OPENAI_TPM. Returns None for providers without configured limits (local models).
+    """
+    prefix = provider.upper()
+    rpm = float(os.getenv(f"{prefix}_RPM", "500" if provider == "openai" else "0"))
+    tpm = float(os.getenv(f"{prefix}_TPM", "200000" if provider == "openai" else "0"))
+    requirements = []
+    if rpm > 0:
+        requirements += limits(("llm_requests", provider), rpm / 60, max(1.0, rpm / 10), 1)
+    if tpm > 0:
+        requirements += limits(("llm_tokens", provider), tpm / 60, tpm / 10, tokens)
+    return RateLimit("llm", requirements) if requirements else None
@@ -0,0 +1,176 @@
+import os
+import socket
+import threading
+from urllib.parse import unquote, urlsplit
+
+# Shared state on a Redis server (or anything speaking its protocol, e.g. Valkey, KeyDB, or
+# benchmarks/fake_redis.py), so workers on several hosts share claims, caches and rate-limit
+# counters. A small RESP client over plain sockets: only a handful of commands are needed, and
+# it keeps a Redis client library out of the dependencies.
+
+
+# Claims several keys in one server-side step: nothing is set if any key exists, else all of them
+# are, so two workers claiming overlapping keys can't each win one and both give up
+CLAIM_SCRIPT = """
+for _, key in ipairs(KEYS) do
+    if redis.call('EXISTS', key) == 1 then
+        return 0
+    end
+end
+for _, key in ipairs(KEYS) do
+    redis.call('SET', key, ARGV[1], 'PX', ARGV[2])
+end
+return 1
+"""
+
+
+# Commands that do the same thing when run twice; only these are re-sent after a reply was lost,
+# since the server may already have run them (SET with NX is not among them)
+IDEMPOTENT_COMMANDS = {"GET", "SET", "DEL", "EXISTS", "PEXPIRE", "PTTL", "PING"}
+
+
+def idempotent(command):
+    return str(command[0]).upper() in IDEMPOTENT_COMMANDS and "NX" not in (str(part).upper() for part in command[1:])
+
+
+class RedisError(Exception):
+    """An error reply from the server."""
+
+
+class RedisState:
+    """Shared state for workers on any number of hosts, on a Redis-protocol server."""
+
+    remote = True
+
+    def __init__(self, url=None, timeout=None, key_prefix=None):
+        parts = urlsplit(url or os.getenv("SHARED_STATE_URL", "redis://127.0.0.1:6379/0"))
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port or 6379
+        self.password = unquote(parts.password) if parts.password else None
+        self.username = unquote(parts.username) if parts.username else None
+        self.db = int(parts.path.lstrip("/") or 0)
+        self.timeout = timeout if timeout is not None else float(os.getenv("SHARED_STATE_TIMEOUT", "2"))
+        # Lets several deployments share one server without seeing each other's keys
+        self.key_prefix = key_prefix if key_prefix is not None else os.getenv("SHARED_STATE_KEY_PREFIX", "bridge:")
+        # One connection per thread, like the SQLite stores; the pid check drops connections inherited through fork
+        self._local = threading.local()
+
+    def _connect(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is not None and connection[0] == os.getpid():
+            return connection[1], connection[2]
+
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        reader = sock.makefile("rb")
+        self._local.connection = (os.getpid(), sock, reader)
+        try:
+            if self.password:
+                auth = ("AUTH", self.username, self.password) if self.username else ("AUTH", self.password)
+                self._send(sock, reader, [auth])
+            if self.db:
+                self._send(sock, reader, [("SELECT", self.db)])
+        except Exception:
+            self._disconnect()
+            raise
+        return sock, reader
+
+    def _disconnect(self):
+        connection = getattr(self._local, "connection", None)
+        self._local.connection = None
+        if connection is not None:
+            try:
+                connection[2].close()
+                connection[1].close()
+            except OSError:
+                pass
+
+    @staticmethod
+    def _encode(command):
+        parts = [str(part).encode("utf-8") if not isinstance(part, bytes) else part for part in command]
+        return b"".join([b"*%d\r\n" % len(parts)] + [b"$%d\r\n%s\r\n" % (len(part), part) for part in parts])
+
+    def _read_reply(self, reader):
+        line = reader.readline()
+        if not line:
+            raise ConnectionError("Connection closed by the shared state server")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload.decode("utf-8")
+        if kind == b"-":
+            return RedisError(payload.decode("utf-8"))
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length < 0:
+                return None
+            data = reader.read(length + 2)
+            return data[:-2].decode("utf-8")
+        if kind == b"*":
+            length = int(payload)
+            return None if length < 0 else [self._read_reply(reader) for _ in range(length)]
+        raise ConnectionError(f"Unexpected reply from the shared state server: {line[:40]!r}")
+
+    def _read_replies(self, reader, commands):
+        replies = [self._read_reply(reader) for _ in commands]
+        for reply in replies:
+            if isinstance(reply, RedisError):
+                raise reply
+        return replies
+
+    def _send(self, sock, reader, commands):
+        sock.sendall(b"".join(self._encode(command) for command in commands))
+        return self._read_replies(reader, commands)
+
+    def execute(self, *commands):
+        """Send commands in one round trip (pipelined) and return their replies."""
+        reused = getattr(self._local, "connection", None) is not None
+        sock, reader = self._connect()
+        try:
+            sock.sendall(b"".join(self._encode(command) for command in commands))
+        except (ConnectionError, OSError):
+            self._disconnect()
+            # The server may have closed an idle connection; nothing reached it, so send again on a fresh one
+            if not reused:
+                raise
+            return self._send(*self._connect(), commands)
+        try:
+            return self._read_replies(reader, commands)
+        except (ConnectionError, OSError) as e:
+            self._disconnect()
+            # The commands may have run before the reply was lost: a claim or INCRBY must not run twice
+            if not reused or isinstance(e, socket.timeout) or not all(idempotent(command) for command in commands):
+                raise
+        return self._send(*self._connect(), commands)
+
+    def _key(self, key):
+        return self.key_prefix + key
+
+    def claim(self, keys, ttl, value="1"):
+        """Set all keys for ttl seconds unless one of them is already set; return whether they were set."""
+        ttl_ms = max(1, int(ttl * 1000))
+        reply = self.execute(("EVAL", CLAIM_SCRIPT, len(keys), *(self._key(key) for key in keys), value, ttl_ms))[0]
+        return reply == 1
+
+    def release(self, keys):
+        if keys:
+            self.execute(("DEL", *(self._key(key) for key in keys)))
+
+    def get(self, key):
+        return self.execute(("GET", self._key(key)))[0]
+
+    def set(self, key, value, ttl=None):
+        command = ("SET", self._key(key), value) + (("PX", max(1, int(ttl * 1000))) if ttl else ())
+        self.execute(command)
+
+    def incr(self, key, amount, ttl):
+        """Add amount to a counter and return the new total; the counter expires ttl seconds after its last change."""
+        total, _ = self.execute(("INCRBY", self._key(key), int(amount)), ("PEXPIRE", self._key(key), max(1, int(ttl * 1000))))
+        return total
+
+    def delete(self, key):
+        self.release([key])
+
+    def purge_expired(self):
+        """Nothing to do: the server expires keys itself."""
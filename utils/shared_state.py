@@ -0,0 +1,140 @@
+import itertools
+import os
+import sqlite3
+import threading
+import time
+
+from utils.plugins import STATE_BACKENDS
+
+# State that every worker process (and, with a network backend, every host) must agree on: which
+# events were claimed, cached articles and summaries, and rate-limit counters. A backend is a class
+# in STATE_BACKENDS with claim/release/get/set/incr/delete; `remote` tells callers whether it is
+# shared beyond this host, i.e. whether local caches in front of it are worth filling from it.
+
+_state = None
+_state_lock = threading.Lock()
+
+
+def get_shared_state():
+    """The backend named by SHARED_STATE (sqlite or redis), created on first use."""
+    global _state
+    with _state_lock:
+        if _state is None:
+            _state = STATE_BACKENDS.resolve(os.getenv("SHARED_STATE", "sqlite"))()
+        return _state
+
+
+def connect_sqlite(local, path):
+    """
+    The calling thread's WAL connection to the SQLite database at path, kept in local (a threading.local).
+    SQLite connections must not be used across fork (JOB_POOL_MODE=process forks from a request thread
+    that already has one), so a connection opened by another process is left alone.
+    """
+    connection = getattr(local, "connection", None)
+    if connection is not None and connection[0] == os.getpid():
+        return connection[1]
+    conn = sqlite3.connect(path, timeout=5.0, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    local.connection = (os.getpid(), conn)
+    return conn
+
+
+class SQLiteState:
+    """Shared state for all workers on one host, in a SQLite database (WAL)."""
+
+    remote = False
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv("SHARED_STATE_PATH", "data/shared_state.sqlite3")
+        self._local = threading.local()
+        # itertools.count so threads sharing the backend don't lose increments
+        self._writes = itertools.count(1)
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connect().execute(
+            "CREATE TABLE IF NOT EXISTS shared_state (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+        )
+
+    def _connect(self):
+        return connect_sqlite(self._local, self.path)
+
+    @staticmethod
+    def _expires_at(ttl):
+        return time.time() + ttl if ttl else None
+
+    def _wrote(self):
+        # Expired rows are only cleaned up now and then to keep writes cheap
+        if next(self._writes) % 1000 == 0:
+            self.purge_expired()
+
+    def claim(self, keys, ttl, value="1"):
+        """Atomically set all keys for ttl seconds; return False (setting nothing) if any of them is already set."""
+        now = time.time()
+        conn = self._connect()
+        # BEGIN IMMEDIATE takes the write lock up front, so two workers cannot both claim the same key
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            placeholders = ",".join("?" for _ in keys)
+            row = conn.execute(
+                f"SELECT 1 FROM shared_state WHERE key IN ({placeholders}) AND (expires_at IS NULL OR expires_at > ?)",
+                (*keys, now),
+            ).fetchone()
+            if row:
+                conn.execute("COMMIT")
+                return False
+            conn.executemany(
+                "INSERT OR REPLACE INTO shared_state (key, value, expires_at) VALUES (?, ?, ?)",
+                [(key, value, now + ttl) for key in keys],
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self._wrote()
+        return True
+
+    def release(self, keys):
+        self._connect().executemany("DELETE FROM shared_state WHERE key = ?", [(key,) for key in keys])
+
+    def get(self, key):
+        row = self._connect().execute(
+            "SELECT value FROM shared_state WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)", (key, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, value, ttl=None):
+        self._connect().execute(
+            "INSERT OR REPLACE INTO shared_state (key, value, expires_at) VALUES (?, ?, ?)", (key, value, self._expires_at(ttl))
+        )
+        self._wrote()
+
+    def incr(self, key, amount, ttl):
+        """Add amount to a counter and return the new total; a new counter expires after ttl seconds."""
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT value, expires_at FROM shared_state WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)", (key, now)
+            ).fetchone()
+            total = (int(row[0]) if row else 0) + amount
+            expires_at = row[1] if row else self._expires_at(ttl)
+            conn.execute(
+                "INSERT OR REPLACE INTO shared_state (key, value, expires_at) VALUES (?, ?, ?)", (key, str(total), expires_at)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self._wrote()
+        return total
+
+    def delete(self, key):
+        self.release([key])
+
+    def purge_expired(self):
+        """Delete expired rows from the shared database."""
+        self._connect().execute("DELETE FROM shared_state WHERE expires_at <= ?", (time.time(),))
@@ -0,0 +1,242 @@
+import atexit
+import hashlib
+import json
+import logging
+import os
+import queue
+import random
+import re
+import sys
+import threading
+import time
+import zlib
+from logging.handlers import QueueHandler, QueueListener
+
+from utils.metrics import counter, get_trace_id
+
+# Logging that stays off the hot path: callers only build a record and put it on a queue,
+# while a background listener thread redacts, formats and writes it. Log lines carry
+# structured fields (log.info("event received", event_id=..., team_id=...)) instead of
+# dumping whole payloads.
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")  # Options: 'text', 'json'
+# Records waiting for the writer; when it is full new records are dropped rather than blocking
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# Fraction of records kept per level, e.g. "DEBUG=0.01,INFO=0.1". Warnings and errors are never sampled.
+LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES", "")
+# Fields whose values are redacted, and how: 'mask' (replace), 'hash' (short digest, still
+# correlatable across lines), 'length' (keep only the size) or 'drop' (remove the field)
+LOG_REDACT_FIELDS = os.getenv("LOG_REDACT_FIELDS", "text,summary,content,challenge,token,authorization")
+LOG_REDACT_MODE = os.getenv("LOG_REDACT_MODE", "mask")
+# Longer string values are truncated
+LOG_MAX_FIELD_CHARS = int(os.getenv("LOG_MAX_FIELD_CHARS", "200"))
+
+# Credentials are scrubbed from messages and field values whatever the field policy says
+SECRET_PATTERNS = (
+    re.compile(r"xox[abposr]-[A-Za-z0-9-]+"),
+    re.compile(r"sk-[A-Za-z0-9_-]{8,}"),
+    re.compile(r"(?i)(bearer|bot)\s+[A-Za-z0-9._-]{16,}"),
+)
+
+LOG_DROPS = counter("bridge_log_records_dropped_total", "Log records dropped by sampling or a full queue.")
+
+# Keyword arguments that belong to logging itself rather than to the structured fields
+_LOGGING_KWARGS = ("exc_info", "stack_info", "stacklevel", "extra")
+
+_listener = None
+# Process that started the listener; a forked job worker inherits _listener but not its thread
+_listener_pid = None
+_configure_lock = threading.Lock()
+
+
+def parse_sample_rates(value):
+    rates = {}
+    for item in value.split(","):
+        level, _, rate = item.partition("=")
+        if level.strip() and rate.strip():
+            rates[logging.getLevelName(level.strip().upper())] = float(rate)
+    return rates
+
+
+class StructuredLogger(logging.LoggerAdapter):
+    """
+    Logger whose calls take structured fields as keyword arguments. Sampled-out records are
+    dropped before a LogRecord is even created, so they cost little more than a disabled level.
+    """
+
+    def log(self, level, msg, *args, **kwargs):
+        if self.isEnabledFor(level) and _sampler.keep(level):
+            msg, kwargs = self.process(msg, kwargs)
+            if kwargs.get("stack_info"):
+                self.logger.log(level, msg, *args, **kwargs)
+                return
+            exc_info = kwargs.get("exc_info")
+            if exc_info:
+                if isinstance(exc_info, BaseException):
+                    exc_info = (type(exc_info), exc_info, exc_info.__traceback__)
+                elif not isinstance(exc_info, tuple):
+                    exc_info = sys.exc_info()
+            # Building the record here skips Logger._log's stack walk for file/line, which the
+            # formatter doesn't use; other loggers in the process keep their caller info
+            record = self.logger.makeRecord(self.logger.name, level, "(unknown file)", 0, msg, args, exc_info or None,
+                                            extra=kwargs.get("extra"))
+            self.logger.handle(record)
+
+    def process(self, msg, kwargs):
+        fields = {key: kwargs.pop(key) for key in list(kwargs) if key not in _LOGGING_KWARGS}
+        if fields:
+            kwargs["extra"] = {**kwargs.get("extra", {}), "fields": fields}
+        return msg, kwargs
+
+
+class Sampler:
+    """
+    Keep a fraction of the records at each sampled level. The decision is made per trace id,
+    so a sampled request keeps all of its lines instead of a random subset of them.
+    """
+
+    def __init__(self, rates):
+        self.rates = rates
+
+    def keep(self, level):
+        rate = self.rates.get(level)
+        if rate is None or rate >= 1 or level >= logging.WARNING:
+            return True
+
+        trace_id = get_trace_id()
+        if trace_id:
+            keep = zlib.crc32(trace_id.encode("utf-8")) / 0xFFFFFFFF < rate
+        else:
+            keep = random.random() < rate
+        if not keep:
+            LOG_DROPS.inc(reason="sampled")
+        return keep
+
+
+_sampler = Sampler(parse_sample_rates(LOG_SAMPLE_RATES))
+
+
+def get_logger(name):
+    return StructuredLogger(logging.getLogger(name), {})
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Hand records to the listener thread. Unlike the stock QueueHandler, formatting is left to
+    the listener: the caller only resolves the message arguments and captures its trace id.
+    """
+
+    def prepare(self, record):
+        record.trace_id = get_trace_id()
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_DROPS.inc(reason="queue_full")
+
+
+class Redactor:
+    def __init__(self, fields, mode, max_chars):
+        self.fields = {field.strip().lower() for field in fields.split(",") if field.strip()}
+        self.mode = mode
+        self.max_chars = max_chars
+
+    def scrub(self, value):
+        for pattern in SECRET_PATTERNS:
+            value = pattern.sub("[secret]", value)
+        if len(value) > self.max_chars:
+            value = f"{value[:self.max_chars]}...(+{len(value) - self.max_chars} chars)"
+        return value
+
+    def redact_value(self, value):
+        text = value if isinstance(value, str) else json.dumps(value, default=str)
+        if self.mode == "hash":
+            return "sha256:" + hashlib.sha256(text.encode("utf-8")).hexdigest()[:12]
+        if self.mode == "length":
+            return f"<{len(text)} chars>"
+        return "[redacted]"
+
+    def apply(self, fields):
+        clean = {}
+        for key, value in fields.items():
+            if key.lower() in self.fields:
+                if self.mode == "drop":
+                    continue
+                clean[key] = self.redact_value(value)
+            elif isinstance(value, str):
+                clean[key] = self.scrub(value)
+            elif isinstance(value, (int, float, bool)) or value is None:
+                clean[key] = value
+            else:
+                clean[key] = self.scrub(json.dumps(value, default=str))
+        return clean
+
+
+class StructuredFormatter(logging.Formatter):
+    def __init__(self, redactor, fmt="text"):
+        super().__init__()
+        self.redactor = redactor
+        self.format_name = fmt
+
+    def format(self, record):
+        message = self.redactor.scrub(record.getMessage())
+        fields = self.redactor.apply(getattr(record, "fields", {}))
+        timestamp = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z"
+        trace_id = getattr(record, "trace_id", None)
+
+        if self.format_name == "json":
+            entry = {"ts": timestamp, "level": record.levelname, "logger": record.name, "msg": message}
+            if trace_id:
+                entry["trace_id"] = trace_id
+            entry.update(fields)
+            if record.exc_info:
+                entry["exc"] = self.formatException(record.exc_info)
+            return json.dumps(entry, default=str)
+
+        parts = [timestamp, record.levelname, record.name]
+        if trace_id:
+            parts.append(f"trace={trace_id}")
+        parts.append(message)
+        parts.extend(f"{key}={value}" for key, value in fields.items())
+        line = " ".join(parts)
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+def configure_logging(level=None, stream=None):
+    """
+    Route the root logger through a bounded queue to a background writer. Safe to call more
+    than once; every entry point (app.py, asgi_app.py, job worker processes) calls it at startup.
+    """
+    global _listener, _listener_pid
+
+    with _configure_lock:
+        if _listener is not None and _listener_pid == os.getpid():
+            return
+
+        writer = logging.StreamHandler(stream or sys.stdout)
+        writer.setFormatter(StructuredFormatter(
+            Redactor(LOG_REDACT_FIELDS, LOG_REDACT_MODE, LOG_MAX_FIELD_CHARS), LOG_FORMAT,
+        ))
+
+        log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        handler = NonBlockingQueueHandler(log_queue)
+
+        root = logging.getLogger()
+        for existing in list(root.handlers):
+            root.removeHandler(existing)
+        root.addHandler(handler)
+        root.setLevel(level or LOG_LEVEL)
+
+        _listener = QueueListener(log_queue, writer, respect_handler_level=False)
+        _listener.start()
+        _listener_pid = os.getpid()
+        # Flush whatever is still queued when the process exits
+        atexit.register(_listener.stop)